@@ -1,4 +1,5 @@
 import os
+from typing import List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -13,10 +14,103 @@ class Settings(BaseSettings):
     LLM_BASE_URL: str = os.getenv("LLM_BASE_URL", "http://scibox:8000")
     LLM_API_KEY: str = os.getenv("LLM_API_KEY", "secret_api_key")
 
+    # Shared HTTP connection pool for LLM calls
+    LLM_HTTP_POOL_LIMIT: int = 100
+    LLM_HTTP_LIMIT_PER_HOST: int = 20
+    LLM_HTTP_KEEPALIVE_TIMEOUT: float = 75.0  # sec
+    LLM_HTTP_DNS_CACHE_TTL: int = 300  # sec
+    LLM_HTTP_CONNECT_TIMEOUT: float = 10.0  # sec
+
+    # Micro-batching of concurrent embedding requests
+    EMBEDDING_BATCH_WINDOW_MS: float = 5.0
+    EMBEDDING_MAX_BATCH_SIZE: int = 32
+
+    # LLM quota limiter: "local" (per process) or "redis" (shared by all workers)
+    LLM_RATE_LIMIT_BACKEND: str = "local"
+    LLM_RATE_LIMIT_LEASE_SIZE: int = 1
+    LLM_RATE_LIMIT_LEASE_TTL: float = 1.0  # sec
+
+    # Retries for failed LLM requests
+    LLM_RETRY_MAX_ATTEMPTS: int = 3
+    LLM_RETRY_BASE_DELAY: float = 0.5  # sec
+    LLM_RETRY_DEADLINE: float = 90.0  # sec
+
+    # Per-model circuit breaker: fall back to local services while a model is down
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_SLOW_CALL_SECONDS: float = 30.0  # sec
+    LLM_BREAKER_OPEN_SECONDS: float = 30.0  # sec
+
+    # Redis cache of deterministic LLM responses (evaluation, anti-cheat)
+    LLM_RESPONSE_CACHE_ENABLED: bool = True
+
+    # Close JSON-answer streams once the object is complete; a sample of calls
+    # runs to completion to measure the tokens saved
+    LLM_EARLY_STOP_ENABLED: bool = True
+    LLM_EARLY_STOP_BASELINE_RATE: float = 0.05
+
+    # Submission review: "split" (evaluator + anti-cheat calls), "fused" (one
+    # coder-model call) or "auto" (fused while the model queues back up)
+    SUBMISSION_REVIEW_MODE: str = "split"
+    SUBMISSION_REVIEW_AUTO_QUEUE_DEPTH: int = 2
+
+    # Reject generated tasks too close to a known one (MinHash over word shingles,
+    # bge-m3 embedding); rejected tasks are regenerated up to MAX_REGENERATIONS times
+    TASK_DEDUP_ENABLED: bool = True
+    TASK_DEDUP_EMBEDDING_THRESHOLD: float = 0.92
+    TASK_DEDUP_MINHASH_THRESHOLD: float = 0.6
+    TASK_DEDUP_MAX_REGENERATIONS: int = 1
+    TASK_DEDUP_RESERVATION_TTL: int = 10800  # sec a checked task blocks duplicates before it is stored
+
+    # Stored tasks reused across interviews (least exposed, least recently used first);
+    # tasks served this many times are retired, and generation tops up pairs below MIN_STOCK
+    TASK_BANK_ENABLED: bool = True
+    TASK_BANK_MAX_EXPOSURE: int = 25
+    TASK_BANK_MIN_STOCK: int = 10
+
+    # Pre-generated tasks per (level, domain) in Redis, refilled in the background
+    TASK_POOL_ENABLED: bool = True
+    TASK_POOL_LEVELS: List[str] = ["junior", "middle", "senior"]
+    TASK_POOL_DOMAINS: List[str] = ["algorithms", "backend", "frontend"]
+    TASK_POOL_TARGET_DEPTH: int = 5
+    TASK_POOL_LOW_WATER: int = 2
+    TASK_POOL_REFILL_INTERVAL: float = 30.0  # sec
+
+    # Generate harder/same/easier follow-ups while the candidate solves a task
+    TASK_SPECULATION_ENABLED: bool = True
+    TASK_SPECULATION_TTL: int = 7200  # sec
+
     DOCKER_TIMEOUT: int = 10  # sec
     DOCKER_MEM_LIMIT: str = "128m"
     DOCKER_CPU_QUOTA: int = 50000
 
+    # Code runs execute on a bounded thread pool; runs beyond workers + queue get 429
+    CODE_RUN_MAX_WORKERS: int = 8
+    CODE_RUN_MAX_QUEUE: int = 16
+
+    # Submissions run all of a task's test cases in one sandbox invocation;
+    # each case is stopped after TEST_CASE_TIMEOUT
+    TEST_CASE_TIMEOUT: float = 2.0  # sec
+
+    # Warm sandbox containers per language, sized to the recent peak of
+    # concurrent runs plus SPARE; replaced after MAX_RUNS runs or a violation
+    SANDBOX_POOL_ENABLED: bool = True
+    SANDBOX_POOL_MIN_SIZE: int = 1
+    SANDBOX_POOL_MAX_SIZE: int = 4
+    SANDBOX_POOL_SPARE: int = 1
+    SANDBOX_POOL_MAX_RUNS: int = 50
+    SANDBOX_POOL_PIDS_LIMIT: int = 64
+    SANDBOX_POOL_ACQUIRE_TIMEOUT: float = 5.0  # sec
+
+    # Sandbox backend for code runs: "docker" (the warm container pool above) or
+    # "namespace" (fork into Linux namespaces on this host, no Docker daemon;
+    # the service needs CAP_SYS_ADMIN or user namespaces)
+    SANDBOX_BACKEND: str = "docker"
+    NAMESPACE_SANDBOX_MAX_CONCURRENT: int = 8
+    NAMESPACE_SANDBOX_SECCOMP: bool = True
+    NAMESPACE_SANDBOX_CGROUP_ROOT: str = ""  # delegated cgroup v2 dir; rlimits when empty
+    NAMESPACE_SANDBOX_SCRATCH_SIZE: str = "16m"
+    NAMESPACE_SANDBOX_HIDE_PATHS: List[str] = ["/app", "/root", "/home", "/run/secrets"]
+
     ENV: str = "development"
 
 settings = Settings()
@@ -84,6 +84,6 @@ async def close_db():
 
 
 # Import models after engine is created to avoid circular imports
-from app.db.models import Base, Interview, Task, Solution, Metric, Embedding, ChatMessage
+from app.db.models import Base, Interview, Task, Solution, Metric, Embedding, ChatMessage, TaskFingerprint
 
-__all__ = ["Base", "Interview", "Task", "Solution", "Metric", "Embedding", "ChatMessage", "get_db", "engine", "AsyncSessionLocal"]
+__all__ = ["Base", "Interview", "Task", "Solution", "Metric", "Embedding", "ChatMessage", "TaskFingerprint", "get_db", "engine", "AsyncSessionLocal"]
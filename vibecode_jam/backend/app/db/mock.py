@@ -67,6 +67,26 @@ class MockAsyncSession:
                 return _mock_data["tasks"].get(id)
         return None
 
+    async def execute(self, statement):
+        """Mock query: no rows (queries are not interpreted)"""
+        return MockResult()
+
+
+class MockResult:
+    """Empty query result"""
+
+    def scalar_one_or_none(self):
+        return None
+
+    def scalars(self):
+        return self
+
+    def all(self) -> List:
+        return []
+
+    def first(self):
+        return None
+
 
 class MockSessionFactory:
     """Mock session factory"""
@@ -12,5 +12,6 @@ from .solution import Solution
 from .metric import Metric
 from .embedding import Embedding
 from .chat_message import ChatMessage
+from .task_fingerprint import TaskFingerprint
 
-__all__ = ["Base", "Interview", "Task", "Solution", "Metric", "Embedding", "ChatMessage"]
+__all__ = ["Base", "Interview", "Task", "Solution", "Metric", "Embedding", "ChatMessage", "TaskFingerprint"]
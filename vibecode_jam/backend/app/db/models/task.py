@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -7,15 +7,28 @@ class Task(Base):
     __tablename__ = "tasks"
 
     id = Column(Integer, primary_key=True, index=True)
-    interview_id = Column(Integer, ForeignKey("interviews.id", ondelete="CASCADE"), nullable=False)
+    # NULL for bank tasks; interviews get copies of them
+    interview_id = Column(Integer, ForeignKey("interviews.id", ondelete="CASCADE"), nullable=True)
+    # Bank task this interview copy was drawn from; NULL for bank tasks themselves
+    source_task_id = Column(Integer, ForeignKey("tasks.id", ondelete="SET NULL"), nullable=True)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     level = Column(String(50), nullable=True)
     domain = Column(String(100), nullable=True)
     task_data = Column(JSON, default={})
     times_used = Column(Integer, default=0)
+    last_used_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     interview = relationship("Interview", back_populates="tasks")
     solutions = relationship("Solution", back_populates="task", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Task bank selection: least exposed, then least recently used
+        Index(
+            "idx_tasks_bank_sources",
+            "level", "domain", "times_used", "last_used_at",
+            postgresql_where=text("source_task_id IS NULL AND interview_id IS NULL")
+        ),
+    )
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, LargeBinary
+from datetime import datetime
+from .base import Base
+
+class TaskFingerprint(Base):
+    __tablename__ = "task_fingerprints"
+
+    id = Column(Integer, primary_key=True)
+    # Fingerprints are written only for stored tasks: generated tasks are
+    # registered after their row is committed, older ones are backfilled
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    domain = Column(String(100), nullable=False)
+    title = Column(String(255), nullable=False)
+    # Raw little-endian arrays (uint32 MinHash signature, float32 unit
+    # embedding): loading 100k rows stays a memcpy instead of parsing arrays
+    minhash = Column(LargeBinary, nullable=False)
+    embedding = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,20 +1,38 @@
+import asyncio
 import logging
 import os
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.routers import interview, code, chat
+import redis.asyncio as aioredis
+
+from app.config import settings
 from app.services.scibox import (
     SciboxClient, TaskGenerator, SolutionEvaluator,
-    AIDialogue, AntiCheatLLM, EmbeddingSearch
+    AIDialogue, AntiCheatLLM, EmbeddingSearch, SubmissionReviewer, TaskDedupIndex
 )
+from app.services.scibox.client import MODEL_QUOTAS
+from app.services.scibox.distributed_limiter import DistributedRateLimiter
+from app.services.scibox.retry import RetryPolicy
+from app.services.scibox.response_cache import ResponseCache
+from app.services.scibox.instrumentation import llm_metrics
 from app.services.cache import RedisCache
+from app.services import code_executor
+from app.services.code_runner import get_code_runner, shutdown_code_runner
+from app.services.task_bank import TaskBank
+from app.services.task_pool import TaskPool
+from app.services.task_speculator import TaskSpeculator
+from app.services.http_transport import start_transport, close_transport, HTTPTransport
 from app.services.mock_task_generator import MockTaskGenerator
+from app.services.heuristic_evaluator import HeuristicEvaluator, HeuristicAntiCheat
 from app.db.session import engine
+from app.db import AsyncSessionLocal
 from app.db.models.base import Base
 # Import all models to register them with SQLAlchemy
-from app.db.models import interview as interview_model, task, solution, metric, chat_message, embedding
+from app.db.models import interview as interview_model, task, solution, metric, chat_message, embedding, task_fingerprint
 
 # Setup logging
 logging.basicConfig(
@@ -30,7 +48,14 @@ solution_evaluator: SolutionEvaluator = None
 ai_dialogue: AIDialogue = None
 anti_cheat_llm: AntiCheatLLM = None
 embedding_search: EmbeddingSearch = None
+submission_reviewer: SubmissionReviewer = None
+task_dedup: TaskDedupIndex = None
+task_bank: TaskBank = None
+task_pool: TaskPool = None
+task_speculator: TaskSpeculator = None
 cache: RedisCache = None
+http_transport: HTTPTransport = None
+quota_redis: aioredis.Redis = None
 
 
 @asynccontextmanager
@@ -39,49 +64,176 @@ async def lifespan(app: FastAPI):
     Application lifespan manager for startup and shutdown
     """
     global scibox_client, task_generator, solution_evaluator
-    global ai_dialogue, anti_cheat_llm, embedding_search, cache
+    global ai_dialogue, anti_cheat_llm, embedding_search, submission_reviewer, cache, http_transport
+    global quota_redis, task_dedup, task_bank, task_pool, task_speculator
 
     # Startup
     logger.info("Starting VibeCode Jam Backend...")
 
+    # Shared HTTP connection pool for all LLM calls
+    http_transport = await start_transport()
+
+    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+    # Share LLM quotas across workers/replicas through Redis if configured
+    rate_limiter = None
+    if settings.LLM_RATE_LIMIT_BACKEND == "redis":
+        quota_redis = aioredis.from_url(redis_url)
+        rate_limiter = DistributedRateLimiter(
+            quota_redis,
+            MODEL_QUOTAS,
+            lease_size=settings.LLM_RATE_LIMIT_LEASE_SIZE,
+            lease_ttl=settings.LLM_RATE_LIMIT_LEASE_TTL
+        )
+        logger.info("Using Redis-backed distributed rate limiter")
+
+    # Initialize cache
+    try:
+        cache = RedisCache(redis_url)
+        await cache.connect()
+        logger.info("Redis cache connected")
+    except Exception as e:
+        logger.warning(f"Redis cache initialization failed: {e}. Caching disabled.")
+        cache = None
+
+    # Persistent cache for deterministic LLM calls (needs Redis)
+    response_cache = None
+    if settings.LLM_RESPONSE_CACHE_ENABLED and cache and cache.redis:
+        response_cache = ResponseCache(cache.redis)
+
     # Initialize Scibox client
     try:
         scibox_api_key = os.getenv("SCIBOX_API_KEY", "sk-Jw0mXI7PMgeFYVCW8e8PKw")
-        scibox_client = SciboxClient(api_key=scibox_api_key)
+        scibox_client = SciboxClient(
+            api_key=scibox_api_key,
+            transport=http_transport,
+            rate_limiter=rate_limiter,
+            retry_policy=RetryPolicy(
+                max_attempts=settings.LLM_RETRY_MAX_ATTEMPTS,
+                base_delay=settings.LLM_RETRY_BASE_DELAY,
+                deadline=settings.LLM_RETRY_DEADLINE
+            ),
+            breaker_options={
+                "failure_threshold": settings.LLM_BREAKER_FAILURE_THRESHOLD,
+                "slow_call_seconds": settings.LLM_BREAKER_SLOW_CALL_SECONDS,
+                "open_seconds": settings.LLM_BREAKER_OPEN_SECONDS
+            },
+            response_cache=response_cache,
+            early_stop=settings.LLM_EARLY_STOP_ENABLED,
+            early_stop_baseline_rate=settings.LLM_EARLY_STOP_BASELINE_RATE
+        )
         await scibox_client.__aenter__()
         logger.info("Scibox client initialized")
 
-        # Initialize services
-        task_generator = TaskGenerator(scibox_client)
-        solution_evaluator = SolutionEvaluator(scibox_client)
+        # Near-duplicate check for generated tasks (persisted with the real database)
+        if settings.TASK_DEDUP_ENABLED:
+            task_dedup = TaskDedupIndex(
+                scibox_client,
+                session_factory=AsyncSessionLocal,
+                embedding_threshold=settings.TASK_DEDUP_EMBEDDING_THRESHOLD,
+                minhash_threshold=settings.TASK_DEDUP_MINHASH_THRESHOLD,
+                reservation_ttl=settings.TASK_DEDUP_RESERVATION_TTL
+            )
+            try:
+                await task_dedup.load()
+            except Exception as e:
+                logger.warning(f"Task dedup index load failed: {e}. Starting empty.")
+
+        # Initialize services (local fallbacks serve calls while a model's circuit is open)
+        task_generator = TaskGenerator(
+            scibox_client,
+            fallback=MockTaskGenerator(),
+            dedup=task_dedup,
+            max_regenerations=settings.TASK_DEDUP_MAX_REGENERATIONS
+        )
+        solution_evaluator = SolutionEvaluator(scibox_client, fallback=HeuristicEvaluator())
         ai_dialogue = AIDialogue(scibox_client)
-        anti_cheat_llm = AntiCheatLLM(scibox_client)
+        anti_cheat_llm = AntiCheatLLM(scibox_client, fallback=HeuristicAntiCheat())
         embedding_search = EmbeddingSearch(scibox_client)
+        submission_reviewer = SubmissionReviewer(
+            scibox_client,
+            solution_evaluator,
+            anti_cheat_llm,
+            mode=settings.SUBMISSION_REVIEW_MODE,
+            auto_queue_depth=settings.SUBMISSION_REVIEW_AUTO_QUEUE_DEPTH
+        )
         logger.info("All Scibox services initialized")
     except Exception as e:
         logger.warning(f"Scibox initialization failed: {e}. Using mock services for development.")
         scibox_client = None
+        task_dedup = None
         task_generator = MockTaskGenerator()
         solution_evaluator = None
         ai_dialogue = None
         anti_cheat_llm = None
         embedding_search = None
+        submission_reviewer = None
         logger.info("Mock services initialized")
 
-    # Initialize cache
-    try:
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-        cache = RedisCache(redis_url)
-        await cache.connect()
-        logger.info("Redis cache connected")
-    except Exception as e:
-        logger.warning(f"Redis cache initialization failed: {e}. Caching disabled.")
-        cache = None
+    # Pre-started containers or namespace sandboxes for code runs
+    # (cold containers when the backend is unavailable)
+    if settings.SANDBOX_POOL_ENABLED:
+        try:
+            await asyncio.to_thread(code_executor.start_sandbox_pool)
+        except Exception as e:
+            logger.warning(
+                f"Sandbox backend {settings.SANDBOX_BACKEND} unavailable: {e}. "
+                "Code runs start a container each time."
+            )
+
+    # Stored tasks served before any generation (needs the real database)
+    if settings.TASK_BANK_ENABLED and AsyncSessionLocal is not None:
+        task_bank = TaskBank(
+            AsyncSessionLocal,
+            max_exposure=settings.TASK_BANK_MAX_EXPOSURE,
+            min_stock=settings.TASK_BANK_MIN_STOCK
+        )
+
+    # Ready-made tasks for /start (only real generated tasks are pooled)
+    if settings.TASK_POOL_ENABLED and scibox_client and cache and cache.redis:
+        task_pool = TaskPool(
+            cache.redis,
+            task_generator,
+            levels=settings.TASK_POOL_LEVELS,
+            domains=settings.TASK_POOL_DOMAINS,
+            target_depth=settings.TASK_POOL_TARGET_DEPTH,
+            low_water=settings.TASK_POOL_LOW_WATER,
+            refill_interval=settings.TASK_POOL_REFILL_INTERVAL,
+            bank=task_bank,
+            dedup=task_dedup
+        )
+        await task_pool.start()
+
+    # Follow-up tasks generated while the candidate works; unused ones go to the pool
+    if settings.TASK_SPECULATION_ENABLED and scibox_client and cache and cache.redis:
+        task_speculator = TaskSpeculator(
+            cache.redis,
+            task_generator,
+            pool=task_pool,
+            ttl=settings.TASK_SPECULATION_TTL,
+            dedup=task_dedup
+        )
 
     yield
 
     # Shutdown
     logger.info("Shutting down VibeCode Jam Backend...")
+    try:
+        if task_pool:
+            await task_pool.stop()
+    except Exception as e:
+        logger.warning(f"Error stopping task pool: {e}")
+
+    try:
+        await asyncio.to_thread(shutdown_code_runner)
+    except Exception as e:
+        logger.warning(f"Error stopping code runner: {e}")
+
+    try:
+        await asyncio.to_thread(code_executor.stop_sandbox_pool)
+    except Exception as e:
+        logger.warning(f"Error stopping sandbox pool: {e}")
+
     try:
         if scibox_client:
             await scibox_client.__aexit__(None, None, None)
@@ -94,6 +246,17 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Error shutting down cache: {e}")
 
+    try:
+        if quota_redis:
+            await quota_redis.close()
+    except Exception as e:
+        logger.warning(f"Error shutting down quota Redis client: {e}")
+
+    try:
+        await close_transport()
+    except Exception as e:
+        logger.warning(f"Error shutting down HTTP transport: {e}")
+
     logger.info("Shutdown complete")
 
 
@@ -154,11 +317,48 @@ async def detailed_health():
         "services": {
             "scibox": {
                 "status": "connected" if scibox_client else "disconnected",
-                "rate_limiter": "active"
+                "rate_limiter": scibox_client.rate_limiter.get_stats() if scibox_client else {},
+                "scheduler": scibox_client.scheduler.get_stats() if scibox_client else {},
+                "retries": scibox_client.get_retry_stats() if scibox_client else {},
+                "circuit_breakers": scibox_client.get_breaker_stats() if scibox_client else {},
+                "token_budget": scibox_client.token_budget.get_stats() if scibox_client else {},
+                "structured_output": scibox_client.structured_output.get_stats() if scibox_client else {},
+                "early_stop": scibox_client.early_stop_stats.get_stats() if scibox_client else {},
+                "submission_review": submission_reviewer.get_stats() if submission_reviewer else {},
+                "response_cache": (
+                    scibox_client.response_cache.get_stats()
+                    if scibox_client and scibox_client.response_cache else {}
+                ),
+                "coalescing": scibox_client.get_coalesce_stats() if scibox_client else {},
+                "latency": llm_metrics.get_stats(),
+                "embedding_batching": (
+                    scibox_client.embedding_batcher.get_stats()
+                    if scibox_client and scibox_client.embedding_batcher else {}
+                )
             },
+            "http_transport": http_transport.get_stats() if http_transport else {"status": "unavailable"},
             "cache": cache_stats,
+            "code_runner": get_code_runner().get_stats(),
+            "sandbox_pool": (
+                code_executor.get_sandbox_pool().get_stats()
+                if code_executor.get_sandbox_pool() else {"status": "disabled"}
+            ),
+            "task_dedup": task_dedup.get_stats() if task_dedup else {"status": "disabled"},
+            "task_bank": task_bank.get_stats() if task_bank else {"status": "disabled"},
+            "task_pool": task_pool.get_stats() if task_pool else {"status": "disabled"},
+            "task_speculation": task_speculator.get_stats() if task_speculator else {"status": "disabled"},
             "embedding_search": {
                 "solutions_cached": embedding_search.get_stats() if embedding_search else {}
             }
         }
     }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """LLM latency histograms and sandbox pool counters in Prometheus text format"""
+    body = llm_metrics.render_prometheus()
+    sandbox_pool = code_executor.get_sandbox_pool()
+    if sandbox_pool:
+        body += sandbox_pool.render_prometheus()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from typing import AsyncGenerator, Dict, List, Optional
+import asyncio
+import json
 import logging
 
-from app.schemas.code import SubmitCodeRequest, CodeSubmitResponse
+from app.schemas.code import RunCodeRequest, CodeRunResponse, SubmitCodeRequest, CodeSubmitResponse
 from app.db import get_db
 from app.db.models import Solution, Task, Interview
 from app import main
+from app.services.code_runner import CodeRunner, ExecutorBusyError, get_code_runner
+from app.services.test_harness import run_tests, format_passed
 from worker.tasks import enqueue_submission
 
 logger = logging.getLogger(__name__)
@@ -14,6 +19,52 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+@router.post("/run", response_model=CodeRunResponse)
+async def run_code_endpoint(
+    request: RunCodeRequest,
+    db: AsyncSession = Depends(get_db),
+    runner: CodeRunner = Depends(get_code_runner)
+):
+    """
+    Run code in the sandbox and return its output
+
+    Runs execute on a bounded worker pool; when it is saturated the request
+    is rejected with 429 instead of waiting
+    """
+    interview = await db.get(Interview, request.session_id)
+    if not interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    try:
+        result = await runner.run(request.code, request.language)
+    except ExecutorBusyError as e:
+        logger.warning(f"Code run rejected: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+
+    return CodeRunResponse(**result)
+
+
+async def _run_task_tests(task: Task, code: str, language: str) -> Dict:
+    """Run every test case of a task against a submission (429 when the runner is saturated)"""
+    try:
+        return await run_tests(task.task_data or {}, code, language)
+    except ExecutorBusyError as e:
+        logger.warning(f"Test run rejected: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+
+
+def _new_solution(request: SubmitCodeRequest, test_results: Dict) -> Solution:
+    return Solution(
+        interview_id=request.session_id,
+        task_id=request.task_id,
+        code=request.code,
+        language=request.language,
+        visible_tests_passed=test_results["visible_passed"],
+        hidden_tests_passed=test_results["hidden_passed"],
+        execution_time_ms=round(test_results["execution_time_ms"])
+    )
+
+
 @router.post("/submit", response_model=CodeSubmitResponse)
 async def submit_code_endpoint(
     request: SubmitCodeRequest,
@@ -34,18 +85,16 @@ async def submit_code_endpoint(
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
 
+        # Visible and hidden tests in one sandbox run
+        test_results = await _run_task_tests(task, request.code, request.language)
+
         # Save solution to database
-        solution = Solution(
-            interview_id=request.session_id,
-            task_id=request.task_id,
-            code=request.code,
-            language=request.language
-        )
+        solution = _new_solution(request, test_results)
         db.add(solution)
         await db.commit()
         await db.refresh(solution)
 
-        logger.info(f"Solution submitted: {solution.id}")
+        logger.info(f"Solution submitted: {solution.id} ({format_passed(test_results)} tests passed)")
 
         # Check cache for evaluation
         if main.cache:
@@ -53,35 +102,22 @@ async def submit_code_endpoint(
             if cached_eval:
                 logger.info("Using cached evaluation")
                 return CodeSubmitResponse(
-                    tests_passed="From cache",
+                    tests_passed=format_passed(test_results),
                     score=cached_eval.get("overall_score", 0),
                     evaluation=cached_eval,
                     next_task_ready=True
                 )
 
-        # Evaluate solution using Scibox
-        if not main.solution_evaluator:
-            raise Exception("Solution evaluator not initialized")
+        # Evaluate solution and check originality using Scibox
+        # (one fused call or two calls, see SUBMISSION_REVIEW_MODE)
+        if not main.submission_reviewer:
+            raise Exception("Submission reviewer not initialized")
 
-        evaluation = await main.solution_evaluator.evaluate_solution(
+        evaluation, cheat_check = await main.submission_reviewer.review(
             task=task.task_data or {},
             code=request.code,
-            test_results={
-                "visible_passed": 0,
-                "visible_total": 3,
-                "hidden_passed": 0,
-                "hidden_total": 5
-            },
-            execution_time_ms=0.0,
-            language=request.language
-        )
-
-        # Check code originality
-        if not main.anti_cheat_llm:
-            raise Exception("Anti-cheat service not initialized")
-
-        cheat_check = await main.anti_cheat_llm.check_code_originality(
-            code=request.code,
+            test_results=test_results,
+            execution_time_ms=test_results["execution_time_ms"],
             language=request.language,
             task_context=task.description if task else ""
         )
@@ -107,23 +143,9 @@ async def submit_code_endpoint(
         await enqueue_submission(solution.id, request.code, request.language, db)
 
         return CodeSubmitResponse(
-            tests_passed="Evaluating...",
+            tests_passed=format_passed(test_results),
             score=evaluation.get("overall_score", 0),
-            evaluation={
-                "scores": {
-                    "correctness": evaluation.get("correctness_score", 0),
-                    "code_quality": evaluation.get("code_quality_score", 0),
-                    "efficiency": evaluation.get("efficiency_score", 0),
-                    "overall": evaluation.get("overall_score", 0)
-                },
-                "feedback": evaluation.get("feedback", {}),
-                "anti_cheat": {
-                    "similarity_score": cheat_check.get("similarity_score", 0),
-                    "is_suspicious": cheat_check.get("is_suspicious", False),
-                    "recommendation": cheat_check.get("recommendation", "accept")
-                },
-                "similar_solutions_found": len(similar_solutions) > 0
-            },
+            evaluation=_format_evaluation(evaluation, cheat_check, similar_solutions, test_results),
             next_task_ready=True
         )
 
@@ -134,6 +156,176 @@ async def submit_code_endpoint(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _format_evaluation(evaluation: Dict, cheat_check: Dict, similar_solutions: List, test_results: Dict) -> Dict:
+    """Evaluation payload shared by /submit and /submit/stream"""
+    return {
+        "scores": {
+            "correctness": evaluation.get("correctness_score", 0),
+            "code_quality": evaluation.get("code_quality_score", 0),
+            "efficiency": evaluation.get("efficiency_score", 0),
+            "overall": evaluation.get("overall_score", 0)
+        },
+        "feedback": evaluation.get("feedback", {}),
+        "anti_cheat": {
+            "similarity_score": cheat_check.get("similarity_score", 0),
+            "is_suspicious": cheat_check.get("is_suspicious", False),
+            "recommendation": cheat_check.get("recommendation", "accept")
+        },
+        "similar_solutions_found": len(similar_solutions) > 0,
+        "tests": test_results
+    }
+
+
+def _sse(event: str, data: Dict) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/submit/stream")
+async def submit_code_stream_endpoint(
+    request: SubmitCodeRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Submit code solution and stream the evaluation over SSE
+
+    Tests run before the stream starts, so a saturated runner still gets 429
+
+    Events:
+        tests: test harness results
+        field: one top-level evaluation field as soon as the model has written it
+        anti_cheat: originality check result
+        result: final payload (same shape as /submit's evaluation)
+        error: evaluation failed
+    """
+    interview = await db.get(Interview, request.session_id)
+    if not interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    task = await db.get(Task, request.task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if not main.submission_reviewer:
+        raise HTTPException(status_code=500, detail="Scibox services not initialized")
+
+    test_results = await _run_task_tests(task, request.code, request.language)
+
+    solution = _new_solution(request, test_results)
+    db.add(solution)
+    await db.commit()
+    await db.refresh(solution)
+    logger.info(f"Solution submitted (stream): {solution.id} ({format_passed(test_results)} tests passed)")
+
+    task_data = task.task_data or {}
+    task_context = task.description or ""
+
+    return StreamingResponse(
+        _stream_submission(solution.id, request, task_data, task_context, test_results),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _stream_submission(
+    solution_id: int,
+    request: SubmitCodeRequest,
+    task_data: Dict,
+    task_context: str,
+    test_results: Dict
+) -> AsyncGenerator[str, None]:
+    """Run evaluation and anti-cheat for a saved solution, emitting SSE events"""
+    checks = similar = None
+    try:
+        yield _sse("tests", test_results)
+
+        if main.cache:
+            cached_eval = await main.cache.get_cached_evaluation(request.code)
+            if cached_eval:
+                logger.info("Using cached evaluation")
+                yield _sse("result", {
+                    "tests_passed": format_passed(test_results),
+                    "score": cached_eval.get("overall_score", 0),
+                    "evaluation": cached_eval,
+                    "next_task_ready": True
+                })
+                return
+
+        similar = asyncio.create_task(_find_similar(request.code))
+
+        if main.submission_reviewer.choose_mode() == "fused":
+            # One call answers both; fields arrive together
+            evaluation, cheat_check = await main.submission_reviewer.review(
+                task=task_data,
+                code=request.code,
+                test_results=test_results,
+                execution_time_ms=test_results["execution_time_ms"],
+                language=request.language,
+                task_context=task_context,
+                mode="fused"
+            )
+            for field, value in evaluation.items():
+                yield _sse("field", {"field": field, "value": value})
+        else:
+            # Anti-cheat runs while the evaluation streams
+            checks = asyncio.create_task(main.anti_cheat_llm.check_code_originality(
+                code=request.code,
+                language=request.language,
+                task_context=task_context
+            ))
+
+            evaluation = {}
+            async for event in main.solution_evaluator.evaluate_solution_stream(
+                task=task_data,
+                code=request.code,
+                test_results=test_results,
+                execution_time_ms=test_results["execution_time_ms"],
+                language=request.language
+            ):
+                if event["type"] == "field":
+                    yield _sse("field", {"field": event["field"], "value": event["value"]})
+                else:
+                    evaluation = event["evaluation"]
+
+            cheat_check = await checks
+
+        similar_solutions = await similar
+        yield _sse("anti_cheat", cheat_check)
+
+        # The request's session is closed once the response starts; use a new one
+        async for session in get_db():
+            solution = await session.get(Solution, solution_id)
+            solution.evaluation = evaluation
+            solution.suspicious_score = cheat_check.get("similarity_score", 0)
+            await session.commit()
+            await enqueue_submission(solution_id, request.code, request.language, session)
+
+        if main.cache:
+            await main.cache.cache_evaluation(request.code, evaluation)
+
+        yield _sse("result", {
+            "tests_passed": format_passed(test_results),
+            "score": evaluation.get("overall_score", 0),
+            "evaluation": _format_evaluation(evaluation, cheat_check, similar_solutions, test_results),
+            "next_task_ready": True
+        })
+
+    except Exception as e:
+        logger.error(f"Code submission stream error: {e}")
+        yield _sse("error", {"detail": str(e)})
+    finally:
+        for pending in (checks, similar):
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+
+async def _find_similar(code: str) -> List:
+    """Similar known solutions for a submission"""
+    if not main.embedding_search:
+        return []
+    return await main.embedding_search.find_similar(code=code, threshold=0.85)
+
+
 @router.get("/hint/{session_id}/{task_id}")
 async def get_hint(
     session_id: int,
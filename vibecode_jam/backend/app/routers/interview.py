@@ -1,16 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Tuple
 import logging
 import traceback
 
 from app.db import get_db
 from app.schemas.interview import InterviewStartRequest, InterviewResponse, AdaptTaskResponse
-from app.db.models import Interview, Task
-from app.services.scibox import TaskGenerator
-from app.services.cache import RedisCache
+from app.db.models import Interview, Task, Solution
+from app.services.scibox import TaskGenerator, TaskDedupIndex
+from app.services.task_bank import TaskBank, store_generated
+from app.services.task_pool import TaskPool
+from app.services.task_speculator import TaskSpeculator, step_level
+from app.services.scibox.task_generator import adapt_step
 
 logger = logging.getLogger(__name__)
 
+# Score assumed when no evaluated solution exists yet ("same difficulty")
+DEFAULT_SCORE = 50.0
+
 router = APIRouter()
 
 
@@ -29,16 +37,68 @@ async def get_task_generator() -> TaskGenerator:
     return task_generator
 
 
-async def get_cache_service() -> RedisCache | None:
+async def get_task_bank() -> TaskBank | None:
+    """
+    Dependency to get the optional task bank
+    Returns None without a real database (tasks come from the pool or generation)
+    """
+    from app.main import task_bank
+    return task_bank
+
+
+async def get_task_pool() -> TaskPool | None:
     """
-    Dependency to get optional Redis cache
-    Returns None if cache is not available (graceful degradation)
+    Dependency to get the optional pre-generated task pool
+    Returns None if the pool is disabled (tasks are generated live)
     """
-    from app.main import cache
-    if cache and cache.redis:
-        return cache
-    logger.warning("Redis cache not available - caching disabled")
-    return None
+    from app.main import task_pool
+    return task_pool
+
+
+async def get_task_dedup() -> TaskDedupIndex | None:
+    """
+    Dependency to get the optional near-duplicate index
+    Returns None if task dedup is disabled
+    """
+    from app.main import task_dedup
+    return task_dedup
+
+
+async def get_task_speculator() -> TaskSpeculator | None:
+    """
+    Dependency to get the optional next-task speculator
+    Returns None if speculation is disabled (next tasks are generated on request)
+    """
+    from app.main import task_speculator
+    return task_speculator
+
+
+async def get_latest_attempt(db: AsyncSession, interview_id: int) -> Tuple[Optional[Task], Optional[float]]:
+    """
+    Task the candidate last worked on and their score on it
+
+    Returns:
+        (task, overall score) - the score is None until a solution is evaluated
+    """
+    solution = (await db.execute(
+        select(Solution)
+        .where(Solution.interview_id == interview_id)
+        .order_by(Solution.id.desc())
+        .limit(1)
+    )).scalar_one_or_none()
+
+    if solution is not None:
+        task = await db.get(Task, solution.task_id)
+        score = (solution.evaluation or {}).get("overall_score")
+        return task, float(score) if score is not None else None
+
+    task = (await db.execute(
+        select(Task)
+        .where(Task.interview_id == interview_id)
+        .order_by(Task.id.desc())
+        .limit(1)
+    )).scalar_one_or_none()
+    return task, None
 
 
 @router.post("/start", response_model=InterviewResponse)
@@ -46,12 +106,16 @@ async def start_interview(
     request: InterviewStartRequest,
     db: AsyncSession = Depends(get_db),
     task_gen: TaskGenerator = Depends(get_task_generator),
-    cache_service: RedisCache | None = Depends(get_cache_service)
+    bank: TaskBank | None = Depends(get_task_bank),
+    pool: TaskPool | None = Depends(get_task_pool),
+    speculator: TaskSpeculator | None = Depends(get_task_speculator),
+    dedup: TaskDedupIndex | None = Depends(get_task_dedup)
 ):
     """
     Start a new interview session and generate first task
 
-    Uses Scibox LLM to generate adaptive tasks based on level and domain
+    Serves a stored task from the bank when one is available; otherwise
+    uses Scibox LLM to generate one based on level and domain
     """
     try:
         # Create interview record
@@ -67,36 +131,36 @@ async def start_interview(
 
         logger.info(f"Interview started: {interview.id}")
 
-        # Generate task using Scibox
-        generated_task = await task_gen.generate_task(
-            level=request.level,
-            domain=request.domain
-        )
+        # Reuse a bank task; then a pre-generated one; generate live only if both are empty
+        task = None
+        bank_task = None
+        generated_task = None
+        if bank:
+            task = await bank.draw(db, interview.id, request.level, request.domain)
+
+        if task is None:
+            if pool:
+                generated_task = await pool.pop(request.level, request.domain)
+            if generated_task is None:
+                generated_task = await task_gen.generate_task(
+                    level=request.level,
+                    domain=request.domain
+                )
+
+            # Saved as a bank task; the interview gets a copy
+            bank_task, task = await store_generated(
+                db, interview.id, generated_task, request.level, request.domain
+            )
 
-        # Save task to database
-        task = Task(
-            interview_id=interview.id,
-            title=generated_task.get("title", "Task"),
-            description=generated_task.get("description", ""),
-            level=request.level,
-            domain=request.domain,
-            task_data=generated_task
-        )
-        db.add(task)
         await db.commit()
         await db.refresh(task)
+        if bank_task is not None and dedup:
+            await dedup.register(request.domain, generated_task, bank_task.id)
+        generated_task = task.task_data or {}
 
-        # Cache task in Redis if available
-        if cache_service:
-            try:
-                await cache_service.cache_task(
-                    request.level,
-                    request.domain,
-                    generated_task
-                )
-            except Exception as cache_error:
-                logger.warning(f"Failed to cache task: {cache_error}")
-                # Don't fail the request if cache fails
+        # Prepare the likely next tasks while the candidate works on this one
+        if speculator:
+            speculator.speculate(interview.id, task.id, generated_task, request.level, request.domain)
 
         return InterviewResponse(
             session_id=interview.id,
@@ -119,40 +183,71 @@ async def start_interview(
 async def adapt_task(
     session_id: int,
     db: AsyncSession = Depends(get_db),
-    task_gen: TaskGenerator = Depends(get_task_generator)
+    task_gen: TaskGenerator = Depends(get_task_generator),
+    bank: TaskBank | None = Depends(get_task_bank),
+    speculator: TaskSpeculator | None = Depends(get_task_speculator),
+    dedup: TaskDedupIndex | None = Depends(get_task_dedup)
 ):
     """
     Generate next adaptive task based on previous performance
 
-    Scibox LLM adapts difficulty based on candidate score
+    Scibox LLM adapts difficulty based on candidate score; a task generated
+    ahead of time is served when one matches the score, then a bank task
+    of the level the score points to
     """
     try:
-        # Get previous interview/score
         interview = await db.get(Interview, session_id)
         if not interview:
             raise HTTPException(status_code=404, detail="Interview not found")
 
-        # For now, use a default score - should be calculated from previous solutions
-        previous_score = 75.0
+        # Score of the latest evaluated solution
+        previous_task, previous_score = await get_latest_attempt(db, session_id)
+        if previous_score is None:
+            previous_score = DEFAULT_SCORE
 
-        # Generate adaptive task
-        generated_task = await task_gen.adapt_task(
-            original_task={"title": "Previous Task", "description": "Previous task description"},
-            candidate_score=previous_score
-        )
+        # Level the score points to, for bank lookups and generated tasks
+        base_level = (previous_task.level if previous_task else None) or interview.level
+        level = step_level(base_level, adapt_step(previous_score))
+
+        generated_task = None
+        if speculator and previous_task:
+            generated_task = await speculator.take(interview.id, previous_task.id, previous_score)
+
+        task = None
+        if generated_task is None and bank:
+            task = await bank.draw(db, interview.id, level, interview.domain)
+
+        if task is None and generated_task is None:
+            if previous_task:
+                original_task = previous_task.task_data or {
+                    "title": previous_task.title,
+                    "description": previous_task.description
+                }
+            else:
+                original_task = {"title": "Previous Task", "description": "Previous task description"}
+
+            generated_task = await task_gen.adapt_task(
+                original_task=original_task,
+                candidate_score=previous_score,
+                domain=interview.domain
+            )
+
+        # Save new task (generated ones join the bank; the interview gets a copy)
+        bank_task = None
+        if task is None:
+            bank_task, task = await store_generated(
+                db, interview.id, generated_task, generated_task.get("level", level), interview.domain,
+                default_title="Adapted Task"
+            )
 
-        # Save new task
-        task = Task(
-            interview_id=interview.id,
-            title=generated_task.get("title", "Adapted Task"),
-            description=generated_task.get("description", ""),
-            level=interview.level,
-            domain=interview.domain,
-            task_data=generated_task
-        )
-        db.add(task)
         await db.commit()
         await db.refresh(task)
+        if bank_task is not None and dedup:
+            await dedup.register(interview.domain, generated_task, bank_task.id)
+        generated_task = task.task_data or {}
+
+        if speculator:
+            speculator.speculate(interview.id, task.id, generated_task, task.level, interview.domain)
 
         logger.info(f"Adapted task generated for interview {session_id}")
 
@@ -2,10 +2,30 @@ import docker
 import logging
 from tempfile import TemporaryDirectory
 from pathlib import Path
+from typing import Optional, Union
 from app.config import settings
+from app.services.sandbox_pool import SandboxPool
+from app.services.namespace_sandbox import NamespaceSandbox
 
 logger = logging.getLogger(__name__)
 _client = None
+# Warm container pool or namespace sandbox (same run/stats interface)
+_pool: Optional[Union[SandboxPool, NamespaceSandbox]] = None
+
+IMAGES = {
+    "python": "python:3.11-alpine",
+    "javascript": "node:20-alpine",
+}
+
+# Interpreter argv taking the program as its next argument (warm containers
+# have a read-only root, so code is not written to a file)
+INTERPRETERS = {
+    "python": ["python", "-c"],
+    "javascript": ["node", "-e"],
+}
+
+# Linux caps a single argv string at 128 KiB
+MAX_CODE_BYTES = 100 * 1024
 
 def _get_docker_client():
     global _client
@@ -17,16 +37,80 @@ def _get_docker_client():
             raise
     return _client
 
-def run_code(code: str, language: str):
-    image_map = {
-        "python": "python:3.11-alpine",
-        "javascript": "node:20-alpine",
-    }
+def _create_backend() -> Union[SandboxPool, NamespaceSandbox]:
+    if settings.SANDBOX_BACKEND == "namespace":
+        return NamespaceSandbox(
+            {language: argv[0] for language, argv in INTERPRETERS.items()},
+            mem_limit=settings.DOCKER_MEM_LIMIT,
+            pids_limit=settings.SANDBOX_POOL_PIDS_LIMIT,
+            cpu_seconds=settings.DOCKER_TIMEOUT,
+            max_concurrent=settings.NAMESPACE_SANDBOX_MAX_CONCURRENT,
+            acquire_timeout=settings.SANDBOX_POOL_ACQUIRE_TIMEOUT,
+            wall_timeout=settings.DOCKER_TIMEOUT + 5,
+            scratch_size=settings.NAMESPACE_SANDBOX_SCRATCH_SIZE,
+            seccomp=settings.NAMESPACE_SANDBOX_SECCOMP,
+            cgroup_root=settings.NAMESPACE_SANDBOX_CGROUP_ROOT or None,
+            hide_paths=settings.NAMESPACE_SANDBOX_HIDE_PATHS
+        )
+    if settings.SANDBOX_BACKEND != "docker":
+        raise ValueError(f"Unknown sandbox backend {settings.SANDBOX_BACKEND}")
+    return SandboxPool(
+        _get_docker_client(),
+        IMAGES,
+        min_size=settings.SANDBOX_POOL_MIN_SIZE,
+        max_size=settings.SANDBOX_POOL_MAX_SIZE,
+        spare=settings.SANDBOX_POOL_SPARE,
+        max_runs=settings.SANDBOX_POOL_MAX_RUNS,
+        mem_limit=settings.DOCKER_MEM_LIMIT,
+        cpu_quota=settings.DOCKER_CPU_QUOTA,
+        pids_limit=settings.SANDBOX_POOL_PIDS_LIMIT,
+        acquire_timeout=settings.SANDBOX_POOL_ACQUIRE_TIMEOUT,
+        run_timeout=settings.DOCKER_TIMEOUT + 5
+    )
+
+def start_sandbox_pool() -> Union[SandboxPool, NamespaceSandbox]:
+    """Start the sandbox backend (SANDBOX_BACKEND) used by run_code (blocking)"""
+    global _pool
+    if _pool is None:
+        pool = _create_backend()
+        pool.start()
+        _pool = pool
+    return _pool
+
+def stop_sandbox_pool():
+    """Remove the pool's containers (blocking)"""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        pool.close()
 
-    if language not in image_map:
+def get_sandbox_pool() -> Optional[Union[SandboxPool, NamespaceSandbox]]:
+    return _pool
+
+def _run_pooled(code: str, language: str):
+    if len(code.encode()) > MAX_CODE_BYTES:
+        return {"stdout": "", "stderr": f"Code exceeds {MAX_CODE_BYTES // 1024} KiB", "tests_passed": 0}
+
+    command = ["timeout", str(settings.DOCKER_TIMEOUT)] + INTERPRETERS[language] + [code]
+    try:
+        exit_code, stdout, stderr = _pool.run(language, command)
+    except Exception as e:
+        return {"stdout": "", "stderr": str(e), "tests_passed": 0}
+
+    if exit_code in (124, 143):
+        stderr += f"\nExecution timed out after {settings.DOCKER_TIMEOUT}s"
+    elif exit_code == 137:
+        stderr += "\nExecution killed (memory limit exceeded)"
+    return {"stdout": stdout, "stderr": stderr, "tests_passed": 0}
+
+def run_code(code: str, language: str):
+    if language not in IMAGES:
         return {"stdout": "", "stderr": f"Language {language} not supported", "tests_passed": 0}
 
-    image = image_map[language]
+    if _pool is not None and _pool.supports(language):
+        return _run_pooled(code, language)
+
+    image = IMAGES[language]
 
     with TemporaryDirectory() as tmpdir:
         code_file = Path(tmpdir) / f"main.{ 'py' if language=='python' else 'js' }"
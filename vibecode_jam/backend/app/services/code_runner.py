@@ -0,0 +1,132 @@
+"""
+Bounded async front for code execution
+
+run_code blocks on Docker for as long as the candidate's program runs, so
+it is called on a dedicated thread pool, never on the event loop. At most
+max_workers runs execute at once and at most max_queue wait behind them;
+anything beyond that is rejected at once (HTTP 429) instead of piling up
+behind slow containers.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from app.config import settings
+from app.services.code_executor import run_code
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorBusyError(Exception):
+    """Raised when the run queue is full"""
+
+
+class CodeRunner:
+    """Thread-pool executor for run_code with a queue depth limit"""
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 16):
+        """
+        Initialize runner
+
+        Args:
+            max_workers: Runs executing at once
+            max_queue: Runs allowed to wait for a worker
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="code-run")
+        # Accepted runs not finished yet; only touched on the event loop
+        self._pending = 0
+        self._running = 0
+        self.stats = {
+            "accepted": 0, "rejected": 0, "completed": 0,
+            "queue_ms_total": 0.0, "run_ms_total": 0.0, "run_ms_max": 0.0
+        }
+
+    async def run(self, code: str, language: str) -> Dict:
+        """
+        Run code on a worker thread
+
+        Returns:
+            run_code result dict
+
+        Raises:
+            ExecutorBusyError: max_workers runs are executing and max_queue are waiting
+        """
+        if self._pending >= self.max_workers + self.max_queue:
+            self.stats["rejected"] += 1
+            raise ExecutorBusyError(
+                f"Code execution queue is full ({self.max_workers} running, {self.max_queue} waiting)"
+            )
+
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        self.stats["accepted"] += 1
+        submitted = time.perf_counter()
+
+        def execute() -> Dict:
+            started = time.perf_counter()
+            loop.call_soon_threadsafe(self._started, started - submitted)
+            try:
+                return run_code(code, language)
+            finally:
+                loop.call_soon_threadsafe(self._finished, time.perf_counter() - started)
+
+        # Slots are released when the thread finishes, not when the caller
+        # stops waiting: a cancelled request still occupies its worker
+        return await asyncio.shield(loop.run_in_executor(self._executor, execute))
+
+    def _started(self, queued: float) -> None:
+        self._running += 1
+        self.stats["queue_ms_total"] += queued * 1000
+
+    def _finished(self, elapsed: float) -> None:
+        self._running -= 1
+        self._pending -= 1
+        self.stats["completed"] += 1
+        self.stats["run_ms_total"] += elapsed * 1000
+        self.stats["run_ms_max"] = max(self.stats["run_ms_max"], elapsed * 1000)
+
+    def shutdown(self) -> None:
+        """Stop accepting runs and wait for running ones"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def get_stats(self) -> Dict:
+        """Queue depth, rejections and timing"""
+        completed = self.stats["completed"]
+        return {
+            "accepted": self.stats["accepted"],
+            "rejected": self.stats["rejected"],
+            "completed": completed,
+            "running": self._running,
+            "queued": self._pending - self._running,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "avg_queue_ms": round(self.stats["queue_ms_total"] / completed, 2) if completed else 0.0,
+            "avg_run_ms": round(self.stats["run_ms_total"] / completed, 2) if completed else 0.0,
+            "max_run_ms": round(self.stats["run_ms_max"], 2)
+        }
+
+
+_runner: Optional[CodeRunner] = None
+
+
+def get_code_runner() -> CodeRunner:
+    """Process-wide runner (created on first use)"""
+    global _runner
+    if _runner is None:
+        _runner = CodeRunner(
+            max_workers=settings.CODE_RUN_MAX_WORKERS,
+            max_queue=settings.CODE_RUN_MAX_QUEUE
+        )
+    return _runner
+
+
+def shutdown_code_runner() -> None:
+    global _runner
+    if _runner is not None:
+        runner, _runner = _runner, None
+        runner.shutdown()
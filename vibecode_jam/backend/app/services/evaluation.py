@@ -1,7 +1,7 @@
-from app.services.code_executor import run_code
+from app.services.code_runner import get_code_runner
 
 async def evaluate_solution(code: str, language: str):
-    result = run_code(code, language)
+    result = await get_code_runner().run(code, language)
     score = 50 + result.get("tests_passed", 0) * 5
     return {
         "correctness": score,
@@ -0,0 +1,177 @@
+"""
+Shared pooled HTTP transport for LLM calls
+
+One aiohttp session with a tuned connector is shared by SciboxClient and
+llm_service, so TCP/TLS connections are reused between requests.
+"""
+
+import logging
+from typing import Dict, Optional
+
+import aiohttp
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Total request timeout (seconds) per model; generation models need more time
+MODEL_TIMEOUTS = {
+    "qwen3-32b-awq": 60,
+    "qwen3-coder-30b-a3b-instruct-fp8": 60,
+    "bge-m3": 15
+}
+DEFAULT_TIMEOUT = 60
+
+
+class HTTPTransport:
+    """Pooled aiohttp session with connection-reuse counters"""
+
+    def __init__(
+        self,
+        limit: int = settings.LLM_HTTP_POOL_LIMIT,
+        limit_per_host: int = settings.LLM_HTTP_LIMIT_PER_HOST,
+        keepalive_timeout: float = settings.LLM_HTTP_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl: int = settings.LLM_HTTP_DNS_CACHE_TTL,
+        connect_timeout: float = settings.LLM_HTTP_CONNECT_TIMEOUT,
+        model_timeouts: Optional[Dict[str, float]] = None
+    ):
+        """
+        Initialize transport (the session is created in start())
+
+        Args:
+            limit: Total number of simultaneous connections
+            limit_per_host: Simultaneous connections per host
+            keepalive_timeout: Seconds to keep an idle connection open
+            dns_cache_ttl: Seconds to cache DNS lookups
+            connect_timeout: Timeout for establishing a connection
+            model_timeouts: Per-model total timeouts, overrides MODEL_TIMEOUTS
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.connect_timeout = connect_timeout
+        self.model_timeouts = {**MODEL_TIMEOUTS, **(model_timeouts or {})}
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        self.stats = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0
+        }
+
+    async def start(self) -> None:
+        """Create the pooled session"""
+        if self.session and not self.session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+            enable_cleanup_closed=True
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            trace_configs=[self._build_trace_config()]
+        )
+        logger.info(
+            f"HTTP transport started (limit={self.limit}, "
+            f"per_host={self.limit_per_host}, keepalive={self.keepalive_timeout}s)"
+        )
+
+    async def close(self) -> None:
+        """Close the pooled session and all kept-alive connections"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+            logger.info("HTTP transport closed")
+        self.session = None
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, failing loudly if not started"""
+        if not self.session or self.session.closed:
+            raise RuntimeError("HTTP transport is not started")
+        return self.session
+
+    def timeout_for(self, model: str, total: Optional[float] = None) -> aiohttp.ClientTimeout:
+        """
+        Build request timeout for a model
+
+        Args:
+            model: Model name
+            total: Explicit total timeout, overrides the per-model value
+
+        Returns:
+            ClientTimeout instance
+        """
+        if total is None:
+            total = self.model_timeouts.get(model, DEFAULT_TIMEOUT)
+        return aiohttp.ClientTimeout(total=total, connect=self.connect_timeout)
+
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        """Trace hooks that count new vs reused connections"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.stats["requests"] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self.stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.stats["connections_reused"] += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            self.stats["dns_cache_hits"] += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            self.stats["dns_cache_misses"] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+    def get_stats(self) -> Dict:
+        """Get connection pool statistics"""
+        connections = self.stats["connections_created"] + self.stats["connections_reused"]
+        reuse_ratio = self.stats["connections_reused"] / connections if connections else 0.0
+        return {
+            "status": "started" if self.session and not self.session.closed else "stopped",
+            **self.stats,
+            "reuse_ratio": round(reuse_ratio, 4),
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host
+        }
+
+
+_transport: Optional[HTTPTransport] = None
+
+
+def get_transport() -> HTTPTransport:
+    """Get the process-wide transport (created lazily, started in lifespan)"""
+    global _transport
+    if _transport is None:
+        _transport = HTTPTransport()
+    return _transport
+
+
+async def start_transport() -> HTTPTransport:
+    """Start the process-wide transport"""
+    transport = get_transport()
+    await transport.start()
+    return transport
+
+
+async def close_transport() -> None:
+    """Close the process-wide transport"""
+    global _transport
+    if _transport is not None:
+        await _transport.close()
+        _transport = None
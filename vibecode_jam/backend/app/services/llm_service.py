@@ -1,5 +1,5 @@
-import aiohttp
 from app.config import settings
+from app.services.http_transport import get_transport
 
 async def call_llm(model: str, payload: dict):
     """
@@ -8,9 +8,12 @@ async def call_llm(model: str, payload: dict):
     headers = {"Authorization": f"Bearer {settings.LLM_API_KEY}"}
     url = f"{settings.LLM_BASE_URL}/chat" if "chat" in model else f"{settings.LLM_BASE_URL}/code_eval"
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json={**payload, "model": model}) as resp:
-            return await resp.json()
+    transport = get_transport()
+    await transport.start()
+    session = transport.get_session()
+    async with session.post(url, headers=headers, json={**payload, "model": model},
+                            timeout=transport.timeout_for(model)) as resp:
+        return await resp.json()
 
 
 async def call_llm_stream(model: str, payload: dict):
@@ -20,10 +23,13 @@ async def call_llm_stream(model: str, payload: dict):
     headers = {"Authorization": f"Bearer {settings.LLM_API_KEY}"}
     url = f"{settings.LLM_BASE_URL}/chat" if "chat" in model else f"{settings.LLM_BASE_URL}/code_eval"
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json={**payload, "model": model, "stream": True}) as resp:
-            async for line in resp.content:
-                yield line.decode()
+    transport = get_transport()
+    await transport.start()
+    session = transport.get_session()
+    async with session.post(url, headers=headers, json={**payload, "model": model, "stream": True},
+                            timeout=transport.timeout_for(model)) as resp:
+        async for line in resp.content:
+            yield line.decode()
 
 
 async def stream_ai_response(conversation_history: list, send_func):
@@ -146,7 +146,8 @@ class MockTaskGenerator:
     async def adapt_task(
         self,
         original_task: Dict,
-        candidate_score: float
+        candidate_score: float,
+        domain: Optional[str] = None
     ) -> Dict:
         """
         Adapt task based on candidate score
@@ -154,6 +155,7 @@ class MockTaskGenerator:
         Args:
             original_task: Original task dict
             candidate_score: Candidate's previous score (0-100)
+            domain: Interview domain (ignored in mock)
 
         Returns:
             Adapted task dict
@@ -0,0 +1,328 @@
+"""
+Namespace sandbox for code execution without Docker
+
+Each run is a fork + exec of the host's interpreter into fresh Linux
+namespaces (mount, PID, network, IPC, UTS; user too when the service is
+not root), so a short run costs about a process start instead of a Docker
+API round-trip, and no daemon socket is needed. Inside the sandbox:
+
+- the root filesystem is read-only, /tmp is a small private tmpfs and
+  configured paths (application code, secrets) are covered by empty mounts
+- /proc only shows the run's own processes, and everything left over is
+  killed when the run ends (the PID namespace dies with its init)
+- there is no network (only a down loopback device)
+- the program runs as nobody (when the service is root) with no_new_privs
+  and a seccomp filter denying mount, namespace, ptrace, module and
+  similar syscalls
+- memory and process count are capped by a cgroup v2 group per run when a
+  delegated cgroup root is configured, otherwise by rlimits
+
+Only Linux (x86_64 and aarch64 for seccomp) is supported. The setup is
+done by the sandbox_init launcher, a separate interpreter that execs the
+command once it is inside, so nothing unsafe runs between fork and exec
+of this multi-threaded process.
+"""
+
+import errno
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.services import sandbox_init
+from app.services.sandbox_pool import SandboxBusyError, VIOLATION_EXIT_CODES
+
+logger = logging.getLogger(__name__)
+
+LAUNCHER = os.path.abspath(sandbox_init.__file__)
+
+def parse_size(size: str) -> int:
+    """Bytes of a Docker-style size ("128m", "1g", "512k")"""
+    units = {"k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+    size = size.strip().lower()
+    if size and size[-1] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)
+
+
+class _Usage:
+    def __init__(self):
+        self.in_use = 0
+        self.stats = {"runs": 0, "busy": 0, "violations": 0, "errors": 0, "run_ms_total": 0.0, "run_ms_max": 0.0}
+
+
+class NamespaceSandbox:
+    """Per-run Linux namespace sandboxes (same interface as SandboxPool)"""
+
+    def __init__(
+        self,
+        interpreters: Dict[str, str],
+        mem_limit: str = "128m",
+        pids_limit: int = 64,
+        cpu_seconds: int = 10,
+        max_concurrent: int = 8,
+        acquire_timeout: float = 5.0,
+        wall_timeout: float = 15.0,
+        scratch_size: str = "16m",
+        seccomp: bool = True,
+        cgroup_root: Optional[str] = None,
+        hide_paths: Optional[List[str]] = None,
+        path: Optional[str] = None
+    ):
+        """
+        Initialize sandbox
+
+        Args:
+            interpreters: Interpreter executable per language (looked up on path)
+            mem_limit: Memory limit per run
+            pids_limit: Max processes per run (per sandbox user without cgroups)
+            cpu_seconds: CPU time limit per run
+            max_concurrent: Runs executing at once
+            acquire_timeout: Max seconds to wait for a run slot
+            wall_timeout: Seconds after which a run's processes are killed
+            scratch_size: Size of the writable /tmp
+            seccomp: Install the seccomp filter
+            cgroup_root: Delegated cgroup v2 directory for per-run groups
+                         (rlimits if omitted or unusable)
+            hide_paths: Directories covered by an empty mount
+            path: PATH inside the sandbox (the service's PATH if omitted)
+        """
+        self.interpreters = interpreters
+        self.mem_limit = parse_size(mem_limit)
+        self.pids_limit = pids_limit
+        self.cpu_seconds = cpu_seconds
+        self.max_concurrent = max_concurrent
+        self.acquire_timeout = acquire_timeout
+        self.wall_timeout = wall_timeout
+        self.scratch_size = scratch_size
+        self.seccomp = seccomp
+        self.cgroup_root = cgroup_root
+        self.hide_paths = hide_paths if hide_paths is not None else ["/app", "/root", "/home", "/run/secrets"]
+        self.path = path or os.environ.get("PATH", "/usr/local/bin:/usr/bin:/bin")
+
+        self.languages: Dict[str, str] = {}
+        self.usage = {language: _Usage() for language in interpreters}
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._run_id = 0
+        self._use_cgroup = False
+        self._root = os.geteuid() == 0
+
+    def start(self) -> None:
+        """
+        Resolve interpreters, set up cgroups and check that sandboxing works
+
+        Raises:
+            RuntimeError: Namespaces, mounts or seccomp are not permitted here
+        """
+        if not os.path.exists("/proc/self/ns"):
+            raise RuntimeError("Linux namespaces are not available")
+
+        if self.seccomp and os.uname().machine not in sandbox_init.SECCOMP_ARCHES:
+            logger.warning(f"No seccomp filter for {os.uname().machine}; namespace sandbox runs without it")
+            self.seccomp = False
+
+        self._use_cgroup = self._setup_cgroup()
+        exit_code, _, stderr = self._execute(["true"], None)
+        if exit_code != 0:
+            raise RuntimeError(f"Namespace sandbox check failed ({exit_code}): {stderr.strip()}")
+
+        # Found on PATH is not enough: the sandbox user must be able to run it
+        for language, interpreter in self.interpreters.items():
+            if not shutil.which(interpreter, path=self.path):
+                logger.warning(f"{interpreter} not found; {language} runs are not sandboxed by namespaces")
+                continue
+            exit_code, _, stderr = self._execute([interpreter, "--version"], None)
+            if exit_code == 0:
+                self.languages[language] = interpreter
+            else:
+                logger.warning(f"{interpreter} fails in the namespace sandbox ({exit_code}): {stderr.strip()}")
+        if not self.languages:
+            raise RuntimeError("No interpreter usable in the namespace sandbox")
+        logger.info(
+            f"Namespace sandbox started ({', '.join(self.languages)}; "
+            f"{'cgroup' if self._use_cgroup else 'rlimit'} limits, "
+            f"seccomp {'on' if self.seccomp else 'off'})"
+        )
+
+    def close(self) -> None:
+        """Nothing is kept between runs"""
+
+    def supports(self, language: str) -> bool:
+        return language in self.languages
+
+    def _setup_cgroup(self) -> bool:
+        if not self.cgroup_root:
+            return False
+        try:
+            controllers = open(os.path.join(self.cgroup_root, "cgroup.controllers")).read().split()
+            if not {"memory", "pids"} <= set(controllers):
+                raise RuntimeError(f"memory/pids controllers not available (have {controllers})")
+            with open(os.path.join(self.cgroup_root, "cgroup.subtree_control"), "w") as f:
+                f.write("+memory +pids")
+            return True
+        except Exception as e:
+            logger.warning(f"cgroup root {self.cgroup_root} unusable, falling back to rlimits: {e}")
+            return False
+
+    def _create_cgroup(self) -> str:
+        with self._lock:
+            self._run_id += 1
+            name = f"run-{os.getpid()}-{self._run_id}"
+        group = os.path.join(self.cgroup_root, name)
+        os.mkdir(group)
+        for limit, value in (("memory.max", self.mem_limit), ("memory.swap.max", 0), ("pids.max", self.pids_limit)):
+            try:
+                with open(os.path.join(group, limit), "w") as f:
+                    f.write(str(value))
+            except FileNotFoundError:
+                if limit != "memory.swap.max":
+                    raise
+        return group
+
+    def _remove_cgroup(self, group: str) -> bool:
+        """Remove a run's group; True if the kernel OOM-killed something in it"""
+        oom = False
+        try:
+            with open(os.path.join(group, "memory.events")) as f:
+                oom = any(line.split()[0] == "oom_kill" and int(line.split()[1]) > 0 for line in f)
+        except OSError:
+            pass
+        for _ in range(50):
+            try:
+                os.rmdir(group)
+                break
+            except OSError as e:
+                if e.errno != errno.EBUSY:
+                    logger.warning(f"Failed to remove cgroup {group}: {e}")
+                    break
+                time.sleep(0.01)
+        return oom
+
+    def run(self, language: str, command: List[str]) -> Tuple[int, str, str]:
+        """
+        Run a command in a fresh sandbox
+
+        Args:
+            language: Language of the run (must be supported)
+            command: Command (argv) to execute
+
+        Returns:
+            (exit code, stdout, stderr)
+
+        Raises:
+            SandboxBusyError: No run slot became free within acquire_timeout
+        """
+        usage = self.usage[language]
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                usage.stats["busy"] += 1
+            raise SandboxBusyError(f"No {language} sandbox slot free within {self.acquire_timeout}s")
+
+        with self._lock:
+            usage.in_use += 1
+        started = time.perf_counter()
+        exit_code = -1
+        group = None
+        try:
+            group = self._create_cgroup() if self._use_cgroup else None
+            exit_code, stdout, stderr = self._execute(command, group)
+            if group is not None:
+                group, oom = None, self._remove_cgroup(group)
+                if oom:
+                    # Killed by the cgroup OOM killer, as docker reports it
+                    exit_code = 137
+            return exit_code, stdout, stderr
+        finally:
+            if group is not None:
+                self._remove_cgroup(group)
+            self._slots.release()
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                usage.in_use -= 1
+                usage.stats["runs"] += 1
+                usage.stats["violations"] += exit_code in VIOLATION_EXIT_CODES
+                usage.stats["errors"] += exit_code < 0 or exit_code == sandbox_init.SETUP_FAILED
+                usage.stats["run_ms_total"] += elapsed
+                usage.stats["run_ms_max"] = max(usage.stats["run_ms_max"], elapsed)
+
+    def _launcher_config(self, group: Optional[str]) -> Dict:
+        """Settings sandbox_init applies before exec"""
+        return {
+            "cgroup": group,
+            "user_namespace": not self._root,
+            "hide_paths": self.hide_paths,
+            "scratch_size": self.scratch_size,
+            "mem_limit": None if group else self.mem_limit,
+            # Counts every process of the sandbox user, so it caps all runs together
+            "nproc": self.pids_limit * self.max_concurrent if self._root and not group else None,
+            "cpu_seconds": self.cpu_seconds,
+            "fsize": parse_size(self.scratch_size),
+            "setuid": self._root,
+            "seccomp": self.seccomp
+        }
+
+    def _execute(self, command: List[str], group: Optional[str]) -> Tuple[int, str, str]:
+        launcher = [sys.executable, "-I", "-S", LAUNCHER, *sandbox_init.format_config(self._launcher_config(group)), "--"]
+        process = subprocess.Popen(
+            launcher + command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env={"PATH": self.path, "HOME": "/tmp", "LANG": "C.UTF-8", "PYTHONDONTWRITEBYTECODE": "1"},
+            start_new_session=True
+        )
+        try:
+            stdout, stderr = process.communicate(timeout=self.wall_timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            stdout, stderr = process.communicate()
+            process.returncode = 137
+        return (
+            process.returncode,
+            stdout.decode(errors="replace"),
+            stderr.decode(errors="replace")
+        )
+
+    def get_stats(self) -> Dict:
+        """Run counts, violations and run time per language"""
+        with self._lock:
+            result = {}
+            for language, usage in self.usage.items():
+                runs = usage.stats["runs"]
+                result[language] = {
+                    "backend": "namespace",
+                    "supported": language in self.languages,
+                    **{k: v for k, v in usage.stats.items() if k not in ("run_ms_total", "run_ms_max")},
+                    "avg_run_ms": round(usage.stats["run_ms_total"] / runs, 3) if runs else 0.0,
+                    "max_run_ms": round(usage.stats["run_ms_max"], 3),
+                    "in_use": usage.in_use,
+                    "max_concurrent": self.max_concurrent
+                }
+            return result
+
+    def render_prometheus(self) -> str:
+        """Run counters and gauges in the Prometheus text exposition format"""
+        stats = self.get_stats()
+        lines = []
+        counters = {
+            "runs": "Runs executed in namespace sandboxes",
+            "busy": "Runs rejected after waiting for a slot",
+            "violations": "Runs ended by a timeout or kill"
+        }
+        for key, help_text in counters.items():
+            name = f"namespace_sandbox_{key}_total"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f'{name}{{language="{language}"}} {s[key]}' for language, s in stats.items())
+
+        name = "namespace_sandbox_in_use"
+        lines.append(f"# HELP {name} Runs executing")
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(f'{name}{{language="{language}"}} {s["in_use"]}' for language, s in stats.items())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,286 @@
+"""
+Launcher that enters a namespace sandbox and execs a command
+
+NamespaceSandbox starts every run as
+
+    python -I -S sandbox_init.py <key=value...> -- <command...>
+
+so the sandbox setup (namespaces, mounts, rlimits, setuid, seccomp) runs in
+a fresh single-threaded interpreter instead of between fork and exec of the
+multi-threaded service, where only async-signal-safe calls are allowed.
+
+Standard library only (it runs without site-packages) and kept to cheap
+imports, since it starts with every run; everything is imported before the
+mounts that may hide the paths it was loaded from.
+Exits with SETUP_FAILED and a message on stderr when the sandbox cannot be
+set up, with 127 when the command cannot be executed, and otherwise with
+the command's exit code (128 + signal number when it was killed).
+"""
+
+from __future__ import annotations
+
+import ctypes
+import errno
+import os
+import resource
+import signal
+import sys
+import warnings  # noqa: F401 (os.execvp imports it, after the mounts)
+
+CLONE_NEWNS = 0x00020000
+CLONE_NEWUTS = 0x04000000
+CLONE_NEWIPC = 0x08000000
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWPID = 0x20000000
+CLONE_NEWNET = 0x40000000
+NAMESPACE_FLAGS = CLONE_NEWNS | CLONE_NEWUTS | CLONE_NEWIPC | CLONE_NEWPID | CLONE_NEWNET
+
+MS_RDONLY = 0x1
+MS_NOSUID = 0x2
+MS_NODEV = 0x4
+MS_NOEXEC = 0x8
+MS_REC = 0x4000
+MS_PRIVATE = 0x40000
+
+AT_FDCWD = -100
+AT_RECURSIVE = 0x8000
+MOUNT_ATTR_RDONLY = 0x1
+MOUNT_ATTR_NOSUID = 0x2
+
+PR_SET_PDEATHSIG = 1
+PR_SET_NO_NEW_PRIVS = 38
+PR_SET_SECCOMP = 22
+SECCOMP_MODE_FILTER = 2
+
+SECCOMP_RET_KILL_PROCESS = 0x80000000
+SECCOMP_RET_ERRNO = 0x00050000
+SECCOMP_RET_ALLOW = 0x7FFF0000
+
+NOBODY = 65534
+
+# Same number on every architecture
+SYS_MOUNT_SETATTR = 442
+
+# Exit code when the sandbox could not be set up (as docker run uses it)
+SETUP_FAILED = 125
+
+# Per architecture: (audit arch, clone nr, clone3 nr, syscalls denied in the sandbox)
+SECCOMP_ARCHES = {
+    "x86_64": (0xC000003E, 56, 435, [
+        101,  # ptrace
+        135,  # personality
+        155, 161, 165, 166,  # pivot_root, chroot, mount, umount2
+        167, 168, 169,  # swapon, swapoff, reboot
+        170, 171,  # sethostname, setdomainname
+        175, 176, 313,  # init_module, delete_module, finit_module
+        246, 320,  # kexec_load, kexec_file_load
+        248, 249, 250,  # add_key, request_key, keyctl
+        272, 308,  # unshare, setns
+        298, 321, 323,  # perf_event_open, bpf, userfaultfd
+        303, 304,  # name_to_handle_at, open_by_handle_at
+        310, 311,  # process_vm_readv, process_vm_writev
+        428, 429, 430, 431, 432, 433,  # new mount API
+    ]),
+    "aarch64": (0xC00000B7, 220, 435, [
+        117,  # ptrace
+        92,  # personality
+        41, 51, 40, 39,  # pivot_root, chroot, mount, umount2
+        224, 225, 142,  # swapon, swapoff, reboot
+        161, 162,  # sethostname, setdomainname
+        105, 106, 273,  # init_module, delete_module, finit_module
+        104, 294,  # kexec_load, kexec_file_load
+        217, 218, 219,  # add_key, request_key, keyctl
+        97, 268,  # unshare, setns
+        241, 280, 282,  # perf_event_open, bpf, userfaultfd
+        264, 265,  # name_to_handle_at, open_by_handle_at
+        270, 271,  # process_vm_readv, process_vm_writev
+        428, 429, 430, 431, 432, 433,  # new mount API
+    ]),
+}
+
+
+class _SockFilter(ctypes.Structure):
+    _fields_ = [("code", ctypes.c_uint16), ("jt", ctypes.c_uint8), ("jf", ctypes.c_uint8), ("k", ctypes.c_uint32)]
+
+
+class _SockFprog(ctypes.Structure):
+    _fields_ = [("len", ctypes.c_uint16), ("filter", ctypes.POINTER(_SockFilter))]
+
+
+class _MountAttr(ctypes.Structure):
+    _fields_ = [("attr_set", ctypes.c_uint64), ("attr_clr", ctypes.c_uint64),
+                ("propagation", ctypes.c_uint64), ("userns_fd", ctypes.c_uint64)]
+
+
+def seccomp_program(arch: str) -> _SockFprog | None:
+    """BPF filter returning EPERM for denied syscalls and namespace-creating clones"""
+    if arch not in SECCOMP_ARCHES:
+        return None
+    audit_arch, clone_nr, clone3_nr, denied = SECCOMP_ARCHES[arch]
+    ld_abs, jeq, jge, jset, ret = 0x20, 0x15, 0x35, 0x45, 0x06
+    eperm = SECCOMP_RET_ERRNO | errno.EPERM
+
+    rules = [
+        (ld_abs, 0, 0, 4),  # seccomp_data.arch
+        (jeq, 1, 0, audit_arch),
+        (ret, 0, 0, SECCOMP_RET_KILL_PROCESS),
+        (ld_abs, 0, 0, 0),  # seccomp_data.nr
+        (jge, 0, 1, 0x40000000),  # x32 ABI
+        (ret, 0, 0, SECCOMP_RET_KILL_PROCESS),
+        # clone3 flags live in memory BPF cannot read; ENOSYS makes libc use clone
+        (jeq, 0, 1, clone3_nr),
+        (ret, 0, 0, SECCOMP_RET_ERRNO | errno.ENOSYS),
+        (jeq, 0, 3, clone_nr),
+        (ld_abs, 0, 0, 16),  # low half of args[0] (clone flags)
+        (jset, 0, 1, NAMESPACE_FLAGS | CLONE_NEWUSER),
+        (ret, 0, 0, eperm),
+    ]
+    # Accumulator is nr again for the deny list (clone falls through to allow)
+    rules.append((ld_abs, 0, 0, 0))
+    for nr in denied:
+        rules.extend([(jeq, 0, 1, nr), (ret, 0, 0, eperm)])
+    rules.append((ret, 0, 0, SECCOMP_RET_ALLOW))
+
+    filters = (_SockFilter * len(rules))(*[_SockFilter(*rule) for rule in rules])
+    program = _SockFprog(len(rules), filters)
+    program._filters = filters  # keep the array alive
+    return program
+
+
+def _libc() -> ctypes.CDLL:
+    libc = ctypes.CDLL(None, use_errno=True)
+    libc.unshare.argtypes = [ctypes.c_int]
+    libc.mount.argtypes = [ctypes.c_char_p] * 3 + [ctypes.c_ulong, ctypes.c_char_p]
+    libc.prctl.argtypes = [ctypes.c_int, ctypes.c_ulong, ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong]
+    libc.sethostname.argtypes = [ctypes.c_char_p, ctypes.c_size_t]
+    libc.syscall.restype = ctypes.c_long
+    return libc
+
+
+def _check(result: int, what: str) -> None:
+    if result != 0:
+        raise OSError(ctypes.get_errno(), f"{what} failed: {os.strerror(ctypes.get_errno())}")
+
+
+def _write(path: str, content: str) -> None:
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        os.write(fd, content.encode())
+    finally:
+        os.close(fd)
+
+
+def format_config(config: dict) -> list[str]:
+    """Launcher arguments for a config dict (lists repeat their key)"""
+    args = []
+    for key, value in config.items():
+        for item in value if isinstance(value, list) else [value]:
+            if isinstance(item, bool):
+                item = int(item)
+            args.append(f"{key}={'' if item is None else item}")
+    return args
+
+
+def parse_config(args: list[str]) -> dict:
+    """Config dict from launcher arguments"""
+    config = {"hide_paths": []}
+    for arg in args:
+        key, _, value = arg.partition("=")
+        if key == "hide_paths":
+            config[key].append(value)
+        elif key in ("cgroup", "scratch_size"):
+            config[key] = value or None
+        else:
+            config[key] = int(value) if value else None
+    return config
+
+
+def enter(config: dict) -> None:
+    """
+    Move this process into a new sandbox
+
+    Returns in the sandboxed child only; the calling process stays outside
+    the new PID namespace as its reaper and exits with the child's status.
+
+    Args:
+        config: cgroup (group directory or None), user_namespace, hide_paths,
+                scratch_size, mem_limit and nproc (rlimits, None to skip),
+                cpu_seconds, fsize, setuid (drop to nobody), seccomp
+    """
+    libc = _libc()
+    mount_attr = _MountAttr(MOUNT_ATTR_RDONLY | MOUNT_ATTR_NOSUID, 0, 0, 0)
+    program = seccomp_program(os.uname().machine) if config["seccomp"] else None
+
+    if config["cgroup"]:
+        _write(os.path.join(config["cgroup"], "cgroup.procs"), "0")
+
+    uid, gid = os.geteuid(), os.getegid()
+    _check(libc.unshare(NAMESPACE_FLAGS | (CLONE_NEWUSER if config["user_namespace"] else 0)), "unshare")
+    if config["user_namespace"]:
+        # Map the service's own ids; the sandbox gains nothing over the service user
+        _write("/proc/self/setgroups", "deny")
+        _write("/proc/self/uid_map", f"0 {uid} 1")
+        _write("/proc/self/gid_map", f"0 {gid} 1")
+
+    # The new PID namespace starts with the next child; this process stays
+    # outside as its reaper, passing on the exit status
+    pid = os.fork()
+    if pid:
+        os.closerange(0, resource.getrlimit(resource.RLIMIT_NOFILE)[0])
+        _, status = os.waitpid(pid, 0)
+        code = os.waitstatus_to_exitcode(status)
+        os._exit(128 - code if code < 0 else code)
+
+    _check(libc.mount(None, b"/", None, MS_REC | MS_PRIVATE, None), "mount private")
+    _check(libc.syscall(SYS_MOUNT_SETATTR, AT_FDCWD, b"/", AT_RECURSIVE,
+                        ctypes.byref(mount_attr), ctypes.sizeof(mount_attr)), "read-only root")
+    _check(libc.mount(b"tmpfs", b"/tmp", b"tmpfs", MS_NOSUID | MS_NODEV,
+                      f"size={config['scratch_size']},mode=1777".encode()), "mount /tmp")
+    for hidden in config["hide_paths"]:
+        if os.path.isdir(hidden):
+            _check(libc.mount(b"tmpfs", hidden.encode(), b"tmpfs",
+                              MS_RDONLY | MS_NOSUID | MS_NODEV | MS_NOEXEC, b"size=4k"), f"hide {hidden}")
+    _check(libc.mount(b"proc", b"/proc", b"proc", MS_NOSUID | MS_NODEV | MS_NOEXEC, None), "mount /proc")
+    libc.sethostname(b"sandbox", 7)
+    os.chdir("/tmp")
+
+    if config["mem_limit"]:
+        resource.setrlimit(resource.RLIMIT_DATA, (config["mem_limit"],) * 2)
+    if config["nproc"]:
+        resource.setrlimit(resource.RLIMIT_NPROC, (config["nproc"],) * 2)
+    resource.setrlimit(resource.RLIMIT_CPU, (config["cpu_seconds"], config["cpu_seconds"] + 1))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (config["fsize"],) * 2)
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+    if config["setuid"]:
+        os.setgroups([])
+        os.setgid(NOBODY)
+        os.setuid(NOBODY)
+    # After setuid, which clears it
+    _check(libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL, None, 0, 0), "pdeathsig")
+    _check(libc.prctl(PR_SET_NO_NEW_PRIVS, 1, None, 0, 0), "no_new_privs")
+    if program is not None:
+        _check(libc.prctl(PR_SET_SECCOMP, SECCOMP_MODE_FILTER,
+                          ctypes.cast(ctypes.byref(program), ctypes.c_void_p), 0, 0), "seccomp")
+
+
+def main(argv: list[str]) -> None:
+    if "--" not in argv or argv.index("--") == len(argv) - 1:
+        os.write(2, b"usage: sandbox_init.py <key=value...> -- <command...>\n")
+        os._exit(SETUP_FAILED)
+    split = argv.index("--")
+    command = argv[split + 1:]
+    try:
+        enter(parse_config(argv[:split]))
+    except Exception as e:
+        os.write(2, f"sandbox setup failed: {e}\n".encode(errors="replace"))
+        os._exit(SETUP_FAILED)
+    try:
+        os.execvp(command[0], command)
+    except OSError as e:
+        os.write(2, f"{command[0]}: {e.strerror}\n".encode(errors="replace"))
+        os._exit(127)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
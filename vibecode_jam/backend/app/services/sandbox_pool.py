@@ -0,0 +1,425 @@
+"""
+Warm sandbox containers for code execution
+
+Starting a container costs more than most candidate programs take to run,
+so each language keeps pre-started containers (no network, memory/CPU/pid
+limits, read-only root, tmpfs scratch) and runs code in them through exec
+as an unprivileged user. After a run the container is cleaned (leftover
+processes killed, scratch wiped) off the request path and reused; it is
+replaced after max_runs runs, after a timeout or OOM kill, or when cleanup
+fails. A run that outlives run_timeout (e.g. a detached child holding
+stdout open past `timeout`) gets its container killed and replaced. A
+maintainer thread sizes each language's pool to the recent peak of
+concurrent runs plus spare containers.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SANDBOX_USER = "nobody"
+SANDBOX_DIR = "/sandbox"
+
+# Exit codes of `timeout` (124, 143 = SIGTERM) and of a SIGKILL/OOM kill (137)
+VIOLATION_EXIT_CODES = (124, 137, 143)
+
+CLEANUP_COMMAND = [
+    "sh", "-c",
+    f"rm -rf {SANDBOX_DIR}/* {SANDBOX_DIR}/.[!.]* /tmp/* /tmp/.[!.]* 2>/dev/null; kill -9 -1 2>/dev/null; true"
+]
+
+
+class SandboxBusyError(Exception):
+    """Raised when no container frees up within the acquire timeout"""
+
+
+class _Container:
+    def __init__(self, container):
+        self.container = container
+        self.runs = 0
+        self.created_at = time.monotonic()
+
+
+class _LanguagePool:
+    def __init__(self):
+        self.idle: Deque[_Container] = deque()
+        self.in_use = 0
+        self.starting = 0
+        self.peak = 0
+        self.peaks: Deque[int] = deque()
+        self.target = 0
+        self.stats = {
+            "hits": 0, "misses": 0, "waits": 0, "busy": 0, "runs": 0, "created": 0,
+            "create_errors": 0, "recycled_max_runs": 0, "recycled_violation": 0,
+            "recycled_error": 0, "retired_idle": 0, "wall_timeouts": 0, "acquire_ms_total": 0.0
+        }
+
+    @property
+    def total(self) -> int:
+        return len(self.idle) + self.in_use + self.starting
+
+
+class SandboxPool:
+    """Per-language pools of pre-started sandbox containers"""
+
+    def __init__(
+        self,
+        docker_client,
+        images: Dict[str, str],
+        min_size: int = 1,
+        max_size: int = 4,
+        spare: int = 1,
+        max_runs: int = 50,
+        mem_limit: str = "128m",
+        cpu_quota: int = 50000,
+        pids_limit: int = 64,
+        acquire_timeout: float = 5.0,
+        maintain_interval: float = 5.0,
+        window: float = 60.0,
+        run_timeout: Optional[float] = None
+    ):
+        """
+        Initialize sandbox pool
+
+        Args:
+            docker_client: docker-py client
+            images: Image per language
+            min_size: Containers kept per language when idle
+            max_size: Containers allowed per language
+            spare: Containers kept on top of the recent peak of concurrent runs
+            max_runs: Runs after which a container is replaced
+            mem_limit: Container memory limit
+            cpu_quota: CPU quota per 100ms period
+            pids_limit: Max processes per container (fork bombs)
+            acquire_timeout: Max seconds to wait for a container at max_size
+            maintain_interval: Seconds between sizing passes
+            window: Seconds of load history the pool is sized from
+            run_timeout: Host-side wall limit of one run; the container is
+                         killed when it expires (no limit if omitted)
+        """
+        self.docker = docker_client
+        self.images = images
+        self.min_size = min_size
+        self.max_size = max_size
+        self.spare = spare
+        self.max_runs = max_runs
+        self.mem_limit = mem_limit
+        self.cpu_quota = cpu_quota
+        self.pids_limit = pids_limit
+        self.acquire_timeout = acquire_timeout
+        self.maintain_interval = maintain_interval
+        self.window_ticks = max(1, int(window / maintain_interval))
+        self.run_timeout = run_timeout
+
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.pools = {language: _LanguagePool() for language in images}
+        self._lock = threading.Condition()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._maintainer: Optional[threading.Thread] = None
+        # Container creation and cleanup happen off the request path
+        self._background = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sandbox")
+
+    def start(self) -> None:
+        """Start the maintainer, which pre-starts min_size containers per language"""
+        with self._lock:
+            for pool in self.pools.values():
+                pool.target = self.min_size
+        self._maintainer = threading.Thread(target=self._maintain, name="sandbox-pool", daemon=True)
+        self._maintainer.start()
+        logger.info(f"Sandbox pool started ({', '.join(self.images)}; {self.min_size}-{self.max_size} per language)")
+
+    def close(self) -> None:
+        """Stop the maintainer and remove idle containers"""
+        self._stopping = True
+        self._wake.set()
+        if self._maintainer is not None:
+            self._maintainer.join(timeout=10)
+        self._background.shutdown(wait=True)
+        with self._lock:
+            containers = [c for pool in self.pools.values() for c in pool.idle]
+            for pool in self.pools.values():
+                pool.idle.clear()
+        for container in containers:
+            self._remove(container)
+
+    def supports(self, language: str) -> bool:
+        return language in self.pools
+
+    def run(self, language: str, command: List[str]) -> Tuple[int, str, str]:
+        """
+        Run a command in a warm container
+
+        Args:
+            language: Key of images
+            command: Command (argv) to exec as the sandbox user
+
+        Returns:
+            (exit code, stdout, stderr); exit code 124 when run_timeout expired
+
+        Raises:
+            SandboxBusyError: No container became free within acquire_timeout
+        """
+        pool = self.pools[language]
+        container = self._acquire(language, pool)
+        violation = True
+        expired = threading.Event()
+        watchdog = None
+        if self.run_timeout:
+            watchdog = threading.Timer(self.run_timeout, self._kill, (container, expired))
+            watchdog.daemon = True
+            watchdog.start()
+        try:
+            try:
+                result = container.container.exec_run(
+                    command,
+                    user=SANDBOX_USER,
+                    workdir=SANDBOX_DIR,
+                    demux=True,
+                    environment={"HOME": SANDBOX_DIR, "PYTHONDONTWRITEBYTECODE": "1"}
+                )
+            except Exception:
+                if not expired.is_set():
+                    raise
+            finally:
+                if watchdog is not None:
+                    watchdog.cancel()
+
+            if expired.is_set():
+                # Killed by the watchdog; violation stays set, so it is replaced
+                with self._lock:
+                    pool.stats["wall_timeouts"] += 1
+                return 124, "", f"Execution exceeded the {self.run_timeout}s wall limit"
+
+            stdout, stderr = result.output or (None, None)
+            violation = result.exit_code in VIOLATION_EXIT_CODES
+            return (
+                result.exit_code,
+                (stdout or b"").decode(errors="replace"),
+                (stderr or b"").decode(errors="replace")
+            )
+        finally:
+            container.runs += 1
+            with self._lock:
+                pool.stats["runs"] += 1
+            try:
+                self._background.submit(self._release, language, pool, container, violation)
+            except RuntimeError:
+                # Pool closed while this run was in flight
+                self._release(language, pool, container, violation)
+
+    def _kill(self, container: _Container, expired: threading.Event) -> None:
+        """Watchdog: stop a run that outlived run_timeout"""
+        expired.set()
+        try:
+            container.container.kill()
+        except Exception as e:
+            logger.warning(f"Failed to kill overrunning sandbox container: {e}")
+
+    def _acquire(self, language: str, pool: _LanguagePool) -> _Container:
+        started = time.perf_counter()
+        create = False
+        with self._lock:
+            if pool.idle:
+                pool.stats["hits"] += 1
+            elif pool.total < self.max_size:
+                # Cold start on the request path; the maintainer grows the pool
+                pool.stats["misses"] += 1
+                create = True
+            else:
+                pool.stats["waits"] += 1
+                deadline = time.monotonic() + self.acquire_timeout
+                while not pool.idle:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        pool.stats["busy"] += 1
+                        raise SandboxBusyError(f"No {language} sandbox free within {self.acquire_timeout}s")
+                    self._lock.wait(remaining)
+
+            if not create:
+                container = pool.idle.popleft()
+            pool.in_use += 1
+            pool.peak = max(pool.peak, pool.in_use)
+        self._wake.set()
+
+        if create:
+            try:
+                container = self._create(language)
+            except Exception:
+                with self._lock:
+                    pool.in_use -= 1
+                    pool.stats["create_errors"] += 1
+                raise
+
+        with self._lock:
+            pool.stats["acquire_ms_total"] += (time.perf_counter() - started) * 1000
+        return container
+
+    def _release(self, language: str, pool: _LanguagePool, container: _Container, violation: bool) -> None:
+        """Clean a container and return it to the pool, or replace it"""
+        reason = None
+        if violation:
+            reason = "recycled_violation"
+        elif container.runs >= self.max_runs:
+            reason = "recycled_max_runs"
+        else:
+            try:
+                result = container.container.exec_run(CLEANUP_COMMAND, user=SANDBOX_USER)
+                if result.exit_code != 0:
+                    reason = "recycled_error"
+            except Exception as e:
+                logger.warning(f"Sandbox cleanup failed: {e}")
+                reason = "recycled_error"
+
+        with self._lock:
+            pool.in_use -= 1
+            if reason is None and not self._stopping:
+                pool.idle.append(container)
+                self._lock.notify_all()
+            else:
+                pool.stats[reason or "retired_idle"] += 1
+        if reason is not None or self._stopping:
+            self._remove(container)
+            self._wake.set()
+
+    def _create(self, language: str) -> _Container:
+        container = self.docker.containers.run(
+            image=self.images[language],
+            command=["tail", "-f", "/dev/null"],
+            detach=True,
+            init=True,
+            network_disabled=True,
+            read_only=True,
+            tmpfs={SANDBOX_DIR: "size=16m,mode=1777", "/tmp": "size=16m,mode=1777"},
+            working_dir=SANDBOX_DIR,
+            mem_limit=self.mem_limit,
+            memswap_limit=self.mem_limit,
+            cpu_period=100000,
+            cpu_quota=self.cpu_quota,
+            pids_limit=self.pids_limit,
+            cap_drop=["ALL"],
+            security_opt=["no-new-privileges"],
+            labels={"vibecode.sandbox": language, "vibecode.sandbox.owner": self.owner}
+        )
+        with self._lock:
+            self.pools[language].stats["created"] += 1
+        return _Container(container)
+
+    def _remove(self, container: _Container) -> None:
+        try:
+            container.container.remove(force=True)
+        except Exception as e:
+            logger.warning(f"Failed to remove sandbox container: {e}")
+
+    def _maintain(self) -> None:
+        last_tick = time.monotonic()
+        while not self._stopping:
+            self._wake.wait(timeout=self.maintain_interval)
+            self._wake.clear()
+            if self._stopping:
+                return
+
+            now = time.monotonic()
+            tick = now - last_tick >= self.maintain_interval
+            if tick:
+                last_tick = now
+
+            for language, pool in self.pools.items():
+                try:
+                    self._resize(language, pool, tick)
+                except Exception as e:
+                    logger.error(f"Sandbox pool maintenance error ({language}): {e}")
+
+    def _resize(self, language: str, pool: _LanguagePool, tick: bool) -> None:
+        """Move a language's pool towards its load-based target size"""
+        retire = []
+        with self._lock:
+            if tick:
+                pool.peaks.append(pool.peak)
+                if len(pool.peaks) > self.window_ticks:
+                    pool.peaks.popleft()
+                pool.peak = pool.in_use
+            recent_peak = max(max(pool.peaks, default=0), pool.peak)
+            pool.target = max(self.min_size, min(self.max_size, recent_peak + self.spare))
+
+            missing = pool.target - pool.total
+            pool.starting += max(0, missing)
+            while pool.total > pool.target and pool.idle:
+                retire.append(pool.idle.pop())
+                pool.stats["retired_idle"] += 1
+
+        for container in retire:
+            self._remove(container)
+        for _ in range(max(0, missing)):
+            self._background.submit(self._prestart, language, pool)
+
+    def _prestart(self, language: str, pool: _LanguagePool) -> None:
+        try:
+            container = self._create(language)
+        except Exception as e:
+            logger.warning(f"Failed to start {language} sandbox: {e}")
+            with self._lock:
+                pool.starting -= 1
+                pool.stats["create_errors"] += 1
+            return
+        with self._lock:
+            pool.starting -= 1
+            pool.idle.append(container)
+            self._lock.notify_all()
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counts, recycling and current size per language"""
+        with self._lock:
+            result = {}
+            for language, pool in self.pools.items():
+                lookups = pool.stats["hits"] + pool.stats["misses"] + pool.stats["waits"]
+                result[language] = {
+                    **{k: v for k, v in pool.stats.items() if k != "acquire_ms_total"},
+                    "hit_ratio": round(pool.stats["hits"] / lookups, 4) if lookups else 0.0,
+                    "avg_acquire_ms": round(pool.stats["acquire_ms_total"] / lookups, 3) if lookups else 0.0,
+                    "idle": len(pool.idle),
+                    "in_use": pool.in_use,
+                    "starting": pool.starting,
+                    "target": pool.target
+                }
+            return result
+
+    def render_prometheus(self) -> str:
+        """Pool counters and gauges in the Prometheus text exposition format"""
+        stats = self.get_stats()
+        lines = []
+        counters = {
+            "hits": "Runs served by an idle warm container",
+            "misses": "Runs that had to start a container",
+            "waits": "Runs that waited for a container at max size",
+            "busy": "Runs rejected after waiting for a container",
+            "runs": "Runs executed in pooled containers",
+            "created": "Containers started"
+        }
+        for key, help_text in counters.items():
+            name = f"sandbox_pool_{key}_total"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f'{name}{{language="{language}"}} {s[key]}' for language, s in stats.items())
+
+        name = "sandbox_pool_recycled_total"
+        lines.append(f"# HELP {name} Containers replaced, by reason")
+        lines.append(f"# TYPE {name} counter")
+        for language, s in stats.items():
+            for reason in ("max_runs", "violation", "error"):
+                lines.append(f'{name}{{language="{language}",reason="{reason}"}} {s[f"recycled_{reason}"]}')
+
+        for key in ("idle", "in_use", "target"):
+            name = f"sandbox_pool_{key}"
+            lines.append(f"# HELP {name} Containers {key.replace('_', ' ')}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f'{name}{{language="{language}"}} {s[key]}' for language, s in stats.items())
+
+        return "\n".join(lines) + "\n"
@@ -2,19 +2,42 @@
 Scibox LLM integration services
 """
 
-from .client import SciboxClient, RateLimiter
+from .client import SciboxClient, RateLimiter, LLMScheduler, Priority
+from .retry import RetryPolicy, SciboxAPIError
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .response_cache import ResponseCache, CachePolicy
+from .token_budget import TokenBudget
+from .structured_output import StructuredOutputParser, StructuredOutputError
+from .early_stop import EarlyStopStats
 from .task_generator import TaskGenerator
 from .solution_evaluator import SolutionEvaluator
 from .ai_dialogue import AIDialogue
 from .anti_cheat import AntiCheatLLM
 from .embedding_search import EmbeddingSearch
+from .submission_review import SubmissionReviewer
+from .task_dedup import TaskDedupIndex, DuplicateTaskError
 
 __all__ = [
     'SciboxClient',
     'RateLimiter',
+    'LLMScheduler',
+    'Priority',
+    'RetryPolicy',
+    'SciboxAPIError',
+    'CircuitBreaker',
+    'CircuitOpenError',
+    'ResponseCache',
+    'CachePolicy',
+    'TokenBudget',
+    'StructuredOutputParser',
+    'StructuredOutputError',
+    'EarlyStopStats',
     'TaskGenerator',
     'SolutionEvaluator',
     'AIDialogue',
     'AntiCheatLLM',
-    'EmbeddingSearch'
+    'EmbeddingSearch',
+    'SubmissionReviewer',
+    'TaskDedupIndex',
+    'DuplicateTaskError'
 ]
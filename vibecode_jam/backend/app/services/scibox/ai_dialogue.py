@@ -3,11 +3,18 @@ AI dialogue service for streaming conversations during interview
 """
 
 import logging
-import json
 from typing import List, Dict, AsyncGenerator
 
+from .client import Priority
+from .circuit_breaker import CircuitOpenError
+
 logger = logging.getLogger(__name__)
 
+UNAVAILABLE_MESSAGE = (
+    "I'm having trouble responding right now. "
+    "Keep working on your solution - I'll be back in a moment."
+)
+
 
 class AIDialogue:
     """Manage conversational AI during interview"""
@@ -69,7 +76,9 @@ Keep responses concise (1-2 paragraphs max)."""
                 messages=messages,
                 temperature=0.7,
                 max_tokens=500,
-                stream=True
+                stream=True,
+                priority=Priority.INTERACTIVE,
+                call_site="dialogue"
             )
 
             full_response = ""
@@ -91,6 +100,11 @@ Keep responses concise (1-2 paragraphs max)."""
 
             logger.debug("Dialogue message processed successfully")
 
+        except CircuitOpenError as e:
+            # Answer right away instead of leaving the chat hanging;
+            # the canned reply is not added to the history
+            logger.warning(f"{e}; sending unavailable message")
+            yield UNAVAILABLE_MESSAGE
         except Exception as e:
             logger.error(f"Dialogue error: {e}")
             raise
@@ -105,32 +119,8 @@ Keep responses concise (1-2 paragraphs max)."""
         Yields:
             Text chunks
         """
-        try:
-            async for line in response.content:
-                line_text = line.decode('utf-8').strip()
-
-                if not line_text or not line_text.startswith('data: '):
-                    continue
-
-                data_text = line_text[6:]  # Remove 'data: ' prefix
-
-                if data_text == '[DONE]':
-                    break
-
-                try:
-                    chunk = json.loads(data_text)
-
-                    if 'choices' in chunk:
-                        delta = chunk['choices'][0].get('delta', {})
-                        if 'content' in delta:
-                            yield delta['content']
-
-                except json.JSONDecodeError:
-                    continue
-
-        except Exception as e:
-            logger.error(f"Stream parsing error: {e}")
-            raise
+        async for chunk in self.client.iter_stream_content(response):
+            yield chunk
 
     def _build_context_string(self, context: Dict) -> str:
         """Build context string from interview state"""
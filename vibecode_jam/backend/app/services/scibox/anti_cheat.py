@@ -2,24 +2,37 @@
 Anti-cheat service using LLM for code originality check
 """
 
-import json
 import logging
 from typing import Dict
 
+from .client import Priority
+from .circuit_breaker import CircuitOpenError
+from .response_cache import CachePolicy
+from .structured_output import StructuredOutputError
+
 logger = logging.getLogger(__name__)
 
+# Low-temperature analyses are effectively deterministic per input
+ORIGINALITY_CACHE = CachePolicy(ttl=7 * 86400, prompt_version="originality-v1")
+STYLE_CACHE = CachePolicy(ttl=7 * 86400, prompt_version="style-v1")
+
+ORIGINALITY_SCHEMA = {"similarity_score": (int, float), "is_suspicious": bool}
+STYLE_SCHEMA = {"coding_level": str}
+
 
 class AntiCheatLLM:
     """Check code originality using LLM"""
 
-    def __init__(self, client):
+    def __init__(self, client, fallback=None):
         """
         Initialize anti-cheat service
 
         Args:
             client: SciboxClient instance
+            fallback: Local checker used while the model circuit is open
         """
         self.client = client
+        self.fallback = fallback
 
     async def check_code_originality(
         self,
@@ -43,10 +56,15 @@ Determine if this code was likely copied from well-known sources.
 Be thorough but fair in your assessment.
 Always respond in JSON format."""
 
+        # Oversized submissions are compacted to keep the prompt bounded
+        budget = self.client.token_budget
+        prompt_code = budget.compact_code(code, language, "check_code_originality")
+        task_context = budget.compact_text(task_context, "check_code_originality")
+
         user_prompt = f"""Analyze this {language} code for originality:
 
 ```{language}
-{code}
+{prompt_code}
 ```
 
 {f"Task context: {task_context}" if task_context else ""}
@@ -87,22 +105,25 @@ Scoring:
         ]
 
         try:
-            response = await self.client.chat_completion(
+            response = await self.client.json_completion(
                 model="qwen3-coder-30b-a3b-instruct-fp8",  # Use coder model for code analysis
                 messages=messages,
                 temperature=0.2,  # Very low for consistency
-                max_tokens=800
+                max_tokens=800,
+                priority=Priority.BACKGROUND,
+                call_site="check_code_originality",
+                cache=ORIGINALITY_CACHE,
+                coalesce=True
             )
 
             content = response['choices'][0]['message']['content']
-
-            # Extract JSON
-            if '```json' in content:
-                content = content.split('```json')[1].split('```')[0]
-            elif '```' in content:
-                content = content[content.find('```') + 3:content.rfind('```')]
-
-            result = json.loads(content.strip())
+            result = await self.client.structured_output.parse(
+                content,
+                "check_code_originality",
+                ORIGINALITY_SCHEMA,
+                model="qwen3-coder-30b-a3b-instruct-fp8",
+                priority=Priority.BACKGROUND
+            )
 
             logger.info(
                 f"Code check - "
@@ -111,9 +132,14 @@ Scoring:
             )
             return result
 
-        except json.JSONDecodeError as e:
+        except StructuredOutputError as e:
             logger.error(f"Failed to parse anti-cheat JSON: {e}")
             raise Exception(f"Invalid anti-cheat response: {e}")
+        except CircuitOpenError as e:
+            if self.fallback is None:
+                raise
+            logger.warning(f"{e}; skipping originality check")
+            return await self.fallback.check_code_originality(code, language, task_context)
         except Exception as e:
             logger.error(f"Anti-cheat check error: {e}")
             raise
@@ -135,10 +161,12 @@ Scoring:
         """
         system_prompt = """Analyze the coding style and patterns in this code."""
 
+        prompt_code = self.client.token_budget.compact_code(code, language, "analyze_code_style")
+
         user_prompt = f"""Analyze this {language} code's style:
 
 ```{language}
-{code}
+{prompt_code}
 ```
 
 Respond with JSON:
@@ -156,20 +184,31 @@ Respond with JSON:
         ]
 
         try:
-            response = await self.client.chat_completion(
+            response = await self.client.json_completion(
                 model="qwen3-coder-30b-a3b-instruct-fp8",
                 messages=messages,
                 temperature=0.2,
-                max_tokens=500
+                max_tokens=500,
+                priority=Priority.BACKGROUND,
+                call_site="analyze_code_style",
+                cache=STYLE_CACHE,
+                coalesce=True
             )
 
             content = response['choices'][0]['message']['content']
+            return await self.client.structured_output.parse(
+                content,
+                "analyze_code_style",
+                STYLE_SCHEMA,
+                model="qwen3-coder-30b-a3b-instruct-fp8",
+                priority=Priority.BACKGROUND
+            )
 
-            if '```json' in content:
-                content = content.split('```json')[1].split('```')[0]
-
-            return json.loads(content.strip())
-
+        except CircuitOpenError as e:
+            if self.fallback is None:
+                raise
+            logger.warning(f"{e}; skipping style analysis")
+            return await self.fallback.analyze_code_style(code, language)
         except Exception as e:
             logger.error(f"Style analysis error: {e}")
             raise
@@ -0,0 +1,157 @@
+"""
+Per-model circuit breaker for Scibox API calls
+"""
+
+import logging
+import time
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a model whose circuit is open"""
+
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(f"Circuit open for {model}, retry in {retry_in:.1f}s")
+        self.model = model
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after repeated failures or slow calls, then half-open
+    probing before closing again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        model: str,
+        failure_threshold: int = 5,
+        slow_call_seconds: float = 30.0,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        Initialize breaker
+
+        Args:
+            model: Model name (for logs and errors)
+            failure_threshold: Consecutive failures/slow calls that open the circuit
+            slow_call_seconds: Calls slower than this count as failures
+            open_seconds: How long to reject calls before probing
+            half_open_max_calls: Concurrent probe calls allowed while half-open
+        """
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+
+        self.stats = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+
+    def is_available(self) -> bool:
+        """Whether a call would currently be let through (no side effects)"""
+        if self.state == self.OPEN:
+            return time.monotonic() >= self.opened_at + self.open_seconds
+        if self.state == self.HALF_OPEN:
+            return self.half_open_calls < self.half_open_max_calls
+        return True
+
+    def check(self) -> None:
+        """
+        Fail fast before queueing for quota, without taking a probe slot
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        if self.state == self.OPEN:
+            retry_in = self.opened_at + self.open_seconds - time.monotonic()
+            if retry_in > 0:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.model, retry_in)
+
+    def before_call(self) -> None:
+        """
+        Check whether a call may proceed
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or half-open and busy probing)
+        """
+        if self.state == self.OPEN:
+            retry_in = self.opened_at + self.open_seconds - time.monotonic()
+            if retry_in > 0:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.model, retry_in)
+            self.state = self.HALF_OPEN
+            self.half_open_calls = 0
+            logger.info(f"Circuit for {self.model} half-open, probing")
+
+        if self.state == self.HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.model, 0.0)
+            self.half_open_calls += 1
+
+        self.stats["calls"] += 1
+
+    def record_success(self, latency: float) -> None:
+        """
+        Record a completed call
+
+        Args:
+            latency: Call duration in seconds
+        """
+        if latency > self.slow_call_seconds:
+            self.stats["slow_calls"] += 1
+            self._on_failure(f"slow call {latency:.1f}s")
+            return
+
+        if self.state == self.HALF_OPEN:
+            logger.info(f"Circuit for {self.model} closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.half_open_calls = 0
+
+    def record_failure(self, error: Exception) -> None:
+        """Record a failed call"""
+        self.stats["failures"] += 1
+        self._on_failure(repr(error))
+
+    def record_cancelled(self) -> None:
+        """Free a half-open probe slot taken by a call that never finished"""
+        if self.state == self.HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def _on_failure(self, reason: str) -> None:
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._open(reason)
+
+    def _open(self, reason: str) -> None:
+        if self.state != self.OPEN:
+            self.stats["opened"] += 1
+            logger.warning(
+                f"Circuit for {self.model} opened for {self.open_seconds:.0f}s "
+                f"after {self.consecutive_failures} failure(s), last: {reason}"
+            )
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.half_open_calls = 0
+
+    def get_stats(self) -> Dict:
+        """Get breaker state and counters"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            **self.stats
+        }
@@ -5,12 +5,49 @@ Scibox API Client with rate limiting and async support
 import aiohttp
 import asyncio
 from typing import Dict, List, Optional, AsyncGenerator
-from datetime import datetime, timedelta
+from collections import deque
 import logging
 import json
+import copy
+import hashlib
+import random
+import time
+
+from app.services.http_transport import HTTPTransport, DEFAULT_TIMEOUT
+from .embedding_batcher import EmbeddingBatcher
+from .retry import RetryPolicy, SciboxAPIError, parse_retry_after
+from .circuit_breaker import CircuitBreaker
+from .response_cache import ResponseCache, CachePolicy
+from .token_budget import TokenBudget
+from .instrumentation import llm_metrics
+from .structured_output import StructuredOutputParser, IncrementalJSONParser
+from .early_stop import EarlyStopStats
 
 logger = logging.getLogger(__name__)
 
+# Requests allowed per model per rate-limit window
+MODEL_QUOTAS = {
+    "qwen3-32b-awq": 2,
+    "qwen3-coder-30b-a3b-instruct-fp8": 2,
+    "bge-m3": 7
+}
+
+
+class Priority:
+    """Request priority classes for the LLM scheduler (lower is served first)"""
+
+    INTERACTIVE = 0      # Live AI dialogue and hints
+    TASK_GENERATION = 1  # Task generation / adaptation
+    EVALUATION = 2       # Solution evaluation
+    BACKGROUND = 3       # Anti-cheat and style analysis
+
+    NAMES = {
+        INTERACTIVE: "interactive",
+        TASK_GENERATION: "task_generation",
+        EVALUATION: "evaluation",
+        BACKGROUND: "background"
+    }
+
 
 class SciboxClient:
     """Async client for Scibox API with rate limiting"""
@@ -18,24 +55,81 @@ class SciboxClient:
     def __init__(
         self,
         api_key: str,
-        base_url: str = "https://api.scibox.ai/v1"
+        base_url: str = "https://api.scibox.ai/v1",
+        transport: Optional[HTTPTransport] = None,
+        batch_embeddings: bool = True,
+        rate_limiter=None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker_options: Optional[Dict] = None,
+        response_cache: Optional[ResponseCache] = None,
+        early_stop: bool = True,
+        early_stop_baseline_rate: float = 0.05
     ):
+        """
+        Initialize client
+
+        Args:
+            api_key: Scibox API key
+            base_url: API base URL
+            transport: Shared pooled transport; a private one is created if omitted
+            batch_embeddings: Micro-batch concurrent get_embedding calls
+            rate_limiter: Quota limiter (RateLimiter or DistributedRateLimiter);
+                          a per-process RateLimiter is created if omitted
+            retry_policy: Retry/backoff policy for failed requests
+            breaker_options: CircuitBreaker keyword arguments used for
+                             every per-model breaker
+            response_cache: Persistent cache for call sites that opt in
+            early_stop: Stream json_completion calls and close them once
+                        the JSON object is complete
+            early_stop_baseline_rate: Share of json_completion calls sent
+                                      normally to measure what early stop saves
+        """
         self.api_key = api_key
         self.base_url = base_url
+        self.transport = transport or HTTPTransport()
+        self._owns_transport = transport is None
         self.session: Optional[aiohttp.ClientSession] = None
-        self.rate_limiter = RateLimiter({
-            "qwen3-32b-awq": 2,
-            "qwen3-coder-30b-a3b-instruct-fp8": 2,
-            "bge-m3": 7
-        })
+        self.rate_limiter = rate_limiter or RateLimiter(MODEL_QUOTAS)
+        # Serves waiting requests by priority class on top of the quotas
+        self.scheduler = LLMScheduler(self.rate_limiter)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_stats: Dict[str, Dict[str, int]] = {}
+
+        # Per-model circuit breakers, created on first use
+        self.breaker_options = breaker_options or {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+        # Merge concurrent get_embedding calls into batched requests
+        self.embedding_batcher: Optional[EmbeddingBatcher] = (
+            EmbeddingBatcher(self) if batch_embeddings else None
+        )
+
+        # Single-flight: identical concurrent requests share one in-flight call
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesce_stats = {"requests": 0, "leaders": 0, "coalesced": 0}
+
+        self.response_cache = response_cache
+
+        # Prompt size / cost accounting and adaptive max_tokens per call site
+        self.token_budget = TokenBudget()
+
+        # Shared JSON extraction/repair for structured replies
+        self.structured_output = StructuredOutputParser(self)
+
+        self.early_stop = early_stop
+        self.early_stop_baseline_rate = early_stop_baseline_rate
+        self.early_stop_stats = EarlyStopStats()
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        await self.transport.start()
+        self.session = self.transport.get_session()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        # A shared transport is closed by its owner (app lifespan)
+        if self._owns_transport:
+            await self.transport.close()
+        self.session = None
 
     async def chat_completion(
         self,
@@ -43,7 +137,11 @@ class SciboxClient:
         messages: List[Dict[str, str]],
         temperature: float = 0.7,
         max_tokens: int = 2000,
-        stream: bool = False
+        stream: bool = False,
+        priority: Optional[int] = None,
+        call_site: Optional[str] = None,
+        cache: Optional[CachePolicy] = None,
+        coalesce: Optional[bool] = None
     ) -> Dict:
         """
         Send chat completion request to Scibox
@@ -52,20 +150,237 @@ class SciboxClient:
             model: "qwen3-32b-awq" or "qwen3-coder-30b-a3b-instruct-fp8"
             messages: List of message dicts with "role" and "content"
             temperature: 0.0 - 2.0
-            max_tokens: Maximum tokens in response
+            max_tokens: Maximum tokens in response (upper bound when
+                        call_site is set: lowered to fit observed outputs)
             stream: Whether to use streaming
+            priority: Priority class for the quota queue (Priority.*)
+            call_site: Name of the calling operation (for stats and budgeting)
+            cache: Serve/store this call site's responses from the
+                   persistent cache (non-streaming only)
+            coalesce: Share one request between identical concurrent calls;
+                      defaults to deterministic (temperature 0) calls only,
+                      since sampled replies are meant to differ
 
         Returns:
             Response dict with choices/content
         """
-        # Wait for rate limit
-        await self.rate_limiter.acquire(model)
+        requested_max_tokens = max_tokens
+        if call_site is not None:
+            max_tokens = self.token_budget.pick_max_tokens(call_site, model, messages, max_tokens)
+
+        if stream:
+            return await self._send_chat_completion(
+                model, messages, temperature, max_tokens, priority, stream=True, call_site=call_site
+            )
+
+        cache_key = None
+        if cache is not None and self.response_cache is not None:
+            call_site = call_site or "default"
+            # Keyed on the caller's max_tokens so adaptive budgets keep hitting
+            cache_key = self.response_cache.make_key(
+                call_site, cache, model, messages, temperature, requested_max_tokens
+            )
+            cached = await self.response_cache.get(call_site, cache_key)
+            if cached is not None:
+                logger.debug(f"Response cache hit for {call_site}")
+                return cached
+
+        def send():
+            request = self._send_chat_completion(model, messages, temperature, max_tokens, priority, call_site=call_site)
+            if cache_key is not None:
+                request = self._send_and_cache(request, call_site, cache_key, cache)
+            return request
+
+        if not self._should_coalesce(temperature, coalesce):
+            return await send()
+        key = self._request_key(model, messages, temperature, max_tokens)
+        return await self._single_flight(key, send)
+
+    async def json_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        priority: Optional[int] = None,
+        call_site: str = "default",
+        cache: Optional[CachePolicy] = None,
+        coalesce: Optional[bool] = None
+    ) -> Dict:
+        """
+        Chat completion for prompts that answer with one JSON object
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
+        Streams the reply and closes the connection as soon as the object
+        is complete, so text the model adds after it is never generated.
+        Same arguments and response shape as chat_completion.
+        """
+        if not self.early_stop or random.random() < self.early_stop_baseline_rate:
+            response = await self.chat_completion(
+                model, messages, temperature, max_tokens,
+                priority=priority, call_site=call_site, cache=cache, coalesce=coalesce
+            )
+            try:
+                self.early_stop_stats.record_baseline(call_site, response['choices'][0]['message']['content'])
+            except (KeyError, IndexError, TypeError):
+                pass
+            return response
+
+        if cache is not None:
+            cached = await self.get_cached_completion(model, messages, temperature, max_tokens, call_site, cache)
+            if cached is not None:
+                return cached
+
+        requested_max_tokens = max_tokens
+        max_tokens = self.token_budget.pick_max_tokens(call_site, model, messages, max_tokens)
+
+        async def send():
+            response = await self._stream_json(model, messages, temperature, max_tokens, priority, call_site)
+            if cache is not None:
+                choice = response['choices'][0]
+                await self.store_completion(
+                    model, messages, temperature, requested_max_tokens, call_site, cache,
+                    choice['message']['content'], choice['finish_reason']
+                )
+            return response
+
+        if not self._should_coalesce(temperature, coalesce):
+            return await send()
+        key = "json:" + self._request_key(model, messages, temperature, max_tokens)
+        return await self._single_flight(key, send)
+
+    async def _stream_json(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        priority: Optional[int],
+        call_site: str
+    ) -> Dict:
+        """Stream a reply until its top-level JSON object closes"""
+        started = time.monotonic()
+        response = await self._send_chat_completion(
+            model, messages, temperature, max_tokens, priority, stream=True, call_site=call_site
+        )
+
+        parser = IncrementalJSONParser()
+        parts = []
+        stopped = False
+        finish: Dict[str, str] = {}
+        stream = self.iter_stream_content(response, finish)
+        try:
+            async for chunk in stream:
+                parts.append(chunk)
+                parser.feed(chunk)
+                if parser.done:
+                    # Drop the connection so the server stops generating
+                    stopped = True
+                    response.close()
+                    break
+        finally:
+            await stream.aclose()
+
+        content = "".join(parts)
+        # A closed object is a complete answer; otherwise trust the server
+        finish_reason = "stop" if stopped else finish.get("finish_reason")
+        self.early_stop_stats.record_stream(call_site, content, stopped, time.monotonic() - started)
+        self.token_budget.record_output(call_site, model, content, truncated=finish_reason == "length")
+        return {
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason
+            }]
         }
 
+    @staticmethod
+    def _should_coalesce(temperature: float, coalesce: Optional[bool]) -> bool:
+        """Whether a call may share an identical in-flight request"""
+        return temperature == 0 if coalesce is None else coalesce
+
+    async def _single_flight(self, key: str, send) -> Dict:
+        """
+        Share one in-flight request between identical concurrent calls
+
+        Args:
+            key: Request key
+            send: Callable returning the request coroutine (only called by the leader)
+        """
+        self.coalesce_stats["requests"] += 1
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            # Identical request already running - share its result
+            self.coalesce_stats["coalesced"] += 1
+            logger.debug(f"Coalesced chat completion ({key[:12]})")
+            return copy.deepcopy(await asyncio.shield(inflight))
+
+        self.coalesce_stats["leaders"] += 1
+        inflight = asyncio.ensure_future(send())
+        self._inflight[key] = inflight
+        inflight.add_done_callback(lambda task: self._finish_inflight(key, task))
+
+        # Shield so a cancelled caller does not cancel the shared request
+        return copy.deepcopy(await asyncio.shield(inflight))
+
+    async def get_cached_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        call_site: str,
+        cache: CachePolicy
+    ) -> Optional[Dict]:
+        """Look up a cached response without sending a request (e.g. before streaming)"""
+        if self.response_cache is None:
+            return None
+        key = self.response_cache.make_key(call_site, cache, model, messages, temperature, max_tokens)
+        return await self.response_cache.get(call_site, key)
+
+    async def store_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        call_site: str,
+        cache: CachePolicy,
+        content: str,
+        finish_reason: Optional[str] = "stop"
+    ) -> None:
+        """Cache the full text of a streamed response under the non-streaming key"""
+        if self.response_cache is None:
+            return
+        key = self.response_cache.make_key(call_site, cache, model, messages, temperature, max_tokens)
+        response = {"choices": [{"message": {"role": "assistant", "content": content}, "finish_reason": finish_reason}]}
+        await self.response_cache.set(call_site, key, response, cache)
+
+    async def _send_and_cache(self, send, call_site: str, cache_key: str, cache: CachePolicy) -> Dict:
+        """Run the request and store its response (once per coalesced group)"""
+        response = await send
+        await self.response_cache.set(call_site, cache_key, response, cache)
+        return response
+
+    def _finish_inflight(self, key: str, task: asyncio.Task) -> None:
+        """Drop a finished single-flight entry"""
+        self._inflight.pop(key, None)
+        # Mark the exception as retrieved even if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _send_chat_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        priority: Optional[int] = None,
+        stream: bool = False,
+        call_site: Optional[str] = None
+    ):
+        """Perform a single chat completion request (with retries)"""
         payload = {
             "model": model,
             "messages": messages,
@@ -74,131 +389,592 @@ class SciboxClient:
             "stream": stream
         }
 
+        data = await self._request(model, "/chat/completions", payload, priority, stream=stream, call_site=call_site)
+        if call_site is not None:
+            self.token_budget.record(call_site, model, messages, None if stream else data)
+        logger.debug(f"Chat completion successful for {model}")
+        return data
+
+    async def _request(
+        self,
+        model: str,
+        path: str,
+        payload: Dict,
+        priority: Optional[int] = None,
+        stream: bool = False,
+        call_site: Optional[str] = None
+    ):
+        """
+        POST to the Scibox API under the quota scheduler and retry policy
+
+        Every attempt takes its own quota slot. Retries use exponential
+        backoff with jitter, honour Retry-After on 429/503 and are never
+        started past the policy deadline.
+
+        Args:
+            model: Model name (quota and timeout key)
+            path: API path, e.g. "/chat/completions"
+            payload: JSON body
+            priority: Priority class for the quota queue
+            stream: Return the open response instead of parsed JSON;
+                    the caller must release it
+            call_site: Calling operation (latency histogram label)
+
+        Returns:
+            Parsed JSON dict, or aiohttp response when streaming
+        """
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        stats = self.retry_stats.setdefault(
+            model, {"requests": 0, "attempts": 0, "retries": 0, "retry_after_waits": 0, "gave_up": 0}
+        )
+        stats["requests"] += 1
+        breaker = self.get_breaker(model)
+        call_started = time.monotonic()
+
+        deadline = None
+        attempt = 0
+
+        while True:
+            attempt += 1
+
+            # Fail fast while the model is down instead of queueing for quota
+            breaker.check()
+
+            # Wait for rate limit in our priority class
+            queued_at = time.monotonic()
+            if deadline is None:
+                await self.scheduler.acquire(model, priority)
+                deadline = time.monotonic() + self.retry_policy.deadline
+            else:
+                await asyncio.wait_for(
+                    self.scheduler.acquire(model, priority),
+                    timeout=max(0.0, deadline - time.monotonic())
+                )
+            llm_metrics.observe(
+                "llm_queue_wait_seconds", time.monotonic() - queued_at, model=model, call_site=call_site
+            )
+
+            remaining = deadline - time.monotonic()
+            total_timeout = min(self.transport.model_timeouts.get(model, DEFAULT_TIMEOUT), remaining)
+            stats["attempts"] += 1
+
+            # The circuit may have opened while we waited for quota
+            breaker.before_call()
+            started = time.monotonic()
+            try:
+                response = await self.session.post(
+                    f"{self.base_url}{path}",
+                    headers=headers,
+                    json=payload,
+                    timeout=self.transport.timeout_for(model, total=total_timeout)
+                )
+                llm_metrics.observe("llm_ttfb_seconds", time.monotonic() - started, model=model, call_site=call_site)
+                try:
+                    if response.status != 200:
+                        error_text = await response.text()
+                        logger.error(f"Scibox API error [{response.status}] {model}{path}: {error_text[:500]}")
+                        raise SciboxAPIError(
+                            response.status,
+                            error_text,
+                            retry_after=parse_retry_after(response.headers.get("Retry-After"))
+                        )
+
+                    if stream:
+                        # Time to headers; the stream body is read by the caller
+                        breaker.record_success(time.monotonic() - started)
+                        llm_metrics.observe(
+                            "llm_call_seconds", time.monotonic() - call_started, model=model, call_site=call_site
+                        )
+                        return response  # Caller reads and releases the stream
+
+                    body = await response.read()
+                    elapsed = time.monotonic() - started
+                    parse_started = time.perf_counter()
+                    result = json.loads(body)
+                    parse_time = time.perf_counter() - parse_started
+
+                    breaker.record_success(elapsed)
+                    self._observe_response(model, call_site, result, elapsed, parse_time)
+                    llm_metrics.observe(
+                        "llm_call_seconds", time.monotonic() - call_started, model=model, call_site=call_site
+                    )
+                    return result
+                finally:
+                    if not stream or response.status != 200:
+                        response.release()
+
+            except asyncio.CancelledError:
+                breaker.record_cancelled()
+                raise
+
+            except Exception as e:
+                if self._is_outage(e):
+                    breaker.record_failure(e)
+                else:
+                    # The model answered (e.g. 400/429), so it is not down
+                    breaker.record_success(time.monotonic() - started)
+
+                if not self.retry_policy.is_retryable(e) or attempt >= self.retry_policy.max_attempts:
+                    if attempt > 1:
+                        stats["gave_up"] += 1
+                    logger.error(f"Scibox request failed for {model} after {attempt} attempt(s): {e!r}")
+                    raise
+
+                delay = self.retry_policy.delay(attempt, e)
+                if time.monotonic() + delay >= deadline:
+                    stats["gave_up"] += 1
+                    logger.error(f"Scibox retry for {model} would exceed deadline, giving up: {e!r}")
+                    raise
+
+                stats["retries"] += 1
+                if getattr(e, "retry_after", None) is not None:
+                    stats["retry_after_waits"] += 1
+                logger.warning(
+                    f"Scibox request for {model} failed ({e!r}), "
+                    f"retry {attempt}/{self.retry_policy.max_attempts - 1} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _observe_response(
+        model: str,
+        call_site: Optional[str],
+        result: Dict,
+        elapsed: float,
+        parse_time: float
+    ) -> None:
+        """Record response time, parse time and token throughput"""
+        llm_metrics.observe("llm_response_seconds", elapsed, model=model, call_site=call_site)
+        llm_metrics.observe("llm_parse_seconds", parse_time, model=model, call_site=call_site)
+        usage = result.get("usage") if isinstance(result, dict) else None
+        completion_tokens = (usage or {}).get("completion_tokens")
+        if completion_tokens and elapsed > 0:
+            llm_metrics.observe(
+                "llm_tokens_per_second", completion_tokens / elapsed, model=model, call_site=call_site
+            )
+
+    def get_retry_stats(self) -> Dict:
+        """Get retry counts per model"""
+        return self.retry_stats
+
+    @staticmethod
+    def _is_outage(error: Exception) -> bool:
+        """Errors that mean the model is down or overloaded (counted by the breaker)"""
+        if isinstance(error, SciboxAPIError):
+            return error.status >= 500
+        return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    def get_breaker(self, model: str) -> CircuitBreaker:
+        """Get (or create) the circuit breaker for a model"""
+        breaker = self.breakers.get(model)
+        if breaker is None:
+            breaker = self.breakers[model] = CircuitBreaker(model, **self.breaker_options)
+        return breaker
+
+    def is_available(self, model: str) -> bool:
+        """Whether calls to a model are currently let through"""
+        return self.get_breaker(model).is_available()
+
+    def get_breaker_stats(self) -> Dict:
+        """Get circuit breaker state per model"""
+        return {model: breaker.get_stats() for model, breaker in self.breakers.items()}
+
+    @staticmethod
+    def _request_key(
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Build single-flight key from request parameters"""
+        raw = json.dumps(
+            [model, messages, temperature, max_tokens],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    async def iter_stream_content(response, finish: Optional[Dict] = None) -> AsyncGenerator[str, None]:
+        """
+        Yield content deltas of a streaming chat completion
+
+        Args:
+            response: Open aiohttp response from chat_completion(stream=True);
+                      released when the generator finishes or is closed
+            finish: Filled with the "finish_reason" of the final chunk
+
+        Yields:
+            Text chunks
+        """
         try:
-            async with self.session.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=60)
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"Scibox API error [{response.status}]: {error_text}")
-                    raise Exception(f"Scibox API error: {response.status} - {error_text}")
-
-                if stream:
-                    return response  # Return response for streaming
-
-                data = await response.json()
-                logger.debug(f"Chat completion successful for {model}")
-                return data
-
-        except aiohttp.ClientError as e:
-            logger.error(f"Scibox network error: {e}")
-            raise
+            async for line in response.content:
+                line_text = line.decode('utf-8').strip()
+
+                if not line_text or not line_text.startswith('data: '):
+                    continue
+
+                data_text = line_text[6:]  # Remove 'data: ' prefix
+
+                if data_text == '[DONE]':
+                    break
+
+                try:
+                    chunk = json.loads(data_text)
+
+                    if 'choices' in chunk:
+                        choice = chunk['choices'][0]
+                        if finish is not None and choice.get('finish_reason'):
+                            finish['finish_reason'] = choice['finish_reason']
+                        delta = choice.get('delta', {})
+                        if 'content' in delta:
+                            yield delta['content']
+
+                except json.JSONDecodeError:
+                    continue
+
         except Exception as e:
-            logger.error(f"Scibox error: {e}")
+            logger.error(f"Stream parsing error: {e}")
             raise
+        finally:
+            # Return the pooled connection
+            response.release()
+
+    def get_coalesce_stats(self) -> Dict:
+        """Get single-flight statistics (coalesced = quota slots saved)"""
+        requests = self.coalesce_stats["requests"]
+        return {
+            **self.coalesce_stats,
+            "inflight": len(self._inflight),
+            "coalesce_ratio": round(self.coalesce_stats["coalesced"] / requests, 4) if requests else 0.0
+        }
 
     async def get_embedding(
         self,
         text: str,
-        model: str = "bge-m3"
+        model: str = "bge-m3",
+        coalesce: bool = True
     ) -> List[float]:
         """
         Get embeddings for text
 
+        Concurrent calls are merged into one batched request by the
+        micro-batcher when it is enabled.
+
         Args:
             text: Text to embed
             model: "bge-m3"
+            coalesce: Share the result with an identical in-flight call
+                      (embeddings are deterministic)
 
         Returns:
             Embedding vector
         """
-        # Wait for rate limit
-        await self.rate_limiter.acquire(model)
+        async def send():
+            if self.embedding_batcher:
+                return await self.embedding_batcher.submit(text, model)
+            embeddings = await self.get_embeddings([text], model=model)
+            return embeddings[0]
+
+        if not coalesce:
+            return await send()
+        key = "embedding:" + hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+        return await self._single_flight(key, send)
+
+    async def get_embeddings(
+        self,
+        texts: List[str],
+        model: str = "bge-m3",
+        priority: Optional[int] = None
+    ) -> List[List[float]]:
+        """
+        Get embeddings for several texts in one request
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        Args:
+            texts: Texts to embed
+            model: "bge-m3"
+            priority: Priority class for the quota queue (Priority.*)
+
+        Returns:
+            Embedding vectors in the same order as texts
+        """
+        if not texts:
+            return []
 
         payload = {
             "model": model,
-            "input": text
+            "input": texts
         }
 
+        # One rate limit slot for the whole batch
         try:
-            async with self.session.post(
-                f"{self.base_url}/embeddings",
-                headers=headers,
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=60)
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"Embedding error [{response.status}]: {error_text}")
-                    raise Exception(f"Embedding error: {response.status}")
-
-                data = await response.json()
-
-                # Handle different response formats
-                if isinstance(data.get('data'), list) and len(data['data']) > 0:
-                    embedding = data['data'][0].get('embedding')
-                    if embedding:
-                        logger.debug(f"Embedding obtained: {len(embedding)} dimensions")
-                        return embedding
-
-                logger.error(f"Unexpected embedding response format: {data}")
-                raise Exception("Invalid embedding response format")
-
-        except aiohttp.ClientError as e:
-            logger.error(f"Embedding network error: {e}")
-            raise
+            data = await self._request(model, "/embeddings", payload, priority, call_site="embeddings")
         except Exception as e:
             logger.error(f"Embedding error: {e}")
             raise
 
+        items = data.get('data')
+        if isinstance(items, list) and len(items) == len(texts):
+            # Results may come back out of order - restore by index
+            items = sorted(items, key=lambda item: item.get('index', 0))
+            embeddings = [item.get('embedding') for item in items]
+            if all(embeddings):
+                logger.debug(
+                    f"Embeddings obtained: {len(embeddings)} x {len(embeddings[0])} dimensions"
+                )
+                return embeddings
+
+        logger.error(f"Unexpected embedding response format: {str(data)[:500]}")
+        raise Exception("Invalid embedding response format")
+
 
 class RateLimiter:
-    """Rate limiter for respecting API quotas"""
+    """
+    Sliding-window rate limiter for respecting API quotas
+
+    Each model keeps a deque of its last `limit` request slots on the
+    monotonic clock. A caller reserves the earliest free slot in O(1) and
+    sleeps until it without holding a lock, so waiters are served in arrival
+    order and nobody re-checks the window.
+    """
 
-    def __init__(self, limits: Dict[str, int]):
+    def __init__(self, limits: Dict[str, int], window: float = 60.0):
         """
         Initialize rate limiter
 
         Args:
-            limits: Dict mapping model names to RPS limits
+            limits: Dict mapping model names to requests allowed per window
                    e.g., {"qwen3-32b-awq": 2, "bge-m3": 7}
+            window: Window length in seconds
         """
         self.limits = limits
-        self.requests = {model: [] for model in limits.keys()}
-        self.locks = {model: asyncio.Lock() for model in limits.keys()}
+        self.window = window
+        self.requests: Dict[str, deque] = {model: deque() for model in limits.keys()}
+        self.stats = {
+            model: {"granted": 0, "waited": 0, "timeouts": 0, "total_wait": 0.0}
+            for model in limits.keys()
+        }
+
+    def _next_slot(self, model: str, now: float) -> float:
+        """Earliest time the next request for a model may be sent"""
+        slots = self.requests[model]
+        if len(slots) < self.limits[model]:
+            return now
+        return max(now, slots[0] + self.window)
+
+    def _reserve(self, model: str, slot: float) -> None:
+        """Record a request slot, keeping only the last `limit` slots"""
+        slots = self.requests[model]
+        if len(slots) >= self.limits[model]:
+            slots.popleft()
+        slots.append(slot)
+        self.stats[model]["granted"] += 1
+
+    async def try_acquire(self, model: str) -> bool:
+        """
+        Take a slot only if one is free right now (never waits)
+
+        Args:
+            model: Model name
 
-    async def acquire(self, model: str):
-        """Wait for permission to make request for given model"""
+        Returns:
+            True if the request may be sent immediately
+        """
+        if model not in self.limits:
+            return True
+
+        now = time.monotonic()
+        if self._next_slot(model, now) > now:
+            return False
+
+        self._reserve(model, now)
+        return True
+
+    async def acquire(self, model: str, timeout: Optional[float] = None) -> None:
+        """
+        Wait for permission to make request for given model
+
+        Args:
+            model: Model name
+            timeout: Maximum seconds to wait; raises asyncio.TimeoutError
+                     right away (without taking a slot) if the wait would be longer
+        """
         if model not in self.limits:
             logger.warning(f"Unknown model {model}, skipping rate limit")
             return
 
-        async with self.locks[model]:
-            now = datetime.now()
+        now = time.monotonic()
+        slot = self._next_slot(model, now)
+        wait_time = slot - now
+
+        if timeout is not None and wait_time > timeout:
+            self.stats[model]["timeouts"] += 1
+            raise asyncio.TimeoutError(
+                f"Rate limit for {model}: next slot in {wait_time:.1f}s exceeds timeout {timeout:.1f}s"
+            )
+
+        # A cancelled waiter forfeits its slot, so the quota is never overshot
+        self._reserve(model, slot)
+
+        llm_metrics.observe("llm_rate_limit_wait_seconds", max(0.0, wait_time), model=model)
+        if wait_time > 0:
+            self.stats[model]["waited"] += 1
+            self.stats[model]["total_wait"] += wait_time
+            logger.info(f"Rate limit for {model}: waiting {wait_time:.1f}s")
+            await asyncio.sleep(wait_time)
+
+    def get_stats(self) -> Dict:
+        """Get per-model quota usage"""
+        now = time.monotonic()
+        return {
+            model: {
+                "limit": self.limits[model],
+                "window_s": self.window,
+                "in_window": sum(1 for slot in self.requests[model] if now - self.window < slot <= now),
+                "reserved_ahead": sum(1 for slot in self.requests[model] if slot > now),
+                "next_slot_in_s": round(self._next_slot(model, now) - now, 3),
+                **stats
+            }
+            for model, stats in self.stats.items()
+        }
 
-            # Remove requests older than 60 seconds
-            self.requests[model] = [
-                req_time for req_time in self.requests[model]
-                if now - req_time < timedelta(seconds=60)
-            ]
 
-            # If we've hit the limit, wait
-            if len(self.requests[model]) >= self.limits[model]:
-                oldest = self.requests[model][0]
-                wait_time = (oldest + timedelta(seconds=60) - now).total_seconds()
+class LLMScheduler:
+    """
+    Priority queue in front of RateLimiter with aging against starvation
 
-                if wait_time > 0:
-                    logger.info(f"Rate limit for {model}: waiting {wait_time:.1f}s")
-                    await asyncio.sleep(wait_time)
-                    return await self.acquire(model)
+    A waiting request rises one priority class per aging period, which is
+    scaled to the model's slot interval (window / limit) so that under a
+    tight quota (2/min: one slot per 30s) waiting for a single slot is not
+    mistaken for starvation. Aged requests never reach INTERACTIVE: live
+    dialogue is always served first.
+    """
 
-            # Add new request
-            self.requests[model].append(now)
+    def __init__(self, rate_limiter: "RateLimiter", aging_seconds: float = 10.0, aging_slots: float = 4.0):
+        """
+        Initialize scheduler
+
+        Args:
+            rate_limiter: RateLimiter enforcing the per-model quotas
+            aging_seconds: Minimum wait that raises a request by one priority class
+            aging_slots: Slot intervals of waiting that raise a request by one class
+        """
+        self.rate_limiter = rate_limiter
+        self.aging_seconds = aging_seconds
+        self.aging_slots = aging_slots
+
+        # model -> list of [priority, seq, enqueued_at, future]
+        self._waiters: Dict[str, List[list]] = {}
+        self._dispatchers: Dict[str, asyncio.Task] = {}
+        # Models with a slot taken for waiters that were all cancelled
+        self._spare: Dict[str, bool] = {}
+        self._seq = 0
+
+        self.wait_stats = {
+            name: {"requests": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for name in Priority.NAMES.values()
+        }
+
+    async def acquire(self, model: str, priority: Optional[int] = None) -> None:
+        """
+        Wait until a request of the given priority may be sent
+
+        Args:
+            model: Model name
+            priority: Priority class (defaults to Priority.EVALUATION)
+        """
+        if priority is None:
+            priority = Priority.EVALUATION
+
+        enqueued_at = time.monotonic()
+
+        if model not in self.rate_limiter.limits:
+            await self.rate_limiter.acquire(model)
+            self._record_wait(priority, enqueued_at)
+            return
+
+        if self._spare.pop(model, False):
+            self._record_wait(priority, enqueued_at)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        self._waiters.setdefault(model, []).append([priority, self._seq, enqueued_at, future])
+
+        dispatcher = self._dispatchers.get(model)
+        if dispatcher is None or dispatcher.done():
+            self._dispatchers[model] = asyncio.ensure_future(self._dispatch(model))
+
+        await future
+        self._record_wait(priority, enqueued_at)
+
+    async def _dispatch(self, model: str) -> None:
+        """Hand out quota slots for a model to the best waiting request"""
+        waiters = self._waiters[model]
+
+        while True:
+            waiters[:] = [waiter for waiter in waiters if not waiter[3].done()]
+            if not waiters:
+                break
+
+            # Take the slot first so a request arriving meanwhile can still win it
+            try:
+                await self.rate_limiter.acquire(model)
+            except Exception as e:
+                logger.error(f"Scheduler dispatch error for {model}: {e}")
+                for waiter in waiters:
+                    if not waiter[3].done():
+                        waiter[3].set_exception(e)
+                waiters.clear()
+                return
+
+            waiters[:] = [waiter for waiter in waiters if not waiter[3].done()]
+            if not waiters:
+                # Everyone left while we waited: keep the slot for the next arrival
+                self._spare[model] = True
+                break
+
+            now = time.monotonic()
+            best = min(waiters, key=lambda waiter: (self._effective_priority(model, waiter, now), waiter[1]))
+            waiters.remove(best)
+            best[3].set_result(None)
+
+    def _aging_period(self, model: str) -> float:
+        """Seconds of waiting that raise a request of this model by one class"""
+        slot_interval = self.rate_limiter.window / self.rate_limiter.limits[model]
+        return max(self.aging_seconds, self.aging_slots * slot_interval)
+
+    def _effective_priority(self, model: str, waiter: list, now: float) -> float:
+        """Priority class of a waiter after aging (never above TASK_GENERATION unless INTERACTIVE)"""
+        priority, _, enqueued_at, _ = waiter
+        aged = priority - (now - enqueued_at) / self._aging_period(model)
+        return max(aged, min(priority, Priority.TASK_GENERATION))
+
+    def _record_wait(self, priority: int, enqueued_at: float) -> None:
+        """Record queue wait time for a priority class"""
+        wait = time.monotonic() - enqueued_at
+        stats = self.wait_stats[Priority.NAMES.get(priority, "background")]
+        stats["requests"] += 1
+        stats["total_wait"] += wait
+        stats["max_wait"] = max(stats["max_wait"], wait)
+
+    def get_stats(self) -> Dict:
+        """Get queue depth and wait time per priority class"""
+        return {
+            "queued": {
+                model: len([waiter for waiter in waiters if not waiter[3].done()])
+                for model, waiters in self._waiters.items()
+            },
+            "spare_slots": sorted(model for model, spare in self._spare.items() if spare),
+            "wait_by_class": {
+                name: {
+                    "requests": stats["requests"],
+                    "avg_wait_s": round(stats["total_wait"] / stats["requests"], 3) if stats["requests"] else 0.0,
+                    "max_wait_s": round(stats["max_wait"], 3)
+                }
+                for name, stats in self.wait_stats.items()
+            }
+        }
@@ -0,0 +1,248 @@
+"""
+Redis-backed distributed rate limiter for multi-worker deployments
+
+Quota state lives in one Redis sorted set per model, so every uvicorn
+worker and backend replica shares the same per-model quota.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import redis.asyncio as aioredis
+
+from .client import RateLimiter
+from .instrumentation import llm_metrics
+
+logger = logging.getLogger(__name__)
+
+# Reserve request slots atomically.
+#
+# KEYS[1]  sorted set of slot times (score = seconds)
+# ARGV[1]  fallback "now" used if the server cannot run TIME in scripts
+# ARGV[2]  window length (seconds)
+# ARGV[3]  requests allowed per window
+# ARGV[4]  slots wanted (1 + extra lease slots)
+# ARGV[5]  max wait (seconds) for the first slot, -1 = unlimited
+# ARGV[6]  unique token for set members
+# ARGV[7]  lease hold (seconds): extra slots are recorded at now + hold
+#
+# Returns {1, wait_1, wait_2, ...} with waits relative to now,
+# or {0, wait} if the first slot would exceed max wait (nothing reserved).
+ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local ok, server_time = pcall(redis.call, 'TIME')
+if ok then
+    now = tonumber(server_time[1]) + tonumber(server_time[2]) / 1000000
+end
+
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local wanted = tonumber(ARGV[4])
+local max_wait = tonumber(ARGV[5])
+local token = ARGV[6]
+local hold = tonumber(ARGV[7])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+
+local result = {1}
+for i = 1, wanted do
+    local count = redis.call('ZCARD', KEYS[1])
+    local slot = now
+    if count >= limit then
+        local ref = redis.call('ZRANGE', KEYS[1], count - limit, count - limit, 'WITHSCORES')
+        slot = math.max(now, tonumber(ref[2]) + window)
+    end
+
+    if i == 1 then
+        if max_wait >= 0 and slot - now > max_wait then
+            return {0, tostring(slot - now)}
+        end
+        redis.call('ZADD', KEYS[1], slot, token .. ':' .. i)
+    else
+        -- Extra lease slots are only taken when free right now
+        if slot > now then
+            break
+        end
+        redis.call('ZADD', KEYS[1], now + hold, token .. ':' .. i)
+    end
+    table.insert(result, tostring(slot - now))
+end
+
+redis.call('EXPIRE', KEYS[1], math.ceil(window * 2 + hold) + 1)
+return result
+"""
+
+
+class DistributedRateLimiter:
+    """
+    Rate limiter sharing quotas across processes through Redis
+
+    Same acquire(model, timeout=...) and try_acquire(model) interface as
+    RateLimiter. When a slot is free the script may grant a few extra
+    "lease" slots, which are kept in a local cache for lease_ttl seconds so
+    bursts in one process skip the Redis round-trip. Leased slots are recorded at grant time + lease_ttl,
+    so using them any time within the lease never overshoots the quota.
+    If Redis is unreachable the limiter degrades to a local RateLimiter.
+    """
+
+    def __init__(
+        self,
+        redis_client: aioredis.Redis,
+        limits: Dict[str, int],
+        window: float = 60.0,
+        lease_size: int = 1,
+        lease_ttl: float = 1.0,
+        key_prefix: str = "llm_quota"
+    ):
+        """
+        Initialize distributed limiter
+
+        Args:
+            redis_client: Async Redis client (real server or a local stand-in)
+            limits: Dict mapping model names to requests allowed per window
+            window: Window length in seconds
+            lease_size: Extra slots to lease per Redis call when free
+                        (capped at a quarter of the model's limit)
+            lease_ttl: Seconds a leased slot stays usable locally
+            key_prefix: Redis key prefix
+        """
+        self.redis = redis_client
+        self.limits = limits
+        self.window = window
+        self.lease_size = lease_size
+        self.lease_ttl = lease_ttl
+        self.key_prefix = key_prefix
+
+        self._script = self.redis.register_script(ACQUIRE_SCRIPT)
+        self._leases: Dict[str, List[float]] = {model: [] for model in limits.keys()}
+        self._local = RateLimiter(limits, window=window)
+        self._redis_ok = True
+
+        self.stats = {
+            model: {
+                "granted": 0, "lease_hits": 0, "redis_calls": 0,
+                "waited": 0, "timeouts": 0, "fallbacks": 0
+            }
+            for model in limits.keys()
+        }
+
+    def _key(self, model: str) -> str:
+        return f"{self.key_prefix}:{model}"
+
+    def _lease_size(self, model: str) -> int:
+        """Extra slots to lease; tight quotas (e.g. 2/min) are never leased"""
+        return min(self.lease_size, self.limits[model] // 4)
+
+    def _take_lease(self, model: str) -> bool:
+        """Use a locally cached lease if one is still valid"""
+        now = time.monotonic()
+        leases = self._leases[model]
+        while leases:
+            expires_at = leases.pop()
+            if expires_at > now:
+                self.stats[model]["lease_hits"] += 1
+                self.stats[model]["granted"] += 1
+                return True
+        return False
+
+    async def _reserve(self, model: str, max_wait: Optional[float]) -> Optional[float]:
+        """
+        Reserve a slot in Redis
+
+        Returns:
+            Seconds to wait for the slot, or None if it exceeds max_wait
+        """
+        self.stats[model]["redis_calls"] += 1
+        result = await self._script(
+            keys=[self._key(model)],
+            args=[
+                time.time(),
+                self.window,
+                self.limits[model],
+                1 + self._lease_size(model),
+                -1 if max_wait is None else max_wait,
+                uuid.uuid4().hex,
+                self.lease_ttl
+            ]
+        )
+
+        if int(result[0]) == 0:
+            return None
+
+        waits = [float(value) for value in result[1:]]
+        expires_at = time.monotonic() + self.lease_ttl
+        self._leases[model].extend(expires_at for _ in waits[1:])
+        return waits[0]
+
+    async def acquire(self, model: str, timeout: Optional[float] = None) -> None:
+        """
+        Wait for permission to make request for given model
+
+        Args:
+            model: Model name
+            timeout: Maximum seconds to wait; raises asyncio.TimeoutError
+                     right away (without taking a slot) if the wait would be longer
+        """
+        if model not in self.limits:
+            logger.warning(f"Unknown model {model}, skipping rate limit")
+            return
+
+        if self._take_lease(model):
+            return
+
+        try:
+            wait_time = await self._reserve(model, timeout)
+            if not self._redis_ok:
+                logger.info("Distributed rate limiter: Redis available again")
+                self._redis_ok = True
+        except Exception as e:
+            if self._redis_ok:
+                logger.warning(f"Distributed rate limiter unavailable, using local limits: {e}")
+                self._redis_ok = False
+            self.stats[model]["fallbacks"] += 1
+            await self._local.acquire(model, timeout=timeout)
+            return
+
+        if wait_time is None:
+            self.stats[model]["timeouts"] += 1
+            raise asyncio.TimeoutError(f"Rate limit for {model}: next slot exceeds timeout {timeout:.1f}s")
+
+        self.stats[model]["granted"] += 1
+        llm_metrics.observe("llm_rate_limit_wait_seconds", max(0.0, wait_time), model=model)
+        if wait_time > 0:
+            self.stats[model]["waited"] += 1
+            logger.info(f"Rate limit for {model}: waiting {wait_time:.1f}s (distributed)")
+            await asyncio.sleep(wait_time)
+
+    async def try_acquire(self, model: str) -> bool:
+        """
+        Take a slot only if one is free right now
+
+        Args:
+            model: Model name
+
+        Returns:
+            True if the request may be sent immediately
+        """
+        try:
+            await self.acquire(model, timeout=0)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def get_stats(self) -> Dict:
+        """Get per-model distributed quota statistics"""
+        now = time.monotonic()
+        return {
+            model: {
+                "backend": "redis" if self._redis_ok else "local_fallback",
+                "limit": self.limits[model],
+                "window_s": self.window,
+                "cached_leases": sum(1 for expires_at in self._leases[model] if expires_at > now),
+                **stats
+            }
+            for model, stats in self.stats.items()
+        }
@@ -0,0 +1,89 @@
+"""
+Savings accounting for early-stopped JSON generations
+
+A stream closed right after the JSON object cannot tell what the model
+would still have written, so trailing output (explanations, a second code
+fence) is measured on a small sample of normal, non-streamed calls and
+the savings are estimated from it.
+"""
+
+from collections import deque
+from typing import Dict
+
+from .structured_output import extract_json_object
+from .token_budget import estimate_tokens
+
+
+def trailing_text(content: str) -> str:
+    """Text after the outermost JSON object ("" if there is none)"""
+    candidate = extract_json_object(content)
+    if candidate is None:
+        return ""
+    start = content.rfind(candidate)
+    return content[start + len(candidate):] if start >= 0 else ""
+
+
+class EarlyStopStats:
+    """Per-call-site early-stop counts and estimated tokens/time saved"""
+
+    def __init__(self, history: int = 200):
+        """
+        Args:
+            history: Baseline samples kept per call site
+        """
+        self.history = history
+        self._trailing: Dict[str, deque] = {}
+        self.stats: Dict[str, Dict] = {}
+
+    def _site_stats(self, call_site: str) -> Dict:
+        return self.stats.setdefault(call_site, {
+            "streams": 0, "early_stops": 0, "baseline_calls": 0,
+            "stream_tokens": 0, "stream_seconds": 0.0
+        })
+
+    def record_baseline(self, call_site: str, content: str) -> None:
+        """Record trailing output of a full (non-streamed) response"""
+        self._site_stats(call_site)["baseline_calls"] += 1
+        samples = self._trailing.setdefault(call_site, deque(maxlen=self.history))
+        samples.append(estimate_tokens(trailing_text(content)))
+
+    def record_stream(self, call_site: str, content: str, stopped: bool, elapsed: float) -> None:
+        """
+        Record a streamed response
+
+        Args:
+            call_site: Calling operation
+            content: Text received
+            stopped: Whether the stream was closed after the JSON object
+            elapsed: Seconds from the request to the last chunk read
+        """
+        stats = self._site_stats(call_site)
+        stats["streams"] += 1
+        stats["early_stops"] += stopped
+        stats["stream_tokens"] += estimate_tokens(content)
+        stats["stream_seconds"] += elapsed
+
+    def get_stats(self) -> Dict:
+        """Get early-stop counts and estimated savings per call site"""
+        result = {}
+        for call_site, stats in self.stats.items():
+            samples = self._trailing.get(call_site) or ()
+            avg_trailing = sum(samples) / len(samples) if samples else None
+            tokens_per_second = (
+                stats["stream_tokens"] / stats["stream_seconds"] if stats["stream_seconds"] > 0 else None
+            )
+
+            tokens_saved = ms_saved = None
+            if avg_trailing is not None:
+                tokens_saved = round(stats["early_stops"] * avg_trailing)
+                if tokens_per_second:
+                    ms_saved = round(tokens_saved / tokens_per_second * 1000)
+
+            result[call_site] = {
+                **stats,
+                "stream_seconds": round(stats["stream_seconds"], 3),
+                "avg_trailing_tokens": round(avg_trailing, 1) if avg_trailing is not None else None,
+                "tokens_saved_estimate": tokens_saved,
+                "ms_saved_estimate": ms_saved
+            }
+        return result
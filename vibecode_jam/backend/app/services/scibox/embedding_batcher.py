@@ -0,0 +1,108 @@
+"""
+Micro-batching of concurrent embedding requests
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Collect get_embedding calls over a short window and send them as one request"""
+
+    def __init__(
+        self,
+        client,
+        window_ms: float = settings.EMBEDDING_BATCH_WINDOW_MS,
+        max_batch_size: int = settings.EMBEDDING_MAX_BATCH_SIZE
+    ):
+        """
+        Initialize batcher
+
+        Args:
+            client: SciboxClient instance (provides get_embeddings)
+            window_ms: How long to wait for more texts after the first one
+            max_batch_size: Flush immediately once this many texts are queued
+        """
+        self.client = client
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        # model -> list of (text, future) waiting for the next flush
+        self._pending: Dict[str, List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+
+        self.stats = {"texts": 0, "batches": 0, "deduplicated": 0}
+
+    async def submit(self, text: str, model: str = "bge-m3") -> List[float]:
+        """
+        Queue a text and wait for its embedding
+
+        Args:
+            text: Text to embed
+            model: Embedding model
+
+        Returns:
+            Embedding vector
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        pending = self._pending.setdefault(model, [])
+        pending.append((text, future))
+        self.stats["texts"] += 1
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(model)
+        elif model not in self._timers:
+            self._timers[model] = loop.call_later(self.window, self._flush, model)
+
+        return await future
+
+    def _flush(self, model: str) -> None:
+        """Send everything queued for a model as one batch"""
+        timer = self._timers.pop(model, None)
+        if timer:
+            timer.cancel()
+
+        batch = self._pending.pop(model, [])
+        # Callers that gave up while waiting do not need a slot in the batch
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if batch:
+            asyncio.ensure_future(self._send_batch(model, batch))
+
+    async def _send_batch(self, model: str, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Request embeddings for a batch and resolve the waiting futures"""
+        # Identical texts (e.g. the same boilerplate) are embedded once
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        self.stats["batches"] += 1
+        self.stats["deduplicated"] += len(batch) - len(unique_texts)
+
+        try:
+            embeddings = await self.client.get_embeddings(unique_texts, model=model)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(unique_texts, embeddings))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+        logger.debug(f"Embedding batch sent: {len(batch)} texts, {len(unique_texts)} unique")
+
+    def get_stats(self) -> Dict:
+        """Get batching statistics"""
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "avg_batch_size": round(self.stats["texts"] / batches, 2) if batches else 0.0,
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size
+        }
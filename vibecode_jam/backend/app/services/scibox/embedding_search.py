@@ -6,6 +6,8 @@ import logging
 import numpy as np
 from typing import List, Dict, Optional
 
+from .circuit_breaker import CircuitOpenError
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,6 +52,36 @@ class EmbeddingSearch:
             logger.error(f"Failed to add known solution: {e}")
             raise
 
+    async def add_known_solutions(self, solutions: List[Dict]) -> None:
+        """
+        Add several known solutions using one batched embeddings request
+
+        Args:
+            solutions: List of dicts with 'code' and 'metadata'
+        """
+        if not solutions:
+            return
+
+        try:
+            embeddings = await self.client.get_embeddings(
+                [solution['code'] for solution in solutions],
+                model="bge-m3"
+            )
+
+            for solution, embedding in zip(solutions, embeddings):
+                self.known_solutions.append({
+                    'code': solution['code'],
+                    'embedding': embedding,
+                    'metadata': solution['metadata'],
+                    'code_hash': self._hash_code(solution['code'])
+                })
+
+            logger.info(f"Added {len(solutions)} known solutions")
+
+        except Exception as e:
+            logger.error(f"Failed to add known solutions: {e}")
+            raise
+
     async def find_similar(
         self,
         code: str,
@@ -99,6 +131,10 @@ class EmbeddingSearch:
             logger.info(f"Found {len(similar)} similar solutions")
             return similar
 
+        except CircuitOpenError as e:
+            # Embedding model down: skip the similarity check
+            logger.warning(f"{e}; similarity search skipped")
+            return []
         except Exception as e:
             logger.error(f"Similarity search error: {e}")
             raise
@@ -0,0 +1,135 @@
+"""
+In-process latency histograms for LLM calls (Prometheus-compatible)
+
+Fixed buckets per metric and a cap on label combinations keep memory
+bounded regardless of traffic.
+"""
+
+import bisect
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500)
+
+METRICS = {
+    "llm_queue_wait_seconds": ("Time waiting in the priority queue and rate limiter", SECONDS_BUCKETS),
+    "llm_rate_limit_wait_seconds": ("Time waiting for a rate-limit slot", SECONDS_BUCKETS),
+    "llm_ttfb_seconds": ("Time from sending a request to response headers", SECONDS_BUCKETS),
+    "llm_response_seconds": ("Time from sending a request to the full response body", SECONDS_BUCKETS),
+    "llm_parse_seconds": ("Time spent decoding response JSON", SECONDS_BUCKETS),
+    "llm_call_seconds": ("End-to-end call time including queueing and retries", SECONDS_BUCKETS),
+    "llm_tokens_per_second": ("Completion tokens per second of response time", TOKENS_PER_SECOND_BUCKETS),
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram with constant memory"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.max if i == len(self.buckets) else min(self.buckets[i], self.max)
+                return min(upper, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 4) if self.count else None,
+            "p50": _round(self.quantile(0.5)),
+            "p95": _round(self.quantile(0.95)),
+            "p99": _round(self.quantile(0.99)),
+            "max": _round(self.max)
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+class MetricsRegistry:
+    """Histograms keyed by metric name and labels"""
+
+    def __init__(self, max_series: int = 1000):
+        """
+        Args:
+            max_series: Label combinations kept; new ones beyond this are dropped
+        """
+        self.max_series = max_series
+        self.series: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self.dropped = 0
+
+    def observe(self, name: str, value: float, **labels: Optional[str]) -> None:
+        """Record a value for a metric (labels with None are omitted)"""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None)))
+        histogram = self.series.get(key)
+        if histogram is None:
+            if len(self.series) >= self.max_series:
+                self.dropped += 1
+                return
+            histogram = self.series[key] = Histogram(METRICS[name][1])
+        histogram.observe(value)
+
+    def get_stats(self) -> Dict:
+        """Summaries grouped by metric, then by label set"""
+        result: Dict[str, Dict] = {}
+        for (name, labels), histogram in sorted(self.series.items()):
+            label_key = ",".join(f"{k}={v}" for k, v in labels) or "all"
+            result.setdefault(name, {})[label_key] = histogram.summary()
+        if self.dropped:
+            result["dropped_observations"] = self.dropped
+        return result
+
+    def render_prometheus(self) -> str:
+        """Render all series in the Prometheus text exposition format"""
+        lines = []
+        by_name: Dict[str, list] = {}
+        for (name, labels), histogram in sorted(self.series.items()):
+            by_name.setdefault(name, []).append((labels, histogram))
+
+        for name, series in by_name.items():
+            lines.append(f"# HELP {name} {METRICS[name][0]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in series:
+                base = [f'{k}="{_escape(v)}"' for k, v in labels]
+                cumulative = 0
+                for bound, bucket_count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                    cumulative += bucket_count
+                    le = f'le="{bound}"'
+                    lines.append(f"{name}_bucket{{{','.join(base + [le])}}} {cumulative}")
+                label_str = f"{{{','.join(base)}}}" if base else ""
+                lines.append(f"{name}_sum{label_str} {histogram.sum}")
+                lines.append(f"{name}_count{label_str} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Process-wide registry shared by SciboxClient and the rate limiters
+llm_metrics = MetricsRegistry()
@@ -0,0 +1,149 @@
+"""
+Persistent cache for deterministic LLM responses
+"""
+
+import hashlib
+import json
+import logging
+import zlib
+from typing import Callable, Dict, List, Optional
+
+import redis.asyncio as aioredis
+
+from .structured_output import parse_json_object, StructuredOutputError
+
+logger = logging.getLogger(__name__)
+
+
+def response_has_json(response: Dict) -> bool:
+    """Whether a chat completion contains a (repairable) JSON object (default cache check)"""
+    try:
+        parse_json_object(response['choices'][0]['message']['content'])
+        return True
+    except (KeyError, IndexError, TypeError, StructuredOutputError):
+        return False
+
+
+class CachePolicy:
+    """Per-call-site opt-in to the response cache"""
+
+    def __init__(
+        self,
+        ttl: int,
+        prompt_version: str,
+        validate: Optional[Callable[[Dict], bool]] = response_has_json
+    ):
+        """
+        Args:
+            ttl: Seconds to keep a response
+            prompt_version: Bump when the prompt template changes so old
+                            entries are never served for the new prompt
+            validate: Only responses passing this check are stored
+        """
+        self.ttl = ttl
+        self.prompt_version = prompt_version
+        self.validate = validate
+
+
+class ResponseCache:
+    """
+    Redis cache of chat completions keyed by a canonical request hash
+
+    Values are zlib-compressed JSON. Redis errors are treated as misses.
+    """
+
+    def __init__(self, redis_client: aioredis.Redis, key_prefix: str = "llm_cache", compress_level: int = 6):
+        """
+        Initialize response cache
+
+        Args:
+            redis_client: Async Redis client returning bytes (decode_responses=False)
+            key_prefix: Redis key prefix
+            compress_level: zlib compression level
+        """
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+        self.compress_level = compress_level
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _site_stats(self, call_site: str) -> Dict[str, int]:
+        return self.stats.setdefault(call_site, {
+            "hits": 0, "misses": 0, "stores": 0, "rejected": 0, "errors": 0,
+            "bytes_raw": 0, "bytes_stored": 0
+        })
+
+    def make_key(
+        self,
+        call_site: str,
+        policy: CachePolicy,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Canonical cache key for a request"""
+        raw = json.dumps(
+            {
+                "version": policy.prompt_version,
+                "model": model,
+                "messages": messages,
+                "temperature": round(float(temperature), 4),
+                "max_tokens": max_tokens
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        return f"{self.key_prefix}:{call_site}:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+    async def get(self, call_site: str, key: str) -> Optional[Dict]:
+        """
+        Look up a cached response
+
+        Returns:
+            Response dict or None on miss
+        """
+        stats = self._site_stats(call_site)
+        try:
+            cached = await self.redis.get(key)
+            if cached is not None:
+                stats["hits"] += 1
+                return json.loads(zlib.decompress(cached))
+        except Exception as e:
+            stats["errors"] += 1
+            logger.warning(f"Response cache get error ({call_site}): {e}")
+
+        stats["misses"] += 1
+        return None
+
+    async def set(self, call_site: str, key: str, response: Dict, policy: CachePolicy) -> None:
+        """Store a response if it passes the policy check"""
+        stats = self._site_stats(call_site)
+        if policy.validate is not None and not policy.validate(response):
+            stats["rejected"] += 1
+            return
+
+        try:
+            raw = json.dumps(response, ensure_ascii=False, separators=(",", ":")).encode()
+            compressed = zlib.compress(raw, self.compress_level)
+            await self.redis.set(key, compressed, ex=policy.ttl)
+            stats["stores"] += 1
+            stats["bytes_raw"] += len(raw)
+            stats["bytes_stored"] += len(compressed)
+        except Exception as e:
+            stats["errors"] += 1
+            logger.warning(f"Response cache set error ({call_site}): {e}")
+
+    def get_stats(self) -> Dict:
+        """Get hit ratio and compression per call site"""
+        result = {}
+        for call_site, stats in self.stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            result[call_site] = {
+                **stats,
+                "hit_ratio": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+                "compression_ratio": (
+                    round(stats["bytes_stored"] / stats["bytes_raw"], 4) if stats["bytes_raw"] else 0.0
+                )
+            }
+        return result
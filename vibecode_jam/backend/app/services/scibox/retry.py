@@ -0,0 +1,106 @@
+"""
+Retry policy for Scibox API calls
+"""
+
+import asyncio
+import random
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional
+
+import aiohttp
+
+
+class SciboxAPIError(Exception):
+    """Non-200 response from the Scibox API"""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        """
+        Args:
+            status: HTTP status code
+            message: Response body / error text
+            retry_after: Seconds from the Retry-After header, if any
+        """
+        super().__init__(f"Scibox API error: {status} - {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header (delay in seconds or HTTP date)
+
+    Args:
+        value: Header value
+
+    Returns:
+        Seconds to wait, or None if missing/invalid
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, Retry-After and an overall deadline"""
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        deadline: float = 90.0
+    ):
+        """
+        Initialize retry policy
+
+        Args:
+            max_attempts: Total attempts including the first one
+            base_delay: Backoff base in seconds
+            max_delay: Cap for a single exponential backoff
+            deadline: Seconds from the first attempt after which no retry is
+                      started; attempt timeouts are also clipped to it
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def is_retryable(self, error: Exception) -> bool:
+        """Whether an error is worth retrying"""
+        if isinstance(error, SciboxAPIError):
+            return error.status in self.RETRY_STATUSES
+        return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError))
+
+    def delay(self, attempt: int, error: Exception) -> float:
+        """
+        Delay before the next attempt
+
+        Args:
+            attempt: Number of attempts made so far (1-based)
+            error: Error of the last attempt
+
+        Returns:
+            Seconds to wait
+        """
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            # The server knows best when capacity frees up; the deadline
+            # check decides whether waiting that long is still worth it
+            return max(backoff, retry_after)
+        return backoff
@@ -2,24 +2,58 @@
 Solution evaluation service using Scibox LLM
 """
 
-import json
 import logging
-from typing import Dict
+import time
+from typing import AsyncGenerator, Dict, List
+
+from .client import Priority
+from .circuit_breaker import CircuitOpenError
+from .response_cache import CachePolicy
+from .structured_output import StructuredOutputError, IncrementalJSONParser, validate
 
 logger = logging.getLogger(__name__)
 
+# Same task + code + test results -> same evaluation (temperature 0.3)
+EVALUATION_CACHE = CachePolicy(ttl=86400, prompt_version="evaluate-v2")
+
+EVALUATION_SCHEMA = {
+    "correctness_score": (int, float),
+    "code_quality_score": (int, float),
+    "efficiency_score": (int, float),
+    "overall_score": (int, float),
+    "feedback": dict
+}
+
+# Upper bounds (ms) of the execution time buckets shown to the model
+TIME_BUCKETS = [(10, "<10ms"), (100, "<100ms"), (1000, "<1s")]
+
+
+def time_bucket(execution_time_ms: float) -> str:
+    """
+    Coarse execution time for prompts
+
+    Measured times differ on every run; exact values would make every
+    prompt unique and defeat the response cache and request coalescing.
+    """
+    for limit, label in TIME_BUCKETS:
+        if execution_time_ms < limit:
+            return label
+    return "slow (1s or more)"
+
 
 class SolutionEvaluator:
     """Evaluate code solutions and provide detailed feedback"""
 
-    def __init__(self, client):
+    def __init__(self, client, fallback=None):
         """
         Initialize evaluator
 
         Args:
             client: SciboxClient instance
+            fallback: Local evaluator used while the model circuit is open
         """
         self.client = client
+        self.fallback = fallback
 
     async def evaluate_solution(
         self,
@@ -42,6 +76,158 @@ class SolutionEvaluator:
         Returns:
             Dict with evaluation scores and feedback
         """
+        messages = self._build_evaluation_messages(task, code, test_results, execution_time_ms, language)
+
+        try:
+            response = await self.client.json_completion(
+                model="qwen3-32b-awq",
+                messages=messages,
+                temperature=0.3,  # Lower for consistency
+                max_tokens=1500,
+                priority=Priority.EVALUATION,
+                call_site="evaluate_solution",
+                cache=EVALUATION_CACHE,
+                coalesce=True
+            )
+
+            content = response['choices'][0]['message']['content']
+            evaluation = await self.client.structured_output.parse(
+                content, "evaluate_solution", EVALUATION_SCHEMA, priority=Priority.EVALUATION
+            )
+
+            logger.info(
+                f"Solution evaluated - "
+                f"Overall: {evaluation.get('overall_score', 0)}/100"
+            )
+            return evaluation
+
+        except StructuredOutputError as e:
+            logger.error(f"Failed to parse evaluation JSON: {e}")
+            raise Exception(f"Invalid evaluation response: {e}")
+        except CircuitOpenError as e:
+            if self.fallback is None:
+                raise
+            logger.warning(f"{e}; evaluating solution heuristically")
+            return await self.fallback.evaluate_solution(task, code, test_results, execution_time_ms, language)
+        except Exception as e:
+            logger.error(f"Solution evaluation error: {e}")
+            raise
+
+    async def evaluate_solution_stream(
+        self,
+        task: Dict,
+        code: str,
+        test_results: Dict,
+        execution_time_ms: float,
+        language: str = "python"
+    ) -> AsyncGenerator[Dict, None]:
+        """
+        Evaluate a solution, streaming each top-level field as soon as it is complete
+
+        Args:
+            task: Task dict with problem description
+            code: Code submitted by candidate
+            test_results: Dict with test results
+            execution_time_ms: Code execution time
+            language: Programming language
+
+        Yields:
+            {"type": "field", "field": name, "value": value} per completed field,
+            then {"type": "evaluation", "evaluation": dict} with the validated result
+        """
+        messages = self._build_evaluation_messages(task, code, test_results, execution_time_ms, language)
+        request = dict(
+            model="qwen3-32b-awq",
+            messages=messages,
+            temperature=0.3,
+            max_tokens=1500,
+            call_site="evaluate_solution",
+            cache=EVALUATION_CACHE
+        )
+
+        try:
+            started = time.monotonic()
+            finish: Dict[str, str] = {}
+            cached = await self.client.get_cached_completion(**request)
+            if cached is not None:
+                chunks = [cached['choices'][0]['message']['content']]
+                stream = None
+            else:
+                response = await self.client.chat_completion(
+                    **{k: v for k, v in request.items() if k != "cache"},
+                    stream=True,
+                    priority=Priority.EVALUATION
+                )
+                chunks = []
+                stream = self.client.iter_stream_content(response, finish)
+
+            parser = IncrementalJSONParser()
+            parts = []
+            stopped = False
+            try:
+                async for chunk in (stream or _iterate(chunks)):
+                    parts.append(chunk)
+                    for field, value in parser.feed(chunk):
+                        yield self._field_event(field, value)
+                    if parser.done:
+                        if stream is not None and self.client.early_stop:
+                            stopped = True
+                            response.close()  # Stop generation after the object
+                        break
+            finally:
+                if stream is not None:
+                    await stream.aclose()
+
+            content = "".join(parts)
+            if stream is not None:
+                # Same accounting as json_completion: a closed object is complete
+                finish_reason = "stop" if stopped or parser.done else finish.get("finish_reason")
+                self.client.early_stop_stats.record_stream(
+                    "evaluate_solution", content, stopped, time.monotonic() - started
+                )
+                self.client.token_budget.record_output(
+                    "evaluate_solution", request["model"], content, truncated=finish_reason == "length"
+                )
+
+            evaluation = await self.client.structured_output.parse(
+                content, "evaluate_solution", EVALUATION_SCHEMA, priority=Priority.EVALUATION
+            )
+            if cached is None:
+                await self.client.store_completion(content=content, finish_reason=finish_reason, **request)
+
+            logger.info(f"Solution evaluated (stream) - Overall: {evaluation.get('overall_score', 0)}/100")
+            yield {"type": "evaluation", "evaluation": evaluation}
+
+        except StructuredOutputError as e:
+            logger.error(f"Failed to parse evaluation JSON: {e}")
+            raise Exception(f"Invalid evaluation response: {e}")
+        except CircuitOpenError as e:
+            if self.fallback is None:
+                raise
+            logger.warning(f"{e}; evaluating solution heuristically")
+            evaluation = await self.fallback.evaluate_solution(task, code, test_results, execution_time_ms, language)
+            for field, value in evaluation.items():
+                yield self._field_event(field, value)
+            yield {"type": "evaluation", "evaluation": evaluation}
+
+    @staticmethod
+    def _field_event(field: str, value) -> Dict:
+        """Field event with schema coercion applied (e.g. "85" -> 85)"""
+        if field in EVALUATION_SCHEMA:
+            data = {field: value}
+            if validate(data, {field: EVALUATION_SCHEMA[field]}) is None:
+                value = data[field]
+        return {"type": "field", "field": field, "value": value}
+
+    def _build_evaluation_messages(
+        self,
+        task: Dict,
+        code: str,
+        test_results: Dict,
+        execution_time_ms: float,
+        language: str
+    ) -> List[Dict[str, str]]:
+        """Build the evaluation prompt (shared by the blocking and streaming variants)"""
         system_prompt = """You are a senior technical interviewer.
 Evaluate code submissions objectively and constructively.
 Consider correctness, code quality, efficiency, and style.
@@ -49,16 +235,21 @@ Always respond in JSON format."""
 
         test_summary = f"""Visible tests: {test_results.get('visible_passed', 0)}/{test_results.get('visible_total', 0)} passed
 Hidden tests: {test_results.get('hidden_passed', 0)}/{test_results.get('hidden_total', 0)} passed
-Execution time: {execution_time_ms}ms"""
+Execution time: {time_bucket(execution_time_ms)}"""
+
+        # Oversized submissions are compacted to keep the prompt bounded
+        budget = self.client.token_budget
+        prompt_code = budget.compact_code(code, language, "evaluate_solution")
+        description = budget.compact_text(task.get('description', ''), "evaluate_solution")
 
         user_prompt = f"""Evaluate this {language} solution:
 
 Problem: {task.get('title', 'Unknown')}
-Description: {task.get('description', '')}
+Description: {description}
 
 Code:
 ```{language}
-{code}
+{prompt_code}
 ```
 
 Test Results:
@@ -86,42 +277,11 @@ Respond with ONLY valid JSON:
     "next_challenge_level": "junior/middle/senior"
 }}"""
 
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
 
-        try:
-            response = await self.client.chat_completion(
-                model="qwen3-32b-awq",
-                messages=messages,
-                temperature=0.3,  # Lower for consistency
-                max_tokens=1500
-            )
-
-            content = response['choices'][0]['message']['content']
-
-            # Extract JSON
-            if '```json' in content:
-                content = content.split('```json')[1].split('```')[0]
-            elif '```' in content:
-                content = content.split('```')[1].split('```')[0]
-
-            evaluation = json.loads(content.strip())
-
-            logger.info(
-                f"Solution evaluated - "
-                f"Overall: {evaluation.get('overall_score', 0)}/100"
-            )
-            return evaluation
-
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse evaluation JSON: {e}")
-            raise Exception(f"Invalid evaluation response: {e}")
-        except Exception as e:
-            logger.error(f"Solution evaluation error: {e}")
-            raise
-
     async def provide_hint(
         self,
         task: Dict,
@@ -143,13 +303,17 @@ Respond with ONLY valid JSON:
 Provide subtle hints that guide towards the solution without giving it away.
 Focus on approach, not the final answer."""
 
+        budget = self.client.token_budget
+        prompt_code = budget.compact_code(code, language, "provide_hint")
+        description = budget.compact_text(task.get('description', ''), "provide_hint")
+
         user_prompt = f"""The candidate is working on: {task.get('title', 'Unknown')}
 
-Problem: {task.get('description', '')}
+Problem: {description}
 
 Current code:
 ```{language}
-{code}
+{prompt_code}
 ```
 
 Provide a helpful hint (1-2 sentences) that points them in the right direction
@@ -165,13 +329,25 @@ without revealing the solution."""
                 model="qwen3-32b-awq",
                 messages=messages,
                 temperature=0.5,
-                max_tokens=200
+                max_tokens=200,
+                priority=Priority.INTERACTIVE,
+                call_site="provide_hint"
             )
 
             hint = response['choices'][0]['message']['content']
             logger.debug(f"Hint provided for: {task.get('title', 'Unknown')}")
             return hint
 
+        except CircuitOpenError as e:
+            if self.fallback is None:
+                raise
+            logger.warning(f"{e}; using generic hint")
+            return await self.fallback.provide_hint(task, code, language)
         except Exception as e:
             logger.error(f"Hint generation error: {e}")
             raise
+
+
+async def _iterate(items: List[str]) -> AsyncGenerator[str, None]:
+    for item in items:
+        yield item
@@ -0,0 +1,475 @@
+"""
+Structured (JSON) output parsing for LLM responses
+
+Locates the outermost JSON object in a reply, repairs common defects
+(code fences, <think> blocks, trailing commas, comments, Python literals,
+truncation), validates it against a per-call-site schema and only as a
+last resort asks the model to fix the JSON.
+"""
+
+import json
+import logging
+import re
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+FIX_PROMPT = """The following text should be a single JSON object but is not valid JSON.
+Return ONLY the corrected JSON object, with no explanation and no code fences.
+Required fields: {fields}
+
+{text}"""
+
+
+class StructuredOutputError(ValueError):
+    """Model output could not be turned into a valid JSON object"""
+
+
+def extract_json_object(text: str) -> Optional[str]:
+    """
+    Find the outermost JSON object in model output
+
+    Returns:
+        Object text (possibly unterminated if the output was truncated), or None
+    """
+    text = _THINK_RE.sub("", text)
+    start = text.find("{")
+    if start < 0:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+
+    return text[start:]
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix common defects outside string literals: comments, trailing commas,
+    Python literals, smart quotes and unclosed strings/brackets
+    """
+    text = text.translate(_SMART_QUOTES)
+    out = []
+    stack = []
+    in_string = False
+    escaped = False
+    i = 0
+    n = len(text)
+
+    while i < n:
+        char = text[i]
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                out[-1] = "\\n"  # raw newline inside a string
+            i += 1
+            continue
+
+        if char == '"':
+            in_string = True
+            out.append(char)
+        elif char == "/" and text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = n if newline < 0 else newline
+            continue
+        elif char == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+            continue
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            out.append(char)
+        elif char in "}]":
+            _drop_trailing_comma(out)
+            if stack:
+                stack.pop()
+            out.append(char)
+        elif char.isalpha():
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(_PY_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(char)
+        i += 1
+
+    # Truncated output: close what is still open
+    if in_string:
+        out.append('"')
+    _drop_trailing_comma(out)
+    while stack:
+        if "".join(out[-8:]).rstrip().endswith(":"):
+            out.append("null")
+        out.append(stack.pop())
+        _drop_trailing_comma(out)
+
+    return "".join(out)
+
+
+def _drop_trailing_comma(out: list) -> None:
+    """Remove a comma (and whitespace after it) at the end of the output buffer"""
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+
+
+def parse_json_object(text: str) -> Tuple[Dict, bool]:
+    """
+    Parse the outermost JSON object in text
+
+    Returns:
+        (object, repaired) - repaired is True if a fix was needed
+
+    Raises:
+        StructuredOutputError: If no object can be recovered
+    """
+    candidate = extract_json_object(text)
+    if candidate is None:
+        raise StructuredOutputError("No JSON object in model output")
+
+    try:
+        result = json.loads(candidate)
+        repaired = False
+    except json.JSONDecodeError:
+        try:
+            result = json.loads(repair_json(candidate))
+            repaired = True
+        except json.JSONDecodeError as e:
+            raise StructuredOutputError(f"Unrepairable JSON: {e}") from e
+
+    if not isinstance(result, dict):
+        raise StructuredOutputError("Model output is not a JSON object")
+    return result, repaired
+
+
+def validate(data: Dict, schema: Dict) -> Optional[str]:
+    """
+    Check required fields and types, coercing numeric/boolean strings in place
+
+    Args:
+        data: Parsed object
+        schema: Field name -> type or tuple of types
+
+    Returns:
+        Error description, or None if valid
+    """
+    for field, expected in schema.items():
+        if field not in data:
+            return f"missing field '{field}'"
+        value = data[field]
+        if isinstance(value, expected) and not (isinstance(value, bool) and bool not in _types(expected)):
+            continue
+
+        coerced = _coerce(value, expected)
+        if coerced is None:
+            return f"field '{field}' has type {type(value).__name__}"
+        data[field] = coerced
+    return None
+
+
+def _types(expected) -> tuple:
+    return expected if isinstance(expected, tuple) else (expected,)
+
+
+def _coerce(value, expected):
+    types = _types(expected)
+    if isinstance(value, str):
+        text = value.strip().rstrip("%")
+        if bool in types and text.lower() in ("true", "false"):
+            return text.lower() == "true"
+        if int in types or float in types:
+            try:
+                number = float(text)
+                return int(number) if int in types and number.is_integer() else number
+            except ValueError:
+                return None
+    return None
+
+
+def legacy_parse_ok(content: str) -> bool:
+    """Whether the old code-fence split + json.loads would have succeeded"""
+    try:
+        if '```json' in content:
+            content = content.split('```json')[1].split('```')[0]
+        elif '```' in content:
+            content = content.split('```')[1].split('```')[0]
+        json.loads(content.strip())
+        return True
+    except (ValueError, IndexError):
+        return False
+
+
+class StructuredOutputParser:
+    """Shared JSON parser for Scibox call sites, with repair statistics"""
+
+    def __init__(self, client, fix_max_tokens: int = 1500):
+        """
+        Initialize parser
+
+        Args:
+            client: SciboxClient used for "fix this JSON" calls
+            fix_max_tokens: Upper bound for the fix call's output
+        """
+        self.client = client
+        self.fix_max_tokens = fix_max_tokens
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _site_stats(self, call_site: str) -> Dict[str, int]:
+        return self.stats.setdefault(call_site, {
+            "parsed": 0, "clean": 0, "repaired": 0, "coerced": 0,
+            "fix_requests": 0, "fix_succeeded": 0, "failed": 0,
+            "re_requests_avoided": 0
+        })
+
+    async def parse(
+        self,
+        content: str,
+        call_site: str,
+        schema: Optional[Dict] = None,
+        model: str = "qwen3-32b-awq",
+        priority: Optional[int] = None
+    ) -> Dict:
+        """
+        Parse a model reply into a validated dict
+
+        Args:
+            content: Raw reply text
+            call_site: Calling operation (stats key)
+            schema: Required fields -> types
+            model: Model for the fallback fix call
+            priority: Priority class for the fallback fix call
+
+        Returns:
+            Parsed object
+
+        Raises:
+            StructuredOutputError: If neither repair nor the fix call helps
+        """
+        stats = self._site_stats(call_site)
+        stats["parsed"] += 1
+        schema = schema or {}
+
+        try:
+            data, repaired = parse_json_object(content)
+            before = json.dumps(data, sort_keys=True)
+            error = validate(data, schema)
+            if error is None:
+                if repaired:
+                    stats["repaired"] += 1
+                else:
+                    stats["clean"] += 1
+                if before != json.dumps(data, sort_keys=True):
+                    stats["coerced"] += 1
+                if not legacy_parse_ok(content):
+                    # The old parser would have raised and the user retried
+                    stats["re_requests_avoided"] += 1
+                return data
+        except StructuredOutputError as e:
+            error = str(e)
+
+        logger.warning(f"Structured output for {call_site} needs a fix call: {error}")
+        return await self._fix(content, call_site, schema, model, priority, error)
+
+    async def _fix(
+        self,
+        content: str,
+        call_site: str,
+        schema: Dict,
+        model: str,
+        priority: Optional[int],
+        error: str
+    ) -> Dict:
+        """Ask the model to return corrected JSON (short, deterministic call)"""
+        stats = self._site_stats(call_site)
+        stats["fix_requests"] += 1
+        text = extract_json_object(content) or content
+
+        messages = [
+            {"role": "system", "content": "You fix malformed JSON. Respond with JSON only."},
+            {"role": "user", "content": FIX_PROMPT.format(fields=", ".join(schema) or "any", text=text)}
+        ]
+
+        try:
+            response = await self.client.chat_completion(
+                model=model,
+                messages=messages,
+                temperature=0.0,
+                max_tokens=self.fix_max_tokens,
+                priority=priority,
+                call_site=f"{call_site}:json_fix"
+            )
+            data, _ = parse_json_object(response['choices'][0]['message']['content'])
+            fix_error = validate(data, schema)
+            if fix_error is not None:
+                raise StructuredOutputError(fix_error)
+        except StructuredOutputError as e:
+            stats["failed"] += 1
+            raise StructuredOutputError(f"{error}; fix call failed: {e}") from e
+        except Exception:
+            stats["failed"] += 1
+            raise
+
+        stats["fix_succeeded"] += 1
+        return data
+
+    def get_stats(self) -> Dict:
+        """Get parse outcomes per call site"""
+        return self.stats
+
+
+class IncrementalJSONParser:
+    """
+    Streaming parser for a top-level JSON object
+
+    Feed text chunks as they arrive; each top-level field is returned as
+    soon as its value is complete, long before the whole object is.
+    Text before the object (code fences, <think> blocks) is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields: Dict = {}
+        self.done = False
+
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._expect_key = True
+        self._key_start = -1
+        self._key: Optional[str] = None
+        self._value_start = -1
+
+    def feed(self, chunk: str) -> list:
+        """
+        Add text and return newly completed (field, value) pairs
+
+        Args:
+            chunk: Next piece of model output
+
+        Returns:
+            List of (field, value) tuples completed by this chunk
+        """
+        self.buffer += chunk
+        completed = []
+        if self.done or not self._find_start():
+            return completed
+
+        buffer = self.buffer
+        pos = self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect_key and self._key_start >= 0:
+                        self._key = self._load(buffer[self._key_start:pos + 1])
+                        self._key_start = -1
+                pos += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key_start = pos
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete(buffer[self._value_start:pos], completed)
+                    self.done = True
+                    pos += 1
+                    break
+            elif self._depth == 1:
+                if char == ":" and self._expect_key:
+                    self._expect_key = False
+                    self._value_start = pos + 1
+                elif char == ",":
+                    self._complete(buffer[self._value_start:pos], completed)
+            pos += 1
+
+        self._pos = pos
+        return completed
+
+    def _find_start(self) -> bool:
+        """Skip to the opening brace of the object (outside <think> blocks)"""
+        if self._started:
+            return True
+
+        text = self.buffer
+        think_end = 0
+        if "<think>" in text:
+            end = text.find("</think>")
+            if end < 0:
+                return False
+            think_end = end + len("</think>")
+
+        start = text.find("{", think_end)
+        if start < 0:
+            return False
+
+        self._started = True
+        self._depth = 1
+        self._pos = start + 1
+        return True
+
+    def _complete(self, raw: str, completed: list) -> None:
+        """Finish the current field"""
+        if self._key is not None and raw.strip():
+            value = self._load(raw.strip())
+            if value is not None or raw.strip() == "null":
+                self.fields[self._key] = value
+                completed.append((self._key, value))
+        self._key = None
+        self._expect_key = True
+        self._value_start = -1
+
+    @staticmethod
+    def _load(raw: str):
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            try:
+                return json.loads(repair_json(raw))
+            except json.JSONDecodeError:
+                return None
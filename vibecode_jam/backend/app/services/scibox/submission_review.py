@@ -0,0 +1,190 @@
+"""
+Submission review: solution evaluation plus originality check
+
+Split mode runs SolutionEvaluator (qwen3-32b) and AntiCheatLLM (coder
+model) as two calls. Fused mode asks the coder model for both in one JSON
+object, halving LLM calls per submission when quota is scarce.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Tuple
+
+from .client import Priority
+from .circuit_breaker import CircuitOpenError
+from .response_cache import CachePolicy
+from .structured_output import StructuredOutputError, validate
+from .solution_evaluator import EVALUATION_SCHEMA
+from .anti_cheat import ORIGINALITY_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+REVIEW_MODES = ("split", "fused", "auto")
+
+EVALUATION_MODEL = "qwen3-32b-awq"
+FUSED_MODEL = "qwen3-coder-30b-a3b-instruct-fp8"
+
+FUSED_CACHE = CachePolicy(ttl=86400, prompt_version="review-fused-v2")
+FUSED_SCHEMA = {**EVALUATION_SCHEMA, "originality": dict}
+
+FUSED_SYSTEM_PROMPT = """You are a senior technical interviewer and code analyst.
+Evaluate the code submission objectively and constructively, and in the same
+pass assess its originality: whether it was likely copied from well-known sources.
+Always respond in JSON format."""
+
+FUSED_ORIGINALITY_PROMPT = """
+
+Add one more field to the same JSON object:
+    "originality": {
+        "similarity_score": 0-100,
+        "is_suspicious": true/false,
+        "likely_source": "leetcode/stackoverflow/github/original/unknown",
+        "reasoning": "Short explanation",
+        "confidence": "low/medium/high",
+        "flags": ["Flag 1 if any"],
+        "recommendation": "accept/review/reject"
+    }
+
+Originality scoring:
+- 0-30: Appears original
+- 31-60: Some similarities, likely legitimate
+- 61-80: Notable similarities, review carefully
+- 81-100: Very similar to known solutions"""
+
+
+class SubmissionReviewer:
+    """Evaluate a submission and check its originality in split or fused mode"""
+
+    def __init__(self, client, evaluator, anti_cheat, mode: str = "split", auto_queue_depth: int = 2):
+        """
+        Initialize reviewer
+
+        Args:
+            client: SciboxClient instance
+            evaluator: SolutionEvaluator (split mode)
+            anti_cheat: AntiCheatLLM (split mode)
+            mode: "split", "fused" or "auto" (fused while quota is scarce)
+            auto_queue_depth: In auto mode, fuse once this many requests
+                              wait for the evaluation and coder models
+        """
+        if mode not in REVIEW_MODES:
+            raise ValueError(f"Unknown review mode: {mode}")
+
+        self.client = client
+        self.evaluator = evaluator
+        self.anti_cheat = anti_cheat
+        self.mode = mode
+        self.auto_queue_depth = auto_queue_depth
+        self.stats = {"split": 0, "fused": 0, "fused_fallbacks": 0}
+
+    def choose_mode(self) -> str:
+        """Mode for the next review"""
+        if self.mode != "auto":
+            return self.mode
+
+        if not self.client.is_available(FUSED_MODEL):
+            return "split"
+        if not self.client.is_available(EVALUATION_MODEL):
+            return "fused"
+
+        queued = self.client.scheduler.get_stats()["queued"]
+        waiting = queued.get(EVALUATION_MODEL, 0) + queued.get(FUSED_MODEL, 0)
+        return "fused" if waiting >= self.auto_queue_depth else "split"
+
+    async def review(
+        self,
+        task: Dict,
+        code: str,
+        test_results: Dict,
+        execution_time_ms: float,
+        language: str = "python",
+        task_context: str = "",
+        mode: str = None
+    ) -> Tuple[Dict, Dict]:
+        """
+        Evaluate a solution and check its originality
+
+        Args:
+            task: Task dict with problem description
+            code: Code submitted by candidate
+            test_results: Dict with test results
+            execution_time_ms: Code execution time
+            language: Programming language
+            task_context: Task description for the originality check
+            mode: Override the configured mode ("split" or "fused")
+
+        Returns:
+            (evaluation, originality) dicts, shaped as SolutionEvaluator and
+            AntiCheatLLM.check_code_originality return them
+        """
+        mode = mode or self.choose_mode()
+        if mode == "fused":
+            try:
+                result = await self._review_fused(task, code, test_results, execution_time_ms, language)
+                self.stats["fused"] += 1
+                return result
+            except CircuitOpenError as e:
+                # Split mode has per-service fallbacks
+                logger.warning(f"{e}; reviewing in split mode")
+                self.stats["fused_fallbacks"] += 1
+            except StructuredOutputError as e:
+                logger.warning(f"Invalid fused review response ({e}); reviewing in split mode")
+                self.stats["fused_fallbacks"] += 1
+
+        self.stats["split"] += 1
+        evaluation, originality = await asyncio.gather(
+            self.evaluator.evaluate_solution(task, code, test_results, execution_time_ms, language),
+            self.anti_cheat.check_code_originality(code, language, task_context)
+        )
+        return evaluation, originality
+
+    async def _review_fused(
+        self,
+        task: Dict,
+        code: str,
+        test_results: Dict,
+        execution_time_ms: float,
+        language: str
+    ) -> Tuple[Dict, Dict]:
+        """
+        One coder-model call returning evaluation and originality
+
+        Raises:
+            CircuitOpenError: Coder model circuit is open
+            StructuredOutputError: Reply could not be parsed or repaired
+        """
+        messages = self.evaluator._build_evaluation_messages(task, code, test_results, execution_time_ms, language)
+        messages = [
+            {"role": "system", "content": FUSED_SYSTEM_PROMPT},
+            {"role": "user", "content": messages[1]["content"] + FUSED_ORIGINALITY_PROMPT}
+        ]
+
+        response = await self.client.json_completion(
+            model=FUSED_MODEL,
+            messages=messages,
+            temperature=0.2,
+            max_tokens=2000,
+            priority=Priority.EVALUATION,
+            call_site="review_fused",
+            cache=FUSED_CACHE,
+            coalesce=True
+        )
+
+        content = response['choices'][0]['message']['content']
+        evaluation = await self.client.structured_output.parse(
+            content, "review_fused", FUSED_SCHEMA, model=FUSED_MODEL, priority=Priority.EVALUATION
+        )
+        originality = evaluation.pop("originality")
+        error = validate(originality, ORIGINALITY_SCHEMA)
+        if error is not None:
+            raise StructuredOutputError(f"originality: {error}")
+
+        logger.info(
+            f"Solution reviewed (fused) - Overall: {evaluation.get('overall_score', 0)}/100, "
+            f"Similarity: {originality.get('similarity_score', 0)}"
+        )
+        return evaluation, originality
+
+    def get_stats(self) -> Dict:
+        """Get reviews per mode"""
+        return {"mode": self.mode, **self.stats}
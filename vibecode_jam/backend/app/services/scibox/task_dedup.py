@@ -0,0 +1,408 @@
+"""
+Near-duplicate detection for generated tasks
+
+Each task (title + description) gets a MinHash signature over word
+shingles, computed locally, and a bge-m3 embedding. Both live in per-domain
+numpy matrices, so a check is a vectorized scan of every known task: 16-bit
+MinHash values are compared directly, and embeddings are shortlisted through
+a 128-d random projection before an exact rerank of the candidates (about
+15 ms and 2.5 KB per task at 100k tasks). Fingerprints are persisted in
+Postgres and loaded at startup; bank tasks without one are backfilled with
+a MinHash-only fingerprint.
+
+A task that passes check() is held as a reservation (so concurrent
+candidates are compared against it) until it is stored and register()ed
+with its id, or release()d when it is thrown away.
+"""
+
+import logging
+import re
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, insert
+
+from .circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Projected dimensions and shortlist size of the embedding prefilter
+PROJECTION_DIM = 128
+RERANK_CANDIDATES = 64
+
+
+class DuplicateTaskError(Exception):
+    """Raised when every generated candidate was a near-duplicate"""
+
+    def __init__(self, title: str, match: Dict):
+        super().__init__(f"Task '{title}' is a near-duplicate of '{match['title']}'")
+        self.match = match
+
+
+def task_text(title: str, description: str) -> str:
+    return f"{title or ''}\n{description or ''}"
+
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """Word n-grams of normalized text"""
+    words = re.sub(r"[^\w\s]", " ", text.lower()).split()
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+class _Rows:
+    """Growable 2-D array with a label per row"""
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.data: Optional[np.ndarray] = None
+        self.size = 0
+        self.labels: List[Dict] = []
+
+    def append(self, row: np.ndarray, label: Dict) -> None:
+        if self.data is None:
+            self.data = np.empty((64, len(row)), dtype=self.dtype)
+        elif self.size == len(self.data):
+            grown = np.empty((2 * len(self.data), self.data.shape[1]), dtype=self.dtype)
+            grown[:self.size] = self.data
+            self.data = grown
+        self.data[self.size] = row
+        self.size += 1
+        self.labels.append(label)
+
+    def view(self) -> Optional[np.ndarray]:
+        return self.data[:self.size] if self.size else None
+
+
+class _EmbeddingRows:
+    """Unit embeddings (float16) with a random projection for shortlisting"""
+
+    def __init__(self, projection: np.ndarray):
+        self.projection = projection
+        self.full = _Rows(np.float16)
+        self.projected = _Rows(np.float32)
+
+    @property
+    def size(self) -> int:
+        return self.full.size
+
+    def append(self, embedding: np.ndarray, label: Dict) -> None:
+        self.full.append(embedding, label)
+        self.projected.append(embedding @ self.projection, label)
+
+    def closest(self, embedding: np.ndarray):
+        """(label, cosine similarity) of the closest row"""
+        scores = self.projected.view() @ (embedding @ self.projection)
+        k = min(RERANK_CANDIDATES, len(scores))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        exact = self.full.data[candidates].astype(np.float32) @ embedding
+        best = int(exact.argmax())
+        return self.full.labels[int(candidates[best])], float(exact[best])
+
+
+class TaskDedupIndex:
+    """In-memory MinHash + embedding index of known tasks, per domain"""
+
+    def __init__(
+        self,
+        client,
+        session_factory=None,
+        embedding_threshold: float = 0.92,
+        minhash_threshold: float = 0.6,
+        num_perm: int = 64,
+        seed: int = 1,
+        reservation_ttl: float = 10800.0
+    ):
+        """
+        Initialize index
+
+        Args:
+            client: SciboxClient used for embeddings
+            session_factory: Async session factory for persistence
+                             (in-memory only if omitted)
+            embedding_threshold: Cosine similarity from which a task is a duplicate
+            minhash_threshold: Estimated shingle Jaccard similarity from which
+                               a task is a duplicate
+            num_perm: MinHash permutations (signature length)
+            seed: Seed of the MinHash permutations; must not change once
+                  fingerprints are persisted
+            reservation_ttl: Seconds a checked task that was never
+                             registered or released keeps blocking duplicates
+        """
+        self.client = client
+        self.session_factory = session_factory
+        self.embedding_threshold = embedding_threshold
+        self.minhash_threshold = minhash_threshold
+        self.reservation_ttl = reservation_ttl
+
+        self._rng = np.random.default_rng(seed)
+        self._a = self._rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = self._rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._projection: Optional[np.ndarray] = None
+
+        self._signatures: Dict[str, _Rows] = {}
+        self._embeddings: Dict[str, _EmbeddingRows] = {}
+        # (domain, title) -> checked task waiting to be stored
+        self._reserved: Dict[Tuple[str, str], Dict] = {}
+        self.stats = {
+            "checks": 0, "admitted": 0, "minhash_duplicates": 0, "embedding_duplicates": 0,
+            "embedding_skipped": 0, "registered": 0, "released": 0, "reservations_expired": 0,
+            "persist_errors": 0,
+            "match_calls": 0, "match_ms_total": 0.0
+        }
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text's shingles"""
+        hashes = np.array(
+            [zlib.crc32(shingle.encode()) for shingle in shingles(text)] or [0],
+            dtype=np.uint64
+        )
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(await self.client.get_embedding(text, model="bge-m3"), dtype=np.float32)
+        except CircuitOpenError as e:
+            logger.info(f"{e}; task dedup uses MinHash only")
+            return None
+        except Exception as e:
+            logger.warning(f"Task embedding failed, dedup uses MinHash only: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _match(self, domain: str, signature: np.ndarray, embedding: Optional[np.ndarray]) -> Optional[Dict]:
+        """Closest known task above a threshold"""
+        started = time.perf_counter()
+        try:
+            match = self._closest(domain, signature, embedding)
+            if match is not None:
+                self.stats[f"{match['method']}_duplicates"] += 1
+            return match
+        finally:
+            self.stats["match_calls"] += 1
+            self.stats["match_ms_total"] += (time.perf_counter() - started) * 1000
+
+    def _closest(self, domain: str, signature: np.ndarray, embedding: Optional[np.ndarray]) -> Optional[Dict]:
+        # Low 16 bits of each MinHash value (b-bit MinHash): half the
+        # memory scanned, with a 1/65536 chance of a spurious match
+        signature = signature.astype(np.uint16)
+        reserved = [entry for (d, _), entry in self._reserved.items() if d == domain]
+
+        signatures = self._signatures.get(domain)
+        if signatures is not None and signatures.size:
+            equal = (signatures.view() == signature).sum(axis=1, dtype=np.uint16)
+            best = int(equal.argmax())
+            jaccard = equal[best] / len(signature)
+            if jaccard >= self.minhash_threshold:
+                return {**signatures.labels[best], "method": "minhash", "score": round(float(jaccard), 4)}
+        for entry in reserved:
+            jaccard = float((entry["signature"].astype(np.uint16) == signature).mean())
+            if jaccard >= self.minhash_threshold:
+                return {**entry["label"], "method": "minhash", "score": round(jaccard, 4)}
+
+        if embedding is None:
+            return None
+        embeddings = self._embeddings.get(domain)
+        if embeddings is not None and embeddings.size:
+            label, similarity = embeddings.closest(embedding)
+            if similarity >= self.embedding_threshold:
+                return {**label, "method": "embedding", "score": round(similarity, 4)}
+        for entry in reserved:
+            if entry["embedding"] is None:
+                continue
+            similarity = float(entry["embedding"] @ embedding)
+            if similarity >= self.embedding_threshold:
+                return {**entry["label"], "method": "embedding", "score": round(similarity, 4)}
+        return None
+
+    def _add(self, domain: str, label: Dict, signature: np.ndarray, embedding: Optional[np.ndarray]) -> None:
+        self._signatures.setdefault(domain, _Rows(np.uint16)).append(signature.astype(np.uint16), label)
+        if embedding is not None:
+            if self._projection is None:
+                self._projection = (
+                    self._rng.normal(size=(len(embedding), PROJECTION_DIM)) / np.sqrt(PROJECTION_DIM)
+                ).astype(np.float32)
+            self._embeddings.setdefault(domain, _EmbeddingRows(self._projection)).append(embedding, label)
+
+    def _expire_reservations(self) -> None:
+        now = time.monotonic()
+        for key in [key for key, entry in self._reserved.items() if entry["expires"] <= now]:
+            del self._reserved[key]
+            self.stats["reservations_expired"] += 1
+
+    async def check(self, domain: str, task: Dict) -> Optional[Dict]:
+        """
+        Check a generated task and reserve it if it is new
+
+        The reservation counts as a known task for later checks; call
+        register() once the task is stored, or release() if it is dropped.
+
+        Args:
+            domain: Task domain (tasks are compared within their domain)
+            task: Task dict with title and description
+
+        Returns:
+            None if the task was admitted, otherwise the matching known task
+            (title, task_id, method, score)
+        """
+        title = task.get("title", "")
+        text = task_text(title, task.get("description", ""))
+        signature = self.signature(text)
+
+        self.stats["checks"] += 1
+        self._expire_reservations()
+        match = self._match(domain, signature, None)
+        if match is not None:
+            return match
+
+        embedding = await self._embed(text)
+        if embedding is None:
+            self.stats["embedding_skipped"] += 1
+
+        # No await between the final check and the reservation: concurrent
+        # checks of the same task cannot both pass
+        match = self._match(domain, signature, embedding)
+        if match is None:
+            self._reserved[(domain, title)] = {
+                "label": {"title": title, "task_id": None},
+                "signature": signature,
+                "embedding": embedding,
+                "expires": time.monotonic() + self.reservation_ttl
+            }
+            self.stats["admitted"] += 1
+        return match
+
+    async def register(self, domain: str, task: Dict, task_id: int) -> None:
+        """
+        Index and persist a stored task under its id
+
+        Args:
+            domain: Task domain
+            task: Task dict with title and description
+            task_id: ID of the stored Task row
+        """
+        title = task.get("title", "")
+        entry = self._reserved.pop((domain, title), None)
+        if entry is not None:
+            signature, embedding = entry["signature"], entry["embedding"]
+        else:
+            # Reservation expired, or the task never passed check() (served
+            # after regeneration attempts, local fallback): MinHash only,
+            # and nothing to add if the index already covers it
+            signature, embedding = self.signature(task_text(title, task.get("description", ""))), None
+            if self._closest(domain, signature, None) is not None:
+                return
+
+        self._add(domain, {"title": title, "task_id": task_id}, signature, embedding)
+        self.stats["registered"] += 1
+        await self._persist([{
+            "task_id": task_id,
+            "domain": domain,
+            "title": title[:255],
+            "minhash": signature.tobytes(),
+            "embedding": embedding.tobytes() if embedding is not None else None
+        }])
+
+    def release(self, domain: str, task: Dict) -> None:
+        """Drop the reservation of a checked task that will not be stored"""
+        if self._reserved.pop((domain, task.get("title", "")), None) is not None:
+            self.stats["released"] += 1
+
+    async def _persist(self, rows: List[Dict]) -> None:
+        if self.session_factory is None or not rows:
+            return
+        from app.db.models import TaskFingerprint
+        try:
+            async with self.session_factory() as session:
+                await session.execute(insert(TaskFingerprint), rows)
+                await session.commit()
+        except Exception as e:
+            self.stats["persist_errors"] += 1
+            logger.warning(f"Failed to persist task fingerprints: {e}")
+
+    async def load(self, backfill_batch: int = 500) -> int:
+        """
+        Load persisted fingerprints and backfill bank tasks that have none
+
+        Returns:
+            Number of tasks in the index
+        """
+        if self.session_factory is None:
+            return 0
+        from app.db.models import Task, TaskFingerprint
+
+        started = time.perf_counter()
+        async with self.session_factory() as session:
+            fingerprints = (await session.execute(
+                select(TaskFingerprint.domain, TaskFingerprint.title, TaskFingerprint.task_id,
+                       TaskFingerprint.minhash, TaskFingerprint.embedding)
+            )).all()
+            tasks = (await session.execute(
+                select(Task.id, Task.domain, Task.title, Task.description)
+                .where(Task.source_task_id.is_(None))
+            )).all()
+
+        known = set()
+        for domain, title, task_id, minhash, embedding in fingerprints:
+            self._add(
+                domain,
+                {"title": title, "task_id": task_id},
+                np.frombuffer(minhash, dtype=np.uint32),
+                np.frombuffer(embedding, dtype=np.float32) if embedding else None
+            )
+            known.add((domain, title))
+
+        backfill = []
+        for task_id, domain, title, description in tasks:
+            if not domain or (domain, title) in known:
+                continue
+            known.add((domain, title))
+            signature = self.signature(task_text(title, description))
+            self._add(domain, {"title": title, "task_id": task_id}, signature, None)
+            backfill.append({
+                "task_id": task_id,
+                "domain": domain,
+                "title": title[:255],
+                "minhash": signature.tobytes(),
+                "embedding": None
+            })
+
+        for i in range(0, len(backfill), backfill_batch):
+            await self._persist(backfill[i:i + backfill_batch])
+
+        size = self.size()
+        logger.info(
+            f"Task dedup index loaded: {size} tasks ({len(backfill)} backfilled) "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return size
+
+    def size(self) -> int:
+        return sum(rows.size for rows in self._signatures.values())
+
+    def get_stats(self) -> Dict:
+        """Get duplicate counts, match latency and index size per domain"""
+        checks = self.stats["checks"]
+        duplicates = self.stats["minhash_duplicates"] + self.stats["embedding_duplicates"]
+        return {
+            **{k: v for k, v in self.stats.items() if k not in ("match_calls", "match_ms_total")},
+            "reserved": len(self._reserved),
+            "duplicate_ratio": round(duplicates / checks, 4) if checks else 0.0,
+            "avg_match_ms": round(self.stats["match_ms_total"] / self.stats["match_calls"], 3)
+            if self.stats["match_calls"] else 0.0,
+            "by_domain": {
+                domain: {
+                    "tasks": rows.size,
+                    "embedded": self._embeddings[domain].size if domain in self._embeddings else 0
+                }
+                for domain, rows in self._signatures.items()
+            }
+        }
@@ -2,30 +2,63 @@
 Task generation service using Scibox LLM
 """
 
-import json
 import logging
-from typing import Dict, Optional
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .client import Priority
+from .circuit_breaker import CircuitOpenError
+from .structured_output import StructuredOutputError
+from .task_dedup import DuplicateTaskError
 
 logger = logging.getLogger(__name__)
 
+# Fields every generated task must have
+TASK_SCHEMA = {"title": str, "description": str}
+
+# Difficulty steps for the next task (speculatively generated ahead of time)
+ADAPT_STEPS = {
+    "harder": "slightly harder",
+    "same": "at the same difficulty",
+    "easier": "easier"
+}
+
+
+def adapt_step(candidate_score: float) -> str:
+    """Difficulty step for the next task from the score on the previous one"""
+    if candidate_score >= 70:
+        return "harder"
+    if candidate_score >= 50:
+        return "same"
+    return "easier"
+
 
 class TaskGenerator:
     """Generate coding interview tasks using Scibox LLM"""
 
-    def __init__(self, client):
+    def __init__(self, client, fallback=None, dedup=None, max_regenerations: int = 1):
         """
         Initialize task generator
 
         Args:
             client: SciboxClient instance
+            fallback: Local generator used while the model circuit is open
+            dedup: TaskDedupIndex every generated or adapted task is checked
+                   against (callers register() it once stored)
+            max_regenerations: New attempts after a near-duplicate
         """
         self.client = client
+        self.fallback = fallback
+        self.dedup = dedup
+        self.max_regenerations = max_regenerations
 
     async def generate_task(
         self,
         level: str,  # "junior", "middle", "senior"
         domain: str,  # "algorithms", "backend", "frontend"
-        previous_score: Optional[float] = None
+        previous_score: Optional[float] = None,
+        priority: int = Priority.TASK_GENERATION,
+        allow_fallback: bool = True,
+        avoid_titles: Optional[List[str]] = None
     ) -> Dict:
         """
         Generate a coding interview task
@@ -34,10 +67,80 @@ class TaskGenerator:
             level: Difficulty level (junior/middle/senior)
             domain: Programming domain (algorithms/backend/frontend)
             previous_score: Previous candidate score for adaptation
+            priority: Priority class for the quota queue
+            allow_fallback: Use the local generator while the model circuit
+                            is open (otherwise CircuitOpenError is raised)
+            avoid_titles: Existing tasks the new one must differ from
 
         Returns:
             Dict with task details
+
+        Raises:
+            DuplicateTaskError: At background priority, when every attempt
+                                was a near-duplicate (interactive callers
+                                get the last attempt instead)
+        """
+        try:
+            return await self._deduplicated(
+                domain, priority, avoid_titles,
+                lambda avoid: self._request_task(level, domain, previous_score, priority, avoid)
+            )
+        except CircuitOpenError as e:
+            if self.fallback is None or not allow_fallback:
+                raise
+            logger.warning(f"{e}; generating task locally")
+            return await self.fallback.generate_task(level, domain, previous_score)
+
+    async def _deduplicated(
+        self,
+        domain: Optional[str],
+        priority: int,
+        avoid_titles: Optional[List[str]],
+        request: Callable[[List[str]], Awaitable[Dict]]
+    ) -> Dict:
+        """
+        Request tasks until one passes the near-duplicate check
+
+        Args:
+            domain: Task domain (no check without one)
+            priority: Priority class of the request
+            avoid_titles: Existing tasks the new one must differ from
+            request: Makes one attempt given the titles to avoid
+
+        Raises:
+            DuplicateTaskError: At background priority, when every attempt
+                                was a near-duplicate
         """
+        avoid_titles = list(avoid_titles or [])
+        for _ in range(self.max_regenerations + 1):
+            task_data = await request(avoid_titles)
+            if self.dedup is None or not domain:
+                return task_data
+
+            match = await self.dedup.check(domain, task_data)
+            if match is None:
+                return task_data
+
+            logger.info(
+                f"Generated task '{task_data.get('title')}' is a near-duplicate of "
+                f"'{match['title']}' ({match['method']} {match['score']})"
+            )
+            avoid_titles.append(match["title"])
+
+        if priority >= Priority.BACKGROUND:
+            raise DuplicateTaskError(task_data.get("title", ""), match)
+        logger.warning("Serving a near-duplicate task after regeneration attempts")
+        return task_data
+
+    async def _request_task(
+        self,
+        level: str,
+        domain: str,
+        previous_score: Optional[float],
+        priority: int,
+        avoid_titles: List[str]
+    ) -> Dict:
+        """One generation call"""
         system_prompt = """You are an experienced technical interviewer.
 Generate coding interview tasks.
 Always respond in JSON format.
@@ -52,6 +155,10 @@ Ensure tasks are solvable in 10-15 minutes."""
             else:
                 adaptation = "Maintain similar difficulty level."
 
+        avoid = ""
+        if avoid_titles:
+            avoid = "- Must be a different problem from these existing tasks: " + "; ".join(avoid_titles) + "\n"
+
         user_prompt = f"""Generate a coding interview task with these specifications:
 
 Level: {level}
@@ -64,7 +171,7 @@ Requirements:
 - Include 5 hidden test cases for evaluation
 - Clear input/output format
 - Should test problem-solving ability and code quality
-
+{avoid}
 Respond with ONLY valid JSON in this exact format:
 {{
     "title": "Task Title",
@@ -88,31 +195,30 @@ Respond with ONLY valid JSON in this exact format:
         ]
 
         try:
-            response = await self.client.chat_completion(
+            response = await self.client.json_completion(
                 model="qwen3-32b-awq",
                 messages=messages,
                 temperature=0.8,  # Higher for variety
-                max_tokens=2000
+                max_tokens=2000,
+                priority=priority,
+                call_site="generate_task",
+                coalesce=False  # Concurrent generations must yield distinct tasks
             )
 
             # Extract content
             content = response['choices'][0]['message']['content']
-
-            # Remove markdown if present
-            if '```json' in content:
-                content = content.split('```json')[1].split('```')[0]
-            elif content.startswith('```'):
-                content = content[3:content.rfind('```')]
-
-            # Parse JSON
-            task_data = json.loads(content.strip())
+            task_data = await self.client.structured_output.parse(
+                content, "generate_task", TASK_SCHEMA, priority=priority
+            )
 
             logger.info(f"Generated task: {task_data.get('title', 'Unknown')}")
             return task_data
 
-        except json.JSONDecodeError as e:
+        except StructuredOutputError as e:
             logger.error(f"Failed to parse task JSON: {e}")
             raise Exception(f"Invalid JSON response from Scibox: {e}")
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Task generation error: {e}")
             raise
@@ -120,19 +226,56 @@ Respond with ONLY valid JSON in this exact format:
     async def adapt_task(
         self,
         original_task: Dict,
-        candidate_score: float
+        candidate_score: Optional[float],
+        step: Optional[str] = None,
+        priority: int = Priority.TASK_GENERATION,
+        allow_fallback: bool = True,
+        domain: Optional[str] = None
     ) -> Dict:
         """
         Adapt existing task based on candidate performance
 
         Args:
             original_task: Original task dict
-            candidate_score: Candidate's score on previous task
+            candidate_score: Candidate's score on previous task (None when
+                             generating ahead of time for a given step)
+            step: Difficulty step from ADAPT_STEPS; overrides the score
+            priority: Priority class for the quota queue
+            allow_fallback: Use the local generator while the model circuit
+                            is open (otherwise CircuitOpenError is raised)
+            domain: Domain of the interview; the adapted task is checked
+                    for near-duplicates within it
 
         Returns:
             Adapted task
+
+        Raises:
+            DuplicateTaskError: At background priority, when every attempt
+                                was a near-duplicate
         """
-        if candidate_score >= 90:
+        try:
+            return await self._deduplicated(
+                domain or original_task.get("domain"), priority, None,
+                lambda avoid: self._request_adapted(original_task, candidate_score, step, priority, avoid)
+            )
+        except CircuitOpenError as e:
+            if self.fallback is None or not allow_fallback:
+                raise
+            logger.warning(f"{e}; adapting task locally")
+            return await self.fallback.adapt_task(original_task, candidate_score)
+
+    async def _request_adapted(
+        self,
+        original_task: Dict,
+        candidate_score: Optional[float],
+        step: Optional[str],
+        priority: int,
+        avoid_titles: List[str]
+    ) -> Dict:
+        """One adaptation call"""
+        if step is not None:
+            level_adjustment = ADAPT_STEPS[step]
+        elif candidate_score >= 90:
             level_adjustment = "significantly harder"
         elif candidate_score >= 70:
             level_adjustment = "slightly harder"
@@ -143,14 +286,25 @@ Respond with ONLY valid JSON in this exact format:
 
         system_prompt = "You are an expert in adaptive interviewing. Modify tasks based on performance."
 
-        user_prompt = f"""The candidate scored {candidate_score}/100 on this task:
+        description = self.client.token_budget.compact_text(original_task.get('description', ''), "adapt_task")
+
+        avoid = ""
+        if avoid_titles:
+            avoid = "\nIt must also differ from these existing tasks: " + "; ".join(avoid_titles)
+
+        performance = (
+            f"The candidate scored {candidate_score}/100 on this task:"
+            if candidate_score is not None else "The candidate is solving this task:"
+        )
+
+        user_prompt = f"""{performance}
 
 Title: {original_task.get('title', 'Unknown')}
-Description: {original_task.get('description', '')}
+Description: {description}
 
 Generate a {level_adjustment} task in the same domain.
 Keep the same JSON format as before.
-Ensure new task doesn't repeat the previous one."""
+Ensure new task doesn't repeat the previous one.{avoid}"""
 
         messages = [
             {"role": "system", "content": system_prompt},
@@ -158,25 +312,25 @@ Ensure new task doesn't repeat the previous one."""
         ]
 
         try:
-            response = await self.client.chat_completion(
+            response = await self.client.json_completion(
                 model="qwen3-32b-awq",
                 messages=messages,
                 temperature=0.8,
-                max_tokens=2000
+                max_tokens=2000,
+                priority=priority,
+                call_site="adapt_task",
+                coalesce=False
             )
 
             content = response['choices'][0]['message']['content']
-
-            # Clean JSON
-            if '```json' in content:
-                content = content.split('```json')[1].split('```')[0]
-            elif content.startswith('```'):
-                content = content[3:content.rfind('```')]
-
-            task_data = json.loads(content.strip())
+            task_data = await self.client.structured_output.parse(
+                content, "adapt_task", TASK_SCHEMA, priority=priority
+            )
             logger.info(f"Adapted task: {task_data.get('title', 'Unknown')}")
             return task_data
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Task adaptation error: {e}")
             raise
@@ -0,0 +1,307 @@
+"""
+Prompt token budgeting: estimation, compaction and adaptive max_tokens
+"""
+
+import math
+import re
+from collections import deque
+from typing import Dict, List, Optional
+
+# Context window per model (tokens)
+MODEL_CONTEXT_LIMITS = {
+    "qwen3-32b-awq": 32768,
+    "qwen3-coder-30b-a3b-instruct-fp8": 32768,
+    "bge-m3": 8192
+}
+DEFAULT_CONTEXT_LIMIT = 8192
+
+# Relative cost units per 1K tokens (input, output); adjust to the contract
+MODEL_PRICES = {
+    "qwen3-32b-awq": (1.0, 3.0),
+    "qwen3-coder-30b-a3b-instruct-fp8": (0.8, 2.4),
+    "bge-m3": (0.05, 0.0)
+}
+
+# Budgets for user-supplied parts of prompts
+CODE_TOKEN_BUDGET = 4000
+TEXT_TOKEN_BUDGET = 1000
+
+# Overhead of the chat template per message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# BPE tokenizers split identifiers into short pieces and most
+# punctuation into separate tokens; this tracks that closely enough
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+_LINE_COMMENT = {
+    "python": "#",
+    "ruby": "#",
+    "shell": "#",
+    "bash": "#",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast local token estimate for a string"""
+    if not text:
+        return 0
+    return len(_TOKEN_RE.findall(text))
+
+
+def estimate_messages_tokens(messages: List[Dict[str, str]]) -> int:
+    """Token estimate for a chat prompt"""
+    return sum(estimate_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def strip_comments(code: str, language: str = "python") -> str:
+    """
+    Remove full-line comments and blank lines
+
+    Only whole-line comments are removed so string literals are never touched.
+    """
+    marker = _LINE_COMMENT.get(language.lower(), "//")
+    lines = []
+    in_block = False
+
+    for line in code.split("\n"):
+        stripped = line.strip()
+        if marker == "//":
+            if in_block:
+                if "*/" in stripped:
+                    in_block = False
+                continue
+            if stripped.startswith("/*"):
+                in_block = "*/" not in stripped
+                continue
+        if not stripped or stripped.startswith(marker):
+            continue
+        lines.append(line.rstrip())
+
+    return "\n".join(lines)
+
+
+def elide_middle(lines: List[str], max_tokens: int) -> List[str]:
+    """Keep head and tail lines within max_tokens, replacing the middle with a marker"""
+    costs = [estimate_tokens(line) + 1 for line in lines]
+    budget = max_tokens - 12  # room for the marker
+    head, tail = [], []
+    used = 0
+    i, j = 0, len(lines) - 1
+
+    # Alternate so both the start (imports, signatures) and the end survive;
+    # the head gets twice the share
+    while i <= j:
+        take_head = len(head) <= 2 * len(tail)
+        index = i if take_head else j
+        if used + costs[index] > budget:
+            break
+        used += costs[index]
+        if take_head:
+            head.append(lines[i])
+            i += 1
+        else:
+            tail.append(lines[j])
+            j -= 1
+
+    omitted = j - i + 1
+    if omitted <= 0:
+        return lines
+    return head + [f"... [{omitted} lines omitted] ..."] + tail[::-1]
+
+
+def compact_code(code: str, language: str = "python", max_tokens: int = CODE_TOKEN_BUDGET) -> str:
+    """
+    Fit code into a token budget
+
+    Steps, each only if still over budget: strip comments and blank lines,
+    then elide the middle of the file.
+    """
+    if estimate_tokens(code) <= max_tokens:
+        return code
+
+    code = strip_comments(code, language)
+    if estimate_tokens(code) <= max_tokens:
+        return code
+
+    return "\n".join(elide_middle(code.split("\n"), max_tokens))
+
+
+def compact_text(text: str, max_tokens: int = TEXT_TOKEN_BUDGET) -> str:
+    """Fit prose (task descriptions) into a token budget by eliding the middle"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    lines = text.split("\n")
+    if len(lines) > 3:
+        return "\n".join(elide_middle(lines, max_tokens))
+
+    # One long paragraph: cut by characters around the estimated ratio
+    keep = int(len(text) * max_tokens / estimate_tokens(text))
+    return f"{text[:keep * 2 // 3]} ... {text[-(keep // 3):]}"
+
+
+class TokenBudget:
+    """
+    Per-call-site prompt accounting and max_tokens selection
+
+    max_tokens for a call site is picked from recently observed output
+    lengths (p95 plus headroom, rounded up to stable steps so cache keys
+    stay stable) and never exceeds what the caller asked for. Any
+    truncated response in the recent window falls back to the caller's value.
+    """
+
+    def __init__(
+        self,
+        history: int = 200,
+        min_observations: int = 20,
+        headroom: float = 1.3,
+        step: int = 128,
+        floor: int = 256
+    ):
+        """
+        Initialize budget tracker
+
+        Args:
+            history: Output lengths kept per call site
+            min_observations: Observations needed before adapting max_tokens
+            headroom: Multiplier over the observed p95
+            step: Round max_tokens up to a multiple of this
+            floor: Never go below this many tokens
+        """
+        self.history = history
+        self.min_observations = min_observations
+        self.headroom = headroom
+        self.step = step
+        self.floor = floor
+
+        self._outputs: Dict[str, deque] = {}
+        self.stats: Dict[str, Dict] = {}
+
+    def _site_stats(self, call_site: str) -> Dict:
+        return self.stats.setdefault(call_site, {
+            "calls": 0, "prompt_tokens": 0, "max_prompt_tokens": 0,
+            "completion_tokens": 0, "truncated": 0, "cost": 0.0,
+            "compactions": 0, "tokens_saved": 0
+        })
+
+    def compact_code(self, code: str, language: str, call_site: str, max_tokens: int = CODE_TOKEN_BUDGET) -> str:
+        """compact_code() that records savings for a call site"""
+        compacted = compact_code(code, language, max_tokens)
+        if compacted is not code:
+            self._record_compaction(call_site, code, compacted)
+        return compacted
+
+    def compact_text(self, text: str, call_site: str, max_tokens: int = TEXT_TOKEN_BUDGET) -> str:
+        """compact_text() that records savings for a call site"""
+        compacted = compact_text(text, max_tokens)
+        if compacted is not text:
+            self._record_compaction(call_site, text, compacted)
+        return compacted
+
+    def _record_compaction(self, call_site: str, original: str, compacted: str) -> None:
+        stats = self._site_stats(call_site)
+        stats["compactions"] += 1
+        stats["tokens_saved"] += estimate_tokens(original) - estimate_tokens(compacted)
+
+    def pick_max_tokens(
+        self,
+        call_site: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        requested: int
+    ) -> int:
+        """
+        Choose max_tokens for a request
+
+        Args:
+            call_site: Calling operation
+            model: Model name
+            messages: Prompt messages
+            requested: Caller's max_tokens (upper bound)
+
+        Returns:
+            max_tokens to send
+        """
+        max_tokens = requested
+        outputs = self._outputs.get(call_site)
+        if outputs and len(outputs) >= self.min_observations and not any(t for _, t in outputs):
+            lengths = sorted(n for n, _ in outputs)
+            p95 = lengths[min(len(lengths) - 1, int(len(lengths) * 0.95))]
+            adaptive = math.ceil(p95 * self.headroom / self.step) * self.step
+            max_tokens = min(requested, max(self.floor, adaptive))
+
+        # Leave room for the prompt in the context window
+        context = MODEL_CONTEXT_LIMITS.get(model, DEFAULT_CONTEXT_LIMIT)
+        available = context - estimate_messages_tokens(messages)
+        return max(1, min(max_tokens, available))
+
+    def record(
+        self,
+        call_site: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        response: Optional[Dict] = None
+    ) -> None:
+        """
+        Record prompt size, output length and estimated cost of a call
+
+        Args:
+            call_site: Calling operation
+            model: Model name
+            messages: Prompt messages
+            response: Chat completion (None for streams: prompt only)
+        """
+        stats = self._site_stats(call_site)
+        usage = (response or {}).get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens") or estimate_messages_tokens(messages)
+        completion_tokens = 0
+
+        if response is not None:
+            try:
+                choice = response["choices"][0]
+                truncated = choice.get("finish_reason") == "length"
+                completion_tokens = usage.get("completion_tokens") or estimate_tokens(choice["message"]["content"])
+            except (KeyError, IndexError, TypeError):
+                truncated = False
+            outputs = self._outputs.setdefault(call_site, deque(maxlen=self.history))
+            outputs.append((completion_tokens, truncated))
+            stats["truncated"] += truncated
+
+        input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        stats["calls"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["max_prompt_tokens"] = max(stats["max_prompt_tokens"], prompt_tokens)
+        stats["completion_tokens"] += completion_tokens
+        stats["cost"] += (prompt_tokens * input_price + completion_tokens * output_price) / 1000
+
+    def record_output(self, call_site: str, model: str, content: str, truncated: bool = False) -> None:
+        """
+        Record the output of a stream (its prompt was recorded when it started)
+
+        Args:
+            call_site: Name of the calling operation
+            model: Model name
+            content: Full streamed text
+            truncated: The stream ended with finish_reason "length"
+        """
+        stats = self._site_stats(call_site)
+        completion_tokens = estimate_tokens(content)
+        outputs = self._outputs.setdefault(call_site, deque(maxlen=self.history))
+        outputs.append((completion_tokens, truncated))
+        stats["truncated"] += truncated
+        stats["completion_tokens"] += completion_tokens
+        stats["cost"] += completion_tokens * MODEL_PRICES.get(model, (0.0, 0.0))[1] / 1000
+
+    def get_stats(self) -> Dict:
+        """Get prompt size, cost and current max_tokens observations per call site"""
+        result = {}
+        for call_site, stats in self.stats.items():
+            outputs = self._outputs.get(call_site) or ()
+            lengths = sorted(n for n, _ in outputs)
+            result[call_site] = {
+                **stats,
+                "cost": round(stats["cost"], 4),
+                "avg_prompt_tokens": round(stats["prompt_tokens"] / stats["calls"]) if stats["calls"] else 0,
+                "output_p95": lengths[min(len(lengths) - 1, int(len(lengths) * 0.95))] if lengths else None
+            }
+        return result
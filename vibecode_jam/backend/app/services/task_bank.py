@@ -0,0 +1,195 @@
+"""
+Reusable task bank in Postgres
+
+Every generated task stays in the `tasks` table as a bank task
+(source_task_id IS NULL, interview_id IS NULL). A new interview gets a copy
+of the least exposed, least recently used bank task for its level and
+domain, so most interviews start without an LLM call; generation only tops
+the bank up when it runs out of tasks below the exposure cap.
+
+Bank tasks belong to no interview, so deleting an interview (which cascades
+to its tasks) only removes its copies, never a task other copies point to.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Task
+
+logger = logging.getLogger(__name__)
+
+
+def copy_task(source: Task, interview_id: int) -> Task:
+    """Interview copy of a bank task"""
+    return Task(
+        interview_id=interview_id,
+        source_task_id=source.id,
+        title=source.title,
+        description=source.description,
+        level=source.level,
+        domain=source.domain,
+        task_data=source.task_data or {}
+    )
+
+
+async def store_generated(
+    db: AsyncSession,
+    interview_id: int,
+    generated: Dict,
+    level: str,
+    domain: str,
+    default_title: str = "Task"
+) -> Tuple[Task, Task]:
+    """
+    Save a task generated for an interview as a bank task plus the interview's copy
+
+    Args:
+        db: Request session (caller commits)
+        interview_id: Interview the task was generated for
+        generated: Generated task dict
+        level: Difficulty level
+        domain: Programming domain
+        default_title: Title if the task has none
+
+    Returns:
+        (bank task, interview copy), flushed but uncommitted
+    """
+    source = Task(
+        title=generated.get("title", default_title),
+        description=generated.get("description", ""),
+        level=level,
+        domain=domain,
+        task_data=generated,
+        # Already served once, to this interview
+        times_used=1,
+        last_used_at=datetime.utcnow()
+    )
+    db.add(source)
+    await db.flush()
+
+    task = copy_task(source, interview_id)
+    db.add(task)
+    return source, task
+
+
+class TaskBank:
+    """Select stored tasks for interviews by exposure and recency"""
+
+    def __init__(self, session_factory=None, max_exposure: int = 25, min_stock: int = 10):
+        """
+        Initialize task bank
+
+        Args:
+            session_factory: Async session factory for background queries
+                             (stock checks); requests pass their own session
+            max_exposure: Interviews a task is served to before it is retired
+                          (limits how widely a task can leak)
+            min_stock: Servable tasks per (level, domain) below which the
+                       bank asks for generated top-ups
+        """
+        self.session_factory = session_factory
+        self.max_exposure = max_exposure
+        self.min_stock = min_stock
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+
+    def _servable(self, level: str, domain: str):
+        # Rows owned by an interview are never served: they go away with it
+        # (tasks generated live before bank tasks were stored separately,
+        # and copies whose bank task was deleted)
+        return (
+            Task.source_task_id.is_(None),
+            Task.interview_id.is_(None),
+            Task.level == level,
+            Task.domain == domain,
+            Task.times_used < self.max_exposure
+        )
+
+    async def draw(self, db: AsyncSession, interview_id: int, level: str, domain: str) -> Optional[Task]:
+        """
+        Copy a bank task into an interview
+
+        Skips tasks the interview has already seen. The bank row is locked
+        with SKIP LOCKED so concurrent interviews get different tasks; its
+        usage is updated in the caller's transaction.
+
+        Args:
+            db: Request session (caller commits)
+            interview_id: Interview receiving the task
+            level: Difficulty level
+            domain: Programming domain
+
+        Returns:
+            New (uncommitted) Task for the interview, or None if the bank has
+            no servable task (caller generates one)
+        """
+        seen = select(Task.source_task_id).where(
+            Task.interview_id == interview_id,
+            Task.source_task_id.isnot(None)
+        )
+        query = (
+            select(Task)
+            .where(
+                *self._servable(level, domain),
+                Task.id.notin_(seen)
+            )
+            .order_by(
+                Task.times_used.asc(),
+                Task.last_used_at.asc().nulls_first(),
+                Task.id.asc()
+            )
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+
+        try:
+            source = (await db.execute(query)).scalar_one_or_none()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Task bank lookup failed ({level}/{domain}): {e}")
+            await db.rollback()
+            return None
+
+        if source is None:
+            self.stats["misses"] += 1
+            return None
+
+        source.times_used = (source.times_used or 0) + 1
+        source.last_used_at = datetime.utcnow()
+
+        task = copy_task(source, interview_id)
+        db.add(task)
+        self.stats["hits"] += 1
+        return task
+
+    async def stock(self, level: str, domain: str) -> int:
+        """Number of tasks still servable for a (level, domain)"""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(func.count(Task.id)).where(*self._servable(level, domain))
+            )
+            return result.scalar_one()
+
+    async def needs_top_up(self, level: str, domain: str) -> bool:
+        """Whether generated tasks are needed for a (level, domain)"""
+        if self.session_factory is None:
+            return True
+        try:
+            return await self.stock(level, domain) < self.min_stock
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Task bank stock check failed ({level}/{domain}): {e}")
+            return True
+
+    def get_stats(self) -> Dict:
+        """Get hit ratio of bank draws"""
+        draws = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": round(self.stats["hits"] / draws, 4) if draws else 0.0,
+            "max_exposure": self.max_exposure,
+            "min_stock": self.min_stock
+        }
@@ -0,0 +1,226 @@
+"""
+Pre-generated task pool in Redis with background refill
+
+One Redis list per (level, domain) holds ready tasks so /start can pop
+one in milliseconds instead of waiting seconds for the LLM. A background
+refiller tops up pools that fall below the low-water mark at background
+priority, so live requests keep precedence on the model quota. With a
+task bank, pools whose bank still has enough servable tasks are not refilled.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import redis.asyncio as aioredis
+
+from app.services.scibox import Priority, CircuitOpenError, DuplicateTaskError
+
+logger = logging.getLogger(__name__)
+
+
+class TaskPool:
+    """Redis-backed pools of generated tasks per (level, domain)"""
+
+    def __init__(
+        self,
+        redis_client: aioredis.Redis,
+        generator,
+        levels: Sequence[str],
+        domains: Sequence[str],
+        target_depth: int = 5,
+        low_water: int = 2,
+        refill_interval: float = 30.0,
+        key_prefix: str = "task_pool",
+        lock_ttl: int = 120,
+        bank=None,
+        dedup=None
+    ):
+        """
+        Initialize task pool
+
+        Args:
+            redis_client: Async Redis client
+            generator: TaskGenerator used to fill the pools
+            levels: Levels to keep pools for
+            domains: Domains to keep pools for
+            target_depth: Tasks a pool is filled up to
+            low_water: Refill a pool once it holds fewer tasks than this
+            refill_interval: Seconds between periodic depth checks
+            key_prefix: Redis key prefix
+            lock_ttl: Seconds a refill lock is held without progress
+                      (one worker refills a pool at a time)
+            bank: TaskBank served before the pool; only pairs it runs low
+                  on are refilled
+            dedup: TaskDedupIndex holding the generated tasks' reservations
+                   (released when a task cannot be pooled)
+        """
+        self.redis = redis_client
+        self.generator = generator
+        self.pairs: List[Tuple[str, str]] = [(level, domain) for level in levels for domain in domains]
+        self.target_depth = target_depth
+        self.low_water = low_water
+        self.refill_interval = refill_interval
+        self.key_prefix = key_prefix
+        self.lock_ttl = lock_ttl
+        self.bank = bank
+        self.dedup = dedup
+
+        self._wake = asyncio.Event()
+        self._refiller: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._owner = uuid.uuid4().hex
+
+        self.depths: Dict[str, int] = {}
+        self.stats = {
+            "hits": 0, "misses": 0, "generated": 0, "generation_errors": 0, "redis_errors": 0,
+            "bank_stocked": 0, "duplicates": 0
+        }
+
+    def _key(self, level: str, domain: str) -> str:
+        return f"{self.key_prefix}:{level}:{domain}"
+
+    async def pop(self, level: str, domain: str) -> Optional[Dict]:
+        """
+        Take a ready task
+
+        Returns:
+            Task dict, or None if the pool is empty (caller generates live)
+        """
+        key = self._key(level, domain)
+        try:
+            raw = await self.redis.lpop(key)
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            logger.warning(f"Task pool pop error ({level}/{domain}): {e}")
+            return None
+
+        # Let the refiller check this pool now rather than at the next interval
+        self._wake.set()
+
+        if raw is None:
+            self.stats["misses"] += 1
+            self.depths[f"{level}/{domain}"] = 0
+            return None
+
+        self.stats["hits"] += 1
+        name = f"{level}/{domain}"
+        if self.depths.get(name):
+            self.depths[name] -= 1
+        return json.loads(raw)
+
+    async def push(self, level: str, domain: str, task: Dict) -> int:
+        """Add a task to a pool; returns the new depth"""
+        depth = await self.redis.rpush(self._key(level, domain), json.dumps(task, ensure_ascii=False))
+        self.depths[f"{level}/{domain}"] = depth
+        return depth
+
+    async def depth(self, level: str, domain: str) -> int:
+        """Number of ready tasks in a pool"""
+        depth = await self.redis.llen(self._key(level, domain))
+        self.depths[f"{level}/{domain}"] = depth
+        return depth
+
+    async def start(self) -> None:
+        """Start the background refiller"""
+        if self._refiller is None:
+            self._stopping = False
+            self._refiller = asyncio.create_task(self._run())
+            logger.info(f"Task pool refiller started ({len(self.pairs)} pools, target depth {self.target_depth})")
+
+    async def stop(self) -> None:
+        """Stop the background refiller"""
+        if self._refiller is not None:
+            # The flag covers a cancellation swallowed inside a Redis call
+            self._stopping = True
+            self._refiller.cancel()
+            await asyncio.wait([self._refiller], timeout=5.0)
+            self._refiller = None
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                await self.refill()
+            except Exception as e:
+                logger.error(f"Task pool refill error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def refill(self) -> int:
+        """
+        Top up every pool below the low-water mark, emptiest first
+
+        Returns:
+            Number of tasks generated
+        """
+        try:
+            depths = [(await self.depth(level, domain), level, domain) for level, domain in self.pairs]
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            logger.warning(f"Task pool depth check failed: {e}")
+            return 0
+
+        added = 0
+        for depth, level, domain in sorted(depths):
+            if depth >= self.low_water:
+                continue
+            if self.bank is not None and not await self.bank.needs_top_up(level, domain):
+                self.stats["bank_stocked"] += 1
+                continue
+
+            lock = f"{self._key(level, domain)}:refill_lock"
+            if not await self.redis.set(lock, self._owner, nx=True, ex=self.lock_ttl):
+                continue  # Another worker is refilling this pool
+
+            try:
+                while depth < self.target_depth:
+                    try:
+                        task = await self.generator.generate_task(
+                            level, domain, priority=Priority.BACKGROUND, allow_fallback=False
+                        )
+                    except CircuitOpenError as e:
+                        # Model is down; try again on the next pass
+                        logger.warning(f"{e}; task pool refill paused")
+                        return added
+                    except DuplicateTaskError as e:
+                        self.stats["duplicates"] += 1
+                        logger.info(f"Task pool {level}/{domain}: {e}")
+                        break
+                    except Exception as e:
+                        self.stats["generation_errors"] += 1
+                        logger.warning(f"Task pool generation failed ({level}/{domain}): {e}")
+                        break
+
+                    try:
+                        depth = await self.push(level, domain, task)
+                    except Exception:
+                        if self.dedup is not None:
+                            self.dedup.release(domain, task)
+                        raise
+                    await self.redis.expire(lock, self.lock_ttl)
+                    self.stats["generated"] += 1
+                    added += 1
+            finally:
+                if await self.redis.get(lock) in (self._owner, self._owner.encode()):
+                    await self.redis.delete(lock)
+
+            logger.info(f"Task pool {level}/{domain} refilled to {depth}")
+
+        return added
+
+    def get_stats(self) -> Dict:
+        """Get hit ratio, generation counts and last known depth per pool"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "target_depth": self.target_depth,
+            "low_water": self.low_water,
+            "depths": dict(self.depths)
+        }
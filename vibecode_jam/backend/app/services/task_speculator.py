@@ -0,0 +1,216 @@
+"""
+Speculative next-task generation
+
+While a candidate solves a task, the harder, same-difficulty and easier
+follow-ups are generated in the background and parked in Redis. When the
+candidate asks for the next task, the one matching their real score is
+served without an LLM wait and the other two go to the shared task pool
+(at the level they correspond to) so the quota spent on them is not lost.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Dict, Optional, Tuple
+
+import redis.asyncio as aioredis
+
+from app.services.scibox import Priority, CircuitOpenError
+from app.services.scibox.task_generator import ADAPT_STEPS, adapt_step
+from app.services.task_pool import TaskPool
+
+logger = logging.getLogger(__name__)
+
+LEVEL_ORDER = ("junior", "middle", "senior")
+LEVEL_SHIFT = {"harder": 1, "same": 0, "easier": -1}
+
+
+def step_level(level: str, step: str) -> str:
+    """Level a task of the given difficulty step corresponds to"""
+    if level not in LEVEL_ORDER:
+        return level
+    index = LEVEL_ORDER.index(level) + LEVEL_SHIFT[step]
+    return LEVEL_ORDER[max(0, min(len(LEVEL_ORDER) - 1, index))]
+
+
+class TaskSpeculator:
+    """Generate follow-up tasks ahead of time, keyed by interview and current task"""
+
+    def __init__(
+        self,
+        redis_client: aioredis.Redis,
+        generator,
+        pool: Optional[TaskPool] = None,
+        ttl: int = 7200,
+        wait_timeout: float = 30.0,
+        key_prefix: str = "task_speculation",
+        dedup=None
+    ):
+        """
+        Initialize speculator
+
+        Args:
+            redis_client: Async Redis client (shared by all workers)
+            generator: TaskGenerator used for adapt_task
+            pool: Pool receiving speculative tasks that were not chosen
+            ttl: Seconds speculative tasks are kept for an interview
+            wait_timeout: Max seconds to wait for a speculation still running
+                          in this process before generating live
+            key_prefix: Redis key prefix
+            dedup: TaskDedupIndex holding the follow-ups' reservations
+                   (released when a follow-up is discarded)
+        """
+        self.redis = redis_client
+        self.generator = generator
+        self.pool = pool
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.key_prefix = key_prefix
+        self.dedup = dedup
+
+        self._running: Dict[Tuple[int, int, str], asyncio.Task] = {}
+        self.stats = {
+            "speculated": 0, "failed": 0, "hits": 0, "waited": 0, "misses": 0,
+            "returned_to_pool": 0, "discarded": 0
+        }
+
+    def _key(self, interview_id: int, task_id: int) -> str:
+        return f"{self.key_prefix}:{interview_id}:{task_id}"
+
+    def speculate(self, interview_id: int, task_id: int, task: Dict, level: str, domain: str) -> None:
+        """
+        Start generating the follow-ups of a task in the background
+
+        Args:
+            interview_id: Interview ID
+            task_id: ID of the task the candidate is working on
+            task: Task dict (title, description, ...)
+            level: Interview level
+            domain: Interview domain
+        """
+        for step in ADAPT_STEPS:
+            key = (interview_id, task_id, step)
+            if key in self._running:
+                continue
+            running = asyncio.create_task(self._generate(interview_id, task_id, step, task, level, domain))
+            self._running[key] = running
+            running.add_done_callback(lambda _, key=key: self._running.pop(key, None))
+
+    async def _generate(
+        self,
+        interview_id: int,
+        task_id: int,
+        step: str,
+        task: Dict,
+        level: str,
+        domain: str
+    ) -> Optional[Dict]:
+        """Generate one follow-up and park it in Redis"""
+        try:
+            adapted = await self.generator.adapt_task(
+                task, None, step=step, priority=Priority.BACKGROUND, allow_fallback=False, domain=domain
+            )
+        except CircuitOpenError as e:
+            logger.info(f"{e}; skipping speculative {step} task")
+            self.stats["failed"] += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Speculative {step} task for interview {interview_id} failed: {e}")
+            self.stats["failed"] += 1
+            return None
+
+        adapted["level"] = step_level(level, step)
+        adapted["domain"] = domain
+        self.stats["speculated"] += 1
+
+        key = self._key(interview_id, task_id)
+        try:
+            if await self.redis.exists(f"{key}:taken"):
+                # Next task was already chosen (possibly by another worker)
+                await self._return_to_pool(adapted)
+            else:
+                await self.redis.hset(key, step, json.dumps(adapted, ensure_ascii=False))
+                await self.redis.expire(key, self.ttl)
+        except Exception as e:
+            self._discard(adapted)
+            logger.warning(f"Failed to store speculative task: {e}")
+        return adapted
+
+    async def take(self, interview_id: int, task_id: int, candidate_score: float) -> Optional[Dict]:
+        """
+        Get the speculative follow-up matching a score
+
+        The other follow-ups are moved to the task pool.
+
+        Args:
+            interview_id: Interview ID
+            task_id: ID of the task the score is for
+            candidate_score: Score on that task
+
+        Returns:
+            Task dict, or None if it is not ready (caller generates live)
+        """
+        step = adapt_step(candidate_score)
+        chosen = None
+
+        # Already running here: waiting beats starting over
+        running = self._running.get((interview_id, task_id, step))
+        if running is not None:
+            try:
+                chosen = await asyncio.wait_for(asyncio.shield(running), timeout=self.wait_timeout)
+                if chosen is not None:
+                    self.stats["waited"] += 1
+            except asyncio.TimeoutError:
+                pass
+
+        key = self._key(interview_id, task_id)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hgetall(key)
+                pipe.delete(key)
+                pipe.set(f"{key}:taken", 1, ex=self.ttl)
+                parked, _, _ = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to read speculative tasks: {e}")
+            parked = {}
+
+        for parked_step, raw in parked.items():
+            parked_step = parked_step.decode() if isinstance(parked_step, bytes) else parked_step
+            task = json.loads(raw)
+            if parked_step == step and chosen is None:
+                chosen = task
+                self.stats["hits"] += 1
+            elif parked_step != step:
+                await self._return_to_pool(task)
+
+        if chosen is None:
+            self.stats["misses"] += 1
+        return chosen
+
+    async def _return_to_pool(self, task: Dict) -> None:
+        """Hand an unused speculative task to the shared pool"""
+        if self.pool is None:
+            self._discard(task)
+            return
+        try:
+            await self.pool.push(task["level"], task["domain"], task)
+            self.stats["returned_to_pool"] += 1
+        except Exception as e:
+            self._discard(task)
+            logger.warning(f"Failed to return speculative task to pool: {e}")
+
+    def _discard(self, task: Dict) -> None:
+        """Drop a follow-up that will never be stored"""
+        self.stats["discarded"] += 1
+        if self.dedup is not None:
+            self.dedup.release(task["domain"], task)
+
+    def get_stats(self) -> Dict:
+        """Get speculation outcomes"""
+        served = self.stats["hits"] + self.stats["waited"]
+        requests = served + self.stats["misses"]
+        return {
+            **self.stats,
+            "running": len(self._running),
+            "hit_ratio": round(served / requests, 4) if requests else 0.0
+        }
@@ -0,0 +1,678 @@
+"""
+Batch test harness for submissions
+
+Every visible and hidden test case of a task runs in one sandbox
+invocation: the candidate's code is wrapped in a driver program that loads
+it once, calls the solution function for each case in process (with a
+per-case timeout, wall time and error), and prints a JSON report of what
+each call returned after a random marker line. Programs that define no
+function are run once per case with the case input on stdin.
+
+Only the case inputs go into the sandbox; expected outputs never leave the
+backend, which judges the reported values itself. Cases are the free-form
+strings the task generator writes ("[2,7,11,15], target=9", "3 (abc)"), so
+inputs are parsed as call arguments and outputs as literals where they can
+be, falling back to whitespace-insensitive text comparison.
+"""
+
+import ast
+import json
+import logging
+import math
+import re
+import secrets
+import time
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services.code_runner import CodeRunner, get_code_runner
+
+logger = logging.getLogger(__name__)
+
+# Characters of a case's actual output (and of errors) kept in the results
+MAX_ACTUAL_CHARS = 500
+
+# Characters of encoded return value a driver reports per case
+MAX_VALUE_CHARS = 65536
+
+# Time kept back from DOCKER_TIMEOUT for interpreter startup and the report
+_STARTUP_RESERVE = 1.0
+
+_PYTHON_DRIVER = r'''
+import ast, builtins, inspect, io, json, os, re, signal, sys, time
+
+PAYLOAD = json.loads(__PAYLOAD__)
+report_out = os.fdopen(os.dup(1), "w")
+STARTED = time.perf_counter()
+
+
+class CaseTimeout(BaseException):
+    pass
+
+
+def on_alarm(signum, frame):
+    raise CaseTimeout()
+
+
+signal.signal(signal.SIGALRM, on_alarm)
+
+
+def pythonic(text):
+    text = re.sub(r"\btrue\b", "True", text)
+    text = re.sub(r"\bfalse\b", "False", text)
+    return re.sub(r"\bnull\b", "None", text)
+
+
+def parse_args(text):
+    joined = ", ".join(line.strip() for line in text.splitlines() if line.strip())
+    for variant in (text, joined, pythonic(joined)):
+        try:
+            call = ast.parse("f(" + variant + ")", mode="eval").body
+            args = [ast.literal_eval(arg) for arg in call.args]
+            kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords if kw.arg}
+            return args, kwargs
+        except Exception:
+            pass
+    return [text], {}
+
+
+def bind(fn, args, kwargs):
+    if not kwargs:
+        return args, {}
+    try:
+        inspect.signature(fn).bind(*args, **kwargs)
+        return args, kwargs
+    except (TypeError, ValueError):
+        return args + list(kwargs.values()), {}
+
+
+def encode(value, depth=0):
+    """JSON form of a return value; non-JSON types are tagged"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if depth > 100:
+        return {"__repr__": "..."}
+    if isinstance(value, (list, tuple)):
+        return [encode(item, depth + 1) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return {"__set__": [encode(item, depth + 1) for item in value]}
+    if isinstance(value, dict):
+        return {"__dict__": [[encode(k, depth + 1), encode(v, depth + 1)] for k, v in value.items()]}
+    return {"__repr__": repr(value)[:PAYLOAD["max_value"]]}
+
+
+def find_entry(tree):
+    """(class name or None, function name) of the solution, or None for stdin programs"""
+    scopes = [(None, tree.body)]
+    scopes += [(node.name, node.body) for node in tree.body
+               if isinstance(node, ast.ClassDef) and node.name == "Solution"]
+    for owner, body in reversed(scopes):
+        functions = [node for node in body
+                     if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+                     and not node.name.startswith("_")]
+        if not functions:
+            continue
+        names = [fn.name for fn in functions]
+        if PAYLOAD.get("entry") in names:
+            return owner, PAYLOAD["entry"]
+
+        # Helpers are called by other functions; the solution is called by none
+        referenced = set()
+        for fn in functions:
+            for node in ast.walk(fn):
+                if isinstance(node, ast.Name) and node.id != fn.name:
+                    referenced.add(node.id)
+                elif isinstance(node, ast.Attribute) and node.attr != fn.name:
+                    referenced.add(node.attr)
+        roots = [fn for fn in functions if fn.name not in referenced] or functions
+        if len(roots) > 1:
+            roots = [fn for fn in roots if fn.name != "main"]
+        entry = roots[-1]
+        if owner is None and entry.name == "main" and not entry.args.args:
+            return None
+        return owner, entry.name
+    return None
+
+
+def run_case(call, text, timeout):
+    captured = io.StringIO()
+    sys.stdout = captured
+    sys.stdin = io.StringIO(text)
+    result = {"time_ms": 0.0, "error": None}
+    started = time.perf_counter()
+    try:
+        try:
+            # Keeps firing in case the code swallows the first one; also
+            # bounds encoding (a __repr__ is candidate code too)
+            signal.setitimer(signal.ITIMER_REAL, timeout, 0.05)
+            actual = call(text)
+            result["time_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            if actual is None and captured.getvalue():
+                actual = captured.getvalue()
+            value = encode(actual)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if len(json.dumps(value)) > PAYLOAD["max_value"]:
+            value = {"__repr__": "<return value too large>"}
+        result["value"] = value
+    except CaseTimeout:
+        result["error"] = "Timed out after %gs" % timeout
+    except BaseException as e:
+        result["error"] = ("%s: %s" % (type(e).__name__, e))[:PAYLOAD["max_error"]]
+    finally:
+        sys.stdout, sys.stdin = sys.__stdout__, sys.__stdin__
+        if not result["time_ms"]:
+            result["time_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return result
+
+
+def main():
+    report = {"entry": None, "load_error": None, "cases": []}
+    call = None
+    try:
+        compiled = compile(PAYLOAD["code"], "<solution>", "exec")
+        entry = find_entry(ast.parse(PAYLOAD["code"]))
+    except SyntaxError as e:
+        report["load_error"] = "SyntaxError: %s (line %s)" % (e.msg, e.lineno)
+        entry = None
+
+    if report["load_error"] is None and entry is None:
+        report["entry"] = "<stdin>"
+
+        def call(text):
+            exec(compiled, {"__name__": "__main__", "__builtins__": builtins})
+            return sys.stdout.getvalue()
+    elif report["load_error"] is None:
+        owner, name = entry
+        report["entry"] = "%s.%s" % (owner, name) if owner else name
+        namespace = {"__name__": "solution", "__builtins__": builtins}
+        loaded = run_case(lambda text: exec(compiled, namespace), "", PAYLOAD["case_timeout"])
+        if loaded["error"]:
+            report["load_error"] = loaded["error"]
+        else:
+            def call(text):
+                fn = getattr(namespace[owner](), name) if owner else namespace[name]
+                args, kwargs = bind(fn, *parse_args(text))
+                return fn(*args, **kwargs)
+
+    for text in PAYLOAD["inputs"]:
+        remaining = PAYLOAD["budget"] - (time.perf_counter() - STARTED)
+        if report["load_error"]:
+            report["cases"].append({"time_ms": 0.0, "error": report["load_error"]})
+        elif remaining <= 0:
+            report["cases"].append({"time_ms": 0.0, "error": "Skipped: time budget exhausted"})
+        else:
+            report["cases"].append(run_case(call, text, min(PAYLOAD["case_timeout"], remaining)))
+
+    report_out.write("\n" + PAYLOAD["marker"] + "\n" + json.dumps(report) + "\n")
+    report_out.flush()
+    try:
+        sys.__stdout__.flush()
+    except Exception:
+        pass
+    # Skip atexit handlers and finalizers the solution may have registered
+    os._exit(0)
+
+
+main()
+'''
+
+_JAVASCRIPT_DRIVER = r'''
+"use strict";
+const fs = require("fs");
+const util = require("util");
+const vm = require("vm");
+
+const PAYLOAD = __PAYLOAD__;
+const write = process.stdout.write.bind(process.stdout);
+const STARTED = performance.now();
+const IDENT = "[A-Za-z_$][\\w$]*";
+
+let captured = [];
+let stdinText = "";
+const capture = (...parts) => { captured.push(parts.map(p => typeof p === "string" ? p : util.inspect(p)).join(" ")); };
+const solutionRequire = name => {
+  if (name === "fs") {
+    return { ...fs, readFileSync: (file, ...rest) => (file === 0 || file === "/dev/stdin") ? stdinText : fs.readFileSync(file, ...rest) };
+  }
+  return require(name);
+};
+const newContext = () => vm.createContext({
+  console: { log: capture, info: capture, warn: capture, error: capture, debug: capture },
+  require: solutionRequire,
+  module: { exports: {} },
+  process: { argv: [], env: {}, stdout: { write: s => { captured.push(String(s)); return true; } },
+             exit: () => { throw new Error("process.exit() called"); } },
+  Buffer, setTimeout, clearTimeout
+});
+const context = newContext();
+const values = vm.createContext({ True: true, False: false, None: null });
+
+function evaluate(text) {
+  return vm.runInContext("(" + text + ")", values, { timeout: 200 });
+}
+
+function parseArgs(text) {
+  const joined = text.split("\n").map(l => l.trim()).filter(Boolean).join(", ");
+  for (const variant of [text, joined]) {
+    const positional = variant.replace(new RegExp("(^|,)\\s*" + IDENT + "\\s*=(?!=)", "g"), "$1");
+    try { return evaluate("[" + positional + "]"); } catch (e) { /* next variant */ }
+  }
+  return [text];
+}
+
+// JSON form of a return value; non-JSON types are tagged (values may come from the solution's realm)
+function encode(value, depth = 0) {
+  if (value === undefined || value === null) return null;
+  if (typeof value === "boolean" || typeof value === "string") return value;
+  if (typeof value === "number") return Number.isFinite(value) ? value : { __float__: String(value) };
+  if (typeof value === "bigint") return { __int__: value.toString() };
+  if (depth > 100) return { __repr__: "..." };
+  if (Array.isArray(value) || ArrayBuffer.isView(value)) return Array.from(value, item => encode(item, depth + 1));
+  const tag = Object.prototype.toString.call(value);
+  if (tag === "[object Set]") return { __set__: Array.from(value, item => encode(item, depth + 1)) };
+  if (tag === "[object Map]") return { __dict__: Array.from(value, ([k, v]) => [encode(k, depth + 1), encode(v, depth + 1)]) };
+  if (tag === "[object Object]") return { __dict__: Object.entries(value).map(([k, v]) => [k, encode(v, depth + 1)]) };
+  return { __repr__: util.inspect(value).slice(0, PAYLOAD.max_value) };
+}
+
+function declaredNames(code) {
+  const names = [];
+  const patterns = [
+    new RegExp("^(?:async\\s+)?function\\s*\\*?\\s*(" + IDENT + ")\\s*\\(", "gm"),
+    new RegExp("^(?:const|let|var)\\s+(" + IDENT + ")\\s*=\\s*(?:async\\s+)?(?:function\\b|\\([^)]*\\)\\s*=>|" + IDENT + "\\s*=>)", "gm")
+  ];
+  for (const pattern of patterns) {
+    for (const match of code.matchAll(pattern)) names.push([match.index, match[1]]);
+  }
+  return names.sort((a, b) => a[0] - b[0]).map(n => n[1]).filter(n => !n.startsWith("_"));
+}
+
+function chooseEntry(functions) {
+  const names = Object.keys(functions);
+  if (names.includes(PAYLOAD.entry)) return PAYLOAD.entry;
+  // Helpers are called by other functions; the solution is called by none
+  let roots = names.filter(name => !names.some(other => other !== name &&
+    new RegExp("(^|[^\\w$])" + name.replace(/\$/g, "\\$") + "\\s*\\(").test(functions[other].toString())));
+  if (!roots.length) roots = names;
+  if (roots.length > 1) roots = roots.filter(name => name !== "main");
+  return roots[roots.length - 1];
+}
+
+async function runCase(call, text, timeout) {
+  captured = [];
+  stdinText = text;
+  const result = { time_ms: 0, error: null };
+  const started = performance.now();
+  try {
+    let actual = call(text, timeout);
+    if (actual && typeof actual.then === "function") {
+      let timer;
+      actual = await Promise.race([actual, new Promise((_, reject) => {
+        timer = setTimeout(() => reject(new Error("Script execution timed out")), timeout);
+      })]).finally(() => clearTimeout(timer));
+    }
+    result.time_ms = Math.round((performance.now() - started) * 1000) / 1000;
+    if (actual === undefined && captured.length) actual = captured.join("\n");
+    const value = encode(actual);
+    result.value = JSON.stringify(value).length > PAYLOAD.max_value ? { __repr__: "<return value too large>" } : value;
+  } catch (e) {
+    result.time_ms = Math.round((performance.now() - started) * 1000) / 1000;
+    const message = String(e && e.message || e);
+    result.error = (/timed out/.test(message) ? "Timed out after " + timeout / 1000 + "s"
+      : (e && e.name || "Error") + ": " + message).slice(0, PAYLOAD.max_error);
+  }
+  return result;
+}
+
+async function main() {
+  const report = { entry: null, load_error: null, cases: [] };
+  const caseTimeout = PAYLOAD.case_timeout * 1000;
+  const code = PAYLOAD.code;
+  const names = declaredNames(code);
+  const hasSolution = /^class\s+Solution\b/m.test(code);
+  let call = null;
+
+  if (!names.length && !hasSolution && !/module\.exports|exports\./.test(code)) {
+    report.entry = "<stdin>";
+    let script = null;
+    try { script = new vm.Script(code, { filename: "solution.js" }); } catch (e) { report.load_error = e.name + ": " + e.message; }
+    // Top-level declarations cannot be repeated, so each case gets its own context
+    call = (text, timeout) => { script.runInContext(newContext(), { timeout }); return captured.join("\n"); };
+  } else {
+    const exposed = [...names, ...(hasSolution ? ["Solution"] : [])]
+      .map(n => JSON.stringify(n) + ": typeof " + n + " === \"undefined\" ? undefined : " + n);
+    const loaded = await runCase(
+      () => { context.__declared = vm.runInContext(code + "\n;({" + exposed.join(", ") + "})", context, { filename: "solution.js", timeout: caseTimeout }); },
+      "", caseTimeout);
+    if (loaded.error) {
+      report.load_error = loaded.error;
+    } else {
+      const declared = context.__declared;
+      let functions = {};
+      if (hasSolution && declared.Solution) {
+        const proto = declared.Solution.prototype;
+        for (const name of Object.getOwnPropertyNames(proto)) {
+          if (name !== "constructor" && !name.startsWith("_") && typeof proto[name] === "function") functions[name] = proto[name];
+        }
+      }
+      const method = Object.keys(functions).length > 0;
+      if (!method) {
+        for (const name of names) if (typeof declared[name] === "function") functions[name] = declared[name];
+        const exported = context.module.exports;
+        if (typeof exported === "function") functions = { [exported.name || "default"]: exported };
+        else for (const [name, value] of Object.entries(exported)) if (typeof value === "function") functions[name] = value;
+      }
+      const entry = chooseEntry(functions);
+      if (!entry) {
+        report.load_error = "No solution function found";
+      } else {
+        report.entry = method ? "Solution." + entry : entry;
+        call = (text, timeout) => {
+          context.__fn = method ? (...args) => new declared.Solution()[entry](...args) : functions[entry];
+          context.__args = parseArgs(text);
+          return vm.runInContext("__fn(...__args)", context, { timeout });
+        };
+      }
+    }
+  }
+
+  for (const text of PAYLOAD.inputs) {
+    const remaining = PAYLOAD.budget * 1000 - (performance.now() - STARTED);
+    if (report.load_error) {
+      report.cases.push({ time_ms: 0, error: report.load_error });
+    } else if (remaining <= 0) {
+      report.cases.push({ time_ms: 0, error: "Skipped: time budget exhausted" });
+    } else {
+      report.cases.push(await runCase(call, text, Math.max(1, Math.min(caseTimeout, remaining))));
+    }
+  }
+  write("\n" + PAYLOAD.marker + "\n" + JSON.stringify(report) + "\n");
+}
+
+main().then(() => process.exit(0));
+'''
+
+_DRIVERS = {
+    "python": (_PYTHON_DRIVER, lambda payload: repr(payload)),
+    "javascript": (_JAVASCRIPT_DRIVER, lambda payload: payload),
+}
+
+
+def collect_cases(task_data: Dict) -> List[Dict]:
+    """
+    Test cases of a task, visible (examples) first
+
+    Returns:
+        List of dicts with input, output and hidden
+    """
+    cases = []
+    for hidden, key in ((False, "examples"), (True, "hidden_tests")):
+        for test in task_data.get(key) or []:
+            if isinstance(test, dict) and "input" in test and "output" in test:
+                cases.append({"input": str(test["input"]), "output": str(test["output"]), "hidden": hidden})
+    return cases
+
+
+def build_program(code: str, language: str, cases: List[Dict], marker: str, entry: Optional[str] = None) -> str:
+    """
+    Driver program calling the code with every case's input
+
+    Args:
+        code: Candidate's code
+        language: python or javascript
+        cases: Cases from collect_cases (only their inputs are embedded)
+        marker: Line printed before the JSON report
+        entry: Name of the solution function, if the task names one
+    """
+    template, quote = _DRIVERS[language]
+    payload = json.dumps({
+        "marker": marker,
+        "code": code,
+        "entry": entry,
+        "case_timeout": settings.TEST_CASE_TIMEOUT,
+        "budget": max(settings.DOCKER_TIMEOUT - _STARTUP_RESERVE, settings.TEST_CASE_TIMEOUT),
+        "max_value": MAX_VALUE_CHARS,
+        "max_error": MAX_ACTUAL_CHARS,
+        "inputs": [case["input"] for case in cases],
+    })
+    return template.replace("__PAYLOAD__", quote(payload), 1)
+
+
+def parse_report(output: str, marker: str) -> Optional[Dict]:
+    """
+    JSON report following the marker line, or None if the driver did not finish
+
+    The last report wins: a report the solution printed earlier cannot
+    replace the driver's, and since the sandbox never sees expected outputs
+    a forged one can only claim return values.
+    """
+    _, found, report = output.rpartition(marker + "\n")
+    if not found:
+        return None
+    try:
+        report = json.loads(report.strip().splitlines()[0])
+    except (ValueError, IndexError):
+        return None
+    if not isinstance(report, dict) or not isinstance(report.get("cases"), list):
+        return None
+    return report
+
+
+class _Repr(str):
+    """Text of a return value that has no literal form (e.g. an object's repr)"""
+
+
+def decode_value(value: Any) -> Any:
+    """Return value from its encoded form in a driver report"""
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "__set__" in value:
+        return {_hashable(decode_value(item)) for item in value["__set__"]}
+    if "__dict__" in value:
+        return {_hashable(decode_value(k)): decode_value(v) for k, v in value["__dict__"]}
+    if "__int__" in value:
+        return int(value["__int__"])
+    if "__float__" in value:
+        return float(value["__float__"])
+    return _Repr(value.get("__repr__", ""))
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    if isinstance(value, dict):
+        return tuple(sorted(value.items(), key=repr))
+    return value
+
+
+def _pythonic(text: str) -> str:
+    text = re.sub(r"\btrue\b", "True", text)
+    text = re.sub(r"\bfalse\b", "False", text)
+    return re.sub(r"\b(?:null|undefined)\b", "None", text)
+
+
+_MISSING = object()
+
+
+def _literal(text: str) -> Any:
+    text = text.strip()
+    # JavaScript-style object keys ({a: 1})
+    quoted = re.sub(r"([{,]\s*)([A-Za-z_$][\w$]*)\s*:", r'\1"\2":', text)
+    for variant in (text, _pythonic(text), _pythonic(quoted)):
+        try:
+            return ast.literal_eval(variant)
+        except Exception:
+            pass
+    return _MISSING
+
+
+def _equal(a: Any, b: Any) -> bool:
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool) and a == b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return math.isclose(a, b, rel_tol=1e-6, abs_tol=1e-6)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_equal(a[k], b[k]) for k in a)
+    if isinstance(a, (set, frozenset)) and isinstance(b, (list, tuple, set, frozenset)):
+        try:
+            return a == {_hashable(item) for item in b}
+        except TypeError:
+            return False
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+def render_value(value: Any) -> str:
+    """Display form of a decoded return value"""
+    if isinstance(value, _Repr):
+        return str(value)
+    try:
+        return json.dumps(value, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+def _squash(text: str) -> str:
+    return re.sub(r"\s+", "", text).replace("'", '"')
+
+
+def matches(actual: Any, expected: str) -> bool:
+    """
+    Whether a return value (or printed output) matches a case's expected output
+
+    The expected text is compared as a literal where it parses as one (also
+    without a trailing "(explanation)" or comment), otherwise as text with
+    whitespace ignored; printed output is parsed as a literal too.
+    """
+    text = expected.strip()
+    head = re.split(r"\s+(?:\(|#|//)", text, maxsplit=1)[0]
+    for candidate in (text, head):
+        value = _literal(candidate)
+        if value is not _MISSING and _equal(actual, value):
+            return True
+    if isinstance(actual, str):
+        stripped = actual.strip()
+        if _squash(stripped) in (_squash(text), _squash(head)):
+            return True
+        if isinstance(actual, _Repr):
+            return False
+        value = _literal(stripped)
+        if value is not _MISSING and value != stripped and matches(value, expected):
+            return True
+        return False
+    return _squash(render_value(actual)) in (_squash(text), _squash(head))
+
+
+def _judge(case: Dict, reported: Any) -> Dict:
+    """Case result from the driver's report entry"""
+    if not isinstance(reported, dict):
+        return {"passed": False, "time_ms": 0.0, "error": "Malformed test report"}
+    try:
+        time_ms = float(reported.get("time_ms") or 0.0)
+    except (TypeError, ValueError):
+        time_ms = 0.0
+    result = {"passed": False, "time_ms": time_ms, "error": None}
+    if reported.get("error") is not None or "value" not in reported:
+        result["error"] = str(reported.get("error") or "No result reported")[:MAX_ACTUAL_CHARS]
+        return result
+    try:
+        actual = decode_value(reported["value"])
+        result["passed"] = matches(actual, case["output"])
+    except Exception as e:
+        result["error"] = f"Malformed test report: {e}"[:MAX_ACTUAL_CHARS]
+        return result
+    # Only visible cases show what the code returned
+    if not case["hidden"]:
+        result["actual"] = render_value(actual)[:MAX_ACTUAL_CHARS]
+    return result
+
+
+def _summarize(cases: List[Dict], results: List[Dict], entry: Optional[str], error: Optional[str]) -> Dict:
+    visible = [r for c, r in zip(cases, results) if not c["hidden"]]
+    hidden = [r for c, r in zip(cases, results) if c["hidden"]]
+    case_results = []
+    for case, result in zip(cases, results):
+        item = {
+            "hidden": case["hidden"],
+            "passed": result.get("passed", False),
+            "time_ms": result.get("time_ms", 0.0),
+            "error": result.get("error")
+        }
+        if not case["hidden"]:
+            item.update({"input": case["input"], "expected": case["output"], "actual": result.get("actual")})
+        case_results.append(item)
+
+    return {
+        "visible_passed": sum(r.get("passed", False) for r in visible),
+        "visible_total": len(visible),
+        "hidden_passed": sum(r.get("passed", False) for r in hidden),
+        "hidden_total": len(hidden),
+        "execution_time_ms": round(sum(r.get("time_ms", 0.0) for r in results), 3),
+        "entry": entry,
+        "error": error,
+        "cases": case_results
+    }
+
+
+async def run_tests(
+    task_data: Dict,
+    code: str,
+    language: str,
+    runner: Optional[CodeRunner] = None
+) -> Dict:
+    """
+    Run all of a task's test cases against a submission in one sandbox run
+
+    Args:
+        task_data: Task data with examples and hidden_tests
+        code: Candidate's code
+        language: Programming language
+        runner: Code runner (process-wide one if omitted)
+
+    Returns:
+        visible/hidden passed and total counts, execution_time_ms (sum of the
+        cases' wall time), entry (function called), error (harness-level
+        failure, if any) and per-case results; hidden cases omit their
+        input, expected and actual output
+
+    Raises:
+        ExecutorBusyError: The code runner queue is full
+    """
+    cases = collect_cases(task_data)
+    if not cases:
+        return _summarize([], [], None, None)
+    if language not in _DRIVERS:
+        error = f"Language {language} not supported"
+        return _summarize(cases, [{"error": error}] * len(cases), None, error)
+
+    marker = f"__TEST_REPORT_{secrets.token_hex(8)}__"
+    program = build_program(code, language, cases, marker, entry=task_data.get("function_name"))
+
+    started = time.perf_counter()
+    result = await (runner or get_code_runner()).run(program, language)
+    output = result.get("stdout", "")
+    report = parse_report(output, marker)
+    logger.info(f"Ran {len(cases)} test cases in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    if report is None or len(report.get("cases", [])) != len(cases):
+        # Killed (timeout, memory) or exited before reporting
+        error = (result.get("stderr") or output or "Test run produced no report").strip()[-MAX_ACTUAL_CHARS:]
+        return _summarize(cases, [{"error": error}] * len(cases), None, error)
+    results = [_judge(case, reported) for case, reported in zip(cases, report["cases"])]
+    return _summarize(cases, results, report.get("entry"), report.get("load_error"))
+
+
+def format_passed(test_results: Dict) -> str:
+    """'passed/total' summary of run_tests results"""
+    passed = test_results["visible_passed"] + test_results["hidden_passed"]
+    total = test_results["visible_total"] + test_results["hidden_total"]
+    return f"{passed}/{total}"
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Split vs fused submission review: latency, LLM calls and agreement
+Run from backend directory: python -m benchmarks.review_mode_bench [--submissions 20]
+
+Reviews the same submissions with SubmissionReviewer in split mode
+(evaluator + anti-cheat) and fused mode (one coder-model call) against
+benchmarks.scibox_standin. Synthesized stand-in replies always agree;
+use --recording with responses recorded from the real API (or --upstream)
+to measure how far fused verdicts drift from split ones.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+from app.services.scibox import (
+    SciboxClient, RateLimiter, SolutionEvaluator, AntiCheatLLM, SubmissionReviewer
+)
+from app.services.scibox.client import MODEL_QUOTAS
+from benchmarks.scibox_standin import SciboxStandin, Recording, load_config
+from benchmarks.services_bench import percentile
+
+TASK = {
+    "title": "Merge Overlapping Intervals",
+    "description": "Given a list of intervals, merge all overlapping intervals and return the result sorted by start."
+}
+
+SUBMISSIONS = [
+    # Textbook solution
+    """def merge(intervals):
+    intervals.sort(key=lambda x: x[0])
+    merged = []
+    for interval in intervals:
+        if not merged or merged[-1][1] < interval[0]:
+            merged.append(interval)
+        else:
+            merged[-1][1] = max(merged[-1][1], interval[1])
+    return merged
+""",
+    # Hand-written, quadratic
+    """def merge(xs):
+    done = False
+    while not done:
+        done = True
+        for i in range(len(xs)):
+            for j in range(i + 1, len(xs)):
+                a, b = xs[i], xs[j]
+                if a[0] <= b[1] and b[0] <= a[1]:
+                    xs[i] = [min(a[0], b[0]), max(a[1], b[1])]
+                    del xs[j]
+                    done = False
+                    break
+            if not done:
+                break
+    return sorted(xs)
+""",
+    # Wrong: ignores touching intervals
+    """def merge(intervals):
+    intervals = sorted(intervals)
+    out = [intervals[0]]
+    for s, e in intervals[1:]:
+        if s < out[-1][1]:
+            out[-1][1] = max(out[-1][1], e)
+        else:
+            out.append([s, e])
+    return out
+"""
+]
+
+TEST_RESULTS = {"visible_passed": 2, "visible_total": 2, "hidden_passed": 4, "hidden_total": 5}
+
+SCORE_FIELDS = ("correctness_score", "code_quality_score", "efficiency_score", "overall_score")
+
+
+async def run_mode(
+    mode: str,
+    base_url: str,
+    limits: Dict[str, int],
+    submissions: List[str],
+    standin: SciboxStandin
+) -> Tuple[List[Tuple[Dict, Dict]], List[float], Dict[str, int]]:
+    """Review all submissions in one mode; returns results, latencies and LLM calls per model"""
+    before = {model: stats["requests"] for model, stats in standin.stats.items()}
+
+    async with SciboxClient("offline", base_url=base_url, rate_limiter=RateLimiter(limits)) as client:
+        reviewer = SubmissionReviewer(client, SolutionEvaluator(client), AntiCheatLLM(client), mode=mode)
+        latencies: List[float] = []
+
+        async def review(code: str):
+            start = time.perf_counter()
+            try:
+                return await reviewer.review(TASK, code, TEST_RESULTS, 12.5, task_context=TASK["description"])
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+        results = await asyncio.gather(*(review(code) for code in submissions))
+
+    calls = {model: stats["requests"] - before.get(model, 0) for model, stats in standin.stats.items()}
+    return results, latencies, {model: n for model, n in calls.items() if n}
+
+
+def agreement(split: List[Tuple[Dict, Dict]], fused: List[Tuple[Dict, Dict]]) -> Dict:
+    """Score differences and verdict agreement between modes"""
+    diffs = {field: [] for field in SCORE_FIELDS}
+    similarity_diffs = []
+    suspicious_same = recommendation_same = 0
+
+    for (split_eval, split_check), (fused_eval, fused_check) in zip(split, fused):
+        for field in SCORE_FIELDS:
+            diffs[field].append(abs(float(split_eval.get(field, 0)) - float(fused_eval.get(field, 0))))
+        similarity_diffs.append(
+            abs(float(split_check.get("similarity_score", 0)) - float(fused_check.get("similarity_score", 0)))
+        )
+        suspicious_same += split_check.get("is_suspicious") == fused_check.get("is_suspicious")
+        recommendation_same += split_check.get("recommendation") == fused_check.get("recommendation")
+
+    n = len(split)
+    return {
+        **{f"{field} mean |diff|": statistics.mean(values) for field, values in diffs.items()},
+        "overall within 10 pts": sum(d <= 10 for d in diffs["overall_score"]) / n,
+        "similarity mean |diff|": statistics.mean(similarity_diffs),
+        "is_suspicious agreement": suspicious_same / n,
+        "recommendation agreement": recommendation_same / n
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Split vs fused submission review benchmark")
+    parser.add_argument("--submissions", type=int, default=20)
+    parser.add_argument("--config", help="Stand-in JSON config with per-model profiles")
+    parser.add_argument("--recording", help="Recorded responses to replay")
+    parser.add_argument("--upstream", help="Real API base URL: proxy (and record) instead of replaying")
+    parser.add_argument("--production-quotas", action="store_true",
+                        help="Use the client's real MODEL_QUOTAS (slow: minutes per few calls)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    standin = SciboxStandin(
+        models=config.get("models"),
+        recording=Recording(args.recording),
+        upstream=args.upstream,
+        api_key=os.getenv("SCIBOX_API_KEY"),
+        seed=args.seed
+    )
+    base_url = await standin.start(port=0)
+
+    limits = MODEL_QUOTAS if args.production_quotas else {model: 10 ** 6 for model in MODEL_QUOTAS}
+    submissions = [
+        SUBMISSIONS[i % len(SUBMISSIONS)] + f"\n# submission {i}\n" for i in range(args.submissions)
+    ]
+
+    try:
+        split, split_latencies, split_calls = await run_mode("split", base_url, limits, submissions, standin)
+        fused, fused_latencies, fused_calls = await run_mode("fused", base_url, limits, submissions, standin)
+    finally:
+        await standin.stop()
+
+    print("\n" + "=" * 60)
+    print(f"SUBMISSION REVIEW: SPLIT vs FUSED ({args.submissions} submissions)")
+    print("=" * 60)
+    print(f"{'mode':>6} {'p50':>8} {'p95':>8} {'max':>8}  LLM calls")
+    for mode, latencies, calls in (("split", split_latencies, split_calls), ("fused", fused_latencies, fused_calls)):
+        print(f"{mode:>6} {statistics.median(latencies):>7.3f}s {percentile(latencies, 0.95):>7.3f}s "
+              f"{max(latencies):>7.3f}s  {sum(calls.values())} {calls}")
+
+    print("\nAgreement (fused vs split):")
+    for name, value in agreement(split, fused).items():
+        print(f"  {name:>28}: {value:.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Docker vs namespace sandbox backend: throughput and latency
+Run from backend directory: python -m benchmarks.sandbox_bench [--runs 200 --concurrency 4]
+
+Builds each backend exactly as code_executor does (settings from the
+environment) and runs the same short program through it from a thread
+pool, the way CodeRunner drives run_code. Reports runs per second and
+p50/p99/max latency per backend. A backend that cannot start here (no
+Docker daemon, namespaces not permitted) is reported as skipped.
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services import code_executor
+
+PROGRAMS = {
+    "python": "print(sum(i * i for i in range(1000)))",
+    "javascript": "let s = 0; for (let i = 0; i < 1000; i++) s += i * i; console.log(s)",
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def bench_backend(name: str, language: str, runs: int, concurrency: int, warmup: int) -> Dict:
+    """Run the program runs times on one backend"""
+    settings.SANDBOX_BACKEND = name
+    try:
+        backend = code_executor._create_backend()
+        backend.start()
+    except Exception as e:
+        return {"backend": name, "skipped": str(e)}
+
+    try:
+        if not backend.supports(language):
+            return {"backend": name, "skipped": f"{language} not supported"}
+        command = ["timeout", str(settings.DOCKER_TIMEOUT)] + code_executor.INTERPRETERS[language] + [PROGRAMS[language]]
+        latencies: List[float] = []
+        errors = 0
+
+        def one() -> Optional[float]:
+            started = time.perf_counter()
+            try:
+                exit_code, _, _ = backend.run(language, command)
+            except Exception:
+                return None
+            return time.perf_counter() - started if exit_code == 0 else None
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda _: one(), range(warmup)))
+            started = time.perf_counter()
+            for latency in pool.map(lambda _: one(), range(runs)):
+                if latency is None:
+                    errors += 1
+                else:
+                    latencies.append(latency)
+            elapsed = time.perf_counter() - started
+    finally:
+        backend.close()
+
+    if not latencies:
+        return {"backend": name, "skipped": f"all {runs} runs failed"}
+    return {
+        "backend": name,
+        "runs_per_sec": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 0.99),
+        "max": max(latencies),
+        "errors": errors
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Docker vs namespace sandbox backend benchmark")
+    parser.add_argument("--backends", nargs="+", default=["docker", "namespace"], choices=["docker", "namespace"])
+    parser.add_argument("--language", default="python", choices=sorted(PROGRAMS))
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=10)
+    args = parser.parse_args()
+
+    results = [
+        bench_backend(name, args.language, args.runs, args.concurrency, args.warmup)
+        for name in args.backends
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"SANDBOX BACKENDS ({args.language}, {args.runs} runs, concurrency {args.concurrency})")
+    print("=" * 60)
+    print(f"{'backend':>10} {'runs/s':>8} {'p50':>9} {'p99':>9} {'max':>9} {'errors':>7}")
+    for r in results:
+        if "skipped" in r:
+            print(f"{r['backend']:>10}  skipped: {r['skipped']}")
+            continue
+        print(f"{r['backend']:>10} {r['runs_per_sec']:>8.1f} {r['p50'] * 1000:>7.1f}ms "
+              f"{r['p99'] * 1000:>7.1f}ms {r['max'] * 1000:>7.1f}ms {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
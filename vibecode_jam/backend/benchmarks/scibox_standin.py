@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible Scibox stand-in for offline benchmarks
+Run from backend directory: python -m benchmarks.scibox_standin [--config standin.json]
+
+Point SciboxClient(base_url="http://127.0.0.1:8099/v1") at it. Modes:
+- replay (default): answer from a recording file, falling back to
+  synthesized responses shaped like each service's expected JSON
+- record: proxy to the real API (--upstream, SCIBOX_API_KEY) and append
+  every response to the recording file
+
+Per-model behaviour is configurable: lognormal latency, time to first
+token and token rate for SSE streams, quota per window (429 with
+Retry-After when exceeded) and a random error rate.
+
+Config file example:
+{
+    "models": {
+        "qwen3-32b-awq": {"latency_ms": 2500, "latency_sigma": 0.4,
+                          "ttft_ms": 400, "tokens_per_second": 40,
+                          "quota": 2, "window": 60, "error_rate": 0.01}
+    }
+}
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import aiohttp
+import numpy as np
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 1024  # bge-m3
+
+DEFAULT_MODELS = {
+    "qwen3-32b-awq": {
+        "latency_ms": 3000, "latency_sigma": 0.4, "ttft_ms": 500,
+        "tokens_per_second": 40, "quota": None, "window": 60.0, "error_rate": 0.0
+    },
+    "qwen3-coder-30b-a3b-instruct-fp8": {
+        "latency_ms": 2500, "latency_sigma": 0.4, "ttft_ms": 400,
+        "tokens_per_second": 60, "quota": None, "window": 60.0, "error_rate": 0.0
+    },
+    "bge-m3": {
+        "latency_ms": 80, "latency_sigma": 0.3, "ttft_ms": 0,
+        "tokens_per_second": 0, "quota": None, "window": 60.0, "error_rate": 0.0
+    }
+}
+
+EVALUATION_REPLY = {
+    "correctness_score": 80, "code_quality_score": 75, "efficiency_score": 70,
+    "edge_cases_score": 65, "overall_score": 75,
+    "feedback": {
+        "summary": "Solid solution that handles the main cases.",
+        "strengths": ["Clear structure", "Correct core logic"],
+        "improvements": ["Handle empty input", "Add input validation"],
+        "complexity_analysis": "O(n) time, O(n) space"
+    },
+    "next_challenge_level": "middle"
+}
+
+ORIGINALITY_REPLY = {
+    "similarity_score": 20, "is_suspicious": False, "likely_source": "original",
+    "reasoning": "Naming and structure look hand-written.", "confidence": "medium",
+    "flags": [], "recommendation": "accept"
+}
+
+# Phrase from the AI dialogue system prompt (answered in prose)
+DIALOGUE_PHRASE = "AI coding interviewer"
+
+STAT_FIELDS = ("requests", "rate_limited", "errors", "replayed", "synthesized", "recorded", "client_closed")
+
+# Synthesized replies, picked by a phrase from the service's system prompt
+SYNTHETIC_REPLIES = [
+    ("assess its originality", {**EVALUATION_REPLY, "originality": ORIGINALITY_REPLY}),
+    ("senior technical interviewer", EVALUATION_REPLY),
+    ("Determine if this code was likely copied", ORIGINALITY_REPLY),
+    ("Analyze the coding style", {
+        "style_confidence": "medium", "coding_level": "middle",
+        "common_patterns": ["early return", "list comprehension"],
+        "unusual_aspects": [], "suggests_external_help": False
+    }),
+    ("interview", {
+        "title": "Merge Overlapping Intervals",
+        "description": "Given a list of intervals, merge all overlapping intervals and return the result sorted by start.",
+        "examples": [
+            {"input": "[[1,3],[2,6],[8,10]]", "output": "[[1,6],[8,10]]"},
+            {"input": "[[1,4],[4,5]]", "output": "[[1,5]]"}
+        ],
+        "constraints": "1 <= intervals.length <= 10^4",
+        "time_limit": "15 minutes"
+    })
+]
+
+# Models tend to explain their JSON afterwards; early stop skips this
+TRAILING_NOTE = (
+    "\n\nNotes: the scores above weigh correctness highest. Edge cases such as "
+    "empty input and duplicate values were considered when assigning them."
+)
+
+DIALOGUE_REPLY = (
+    "Good question. Before we go further, can you walk me through how your "
+    "approach handles an empty input and what its time complexity is?"
+)
+
+
+def request_key(model: str, messages: List[Dict]) -> str:
+    """Recording key for a chat request (sampling params are ignored)"""
+    raw = json.dumps([model, messages], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def split_tokens(text: str) -> List[str]:
+    """Split text into ~4-character pieces for streaming"""
+    return [text[i:i + 4] for i in range(0, len(text), 4)] or [""]
+
+
+def synthetic_embedding(text: str) -> List[float]:
+    """Deterministic unit vector per text, so similarity search behaves consistently"""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+    return vector.round(6).tolist()
+
+
+class Recording:
+    """Recorded chat responses keyed by request, with per-model round-robin fallback"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.by_key: Dict[str, str] = {}
+        self.by_model: Dict[str, List[str]] = {}
+        self._cursor: Dict[str, int] = {}
+
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._add(entry["key"], entry["model"], entry["content"])
+            logger.info(f"Loaded {len(self.by_key)} recorded responses from {path}")
+
+    def _add(self, key: str, model: str, content: str) -> None:
+        self.by_key[key] = content
+        self.by_model.setdefault(model, []).append(content)
+
+    def lookup(self, key: str, model: str) -> Optional[str]:
+        """Exact match first, then cycle through the model's recordings"""
+        if key in self.by_key:
+            return self.by_key[key]
+        contents = self.by_model.get(model)
+        if not contents:
+            return None
+        index = self._cursor.get(model, 0)
+        self._cursor[model] = index + 1
+        return contents[index % len(contents)]
+
+    def save(self, key: str, model: str, content: str) -> None:
+        """Append a response to the recording file"""
+        self._add(key, model, content)
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "model": model, "content": content}, ensure_ascii=False) + "\n")
+
+
+class SciboxStandin:
+    """aiohttp app emulating the Scibox /v1 API"""
+
+    def __init__(
+        self,
+        models: Optional[Dict[str, Dict]] = None,
+        recording: Optional[Recording] = None,
+        upstream: Optional[str] = None,
+        api_key: Optional[str] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize stand-in
+
+        Args:
+            models: Per-model overrides of DEFAULT_MODELS
+            recording: Recorded responses to replay / record into
+            upstream: Real API base URL; enables record mode
+            api_key: API key for the upstream
+            seed: Random seed for latency and error sampling
+        """
+        self.models = {name: dict(profile) for name, profile in DEFAULT_MODELS.items()}
+        for name, overrides in (models or {}).items():
+            self.models.setdefault(name, dict(DEFAULT_MODELS["qwen3-32b-awq"])).update(overrides)
+
+        self.recording = recording or Recording()
+        self.upstream = upstream
+        self.api_key = api_key
+        self.random = random.Random(seed)
+
+        self._windows: Dict[str, deque] = {name: deque() for name in self.models}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._runner: Optional[web.AppRunner] = None
+
+        self.stats = {
+            name: dict.fromkeys(STAT_FIELDS, 0)
+            for name in self.models
+        }
+
+        self.app = web.Application()
+        self.app.router.add_get("/v1/models", self.handle_models)
+        self.app.router.add_post("/v1/chat/completions", self.handle_chat)
+        self.app.router.add_post("/v1/embeddings", self.handle_embeddings)
+        self.app.router.add_get("/stats", self.handle_stats)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8099) -> str:
+        """Start serving in the current event loop; returns the /v1 base URL"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}/v1"
+
+    async def stop(self) -> None:
+        if self._session:
+            await self._session.close()
+        if self._runner:
+            await self._runner.cleanup()
+
+    def _profile(self, model: str) -> Dict:
+        return self.models.get(model) or self.models["qwen3-32b-awq"]
+
+    def _sample_latency(self, profile: Dict) -> float:
+        """Lognormal latency in seconds around the configured median"""
+        median = profile["latency_ms"] / 1000
+        if median <= 0:
+            return 0.0
+        return median * math.exp(self.random.gauss(0, profile.get("latency_sigma", 0)))
+
+    def _admit(self, model: str) -> Optional[web.Response]:
+        """Apply quota and error injection; returns an error response or None"""
+        profile = self._profile(model)
+        stats = self.stats.setdefault(model, dict.fromkeys(STAT_FIELDS, 0))
+        stats["requests"] += 1
+
+        quota = profile.get("quota")
+        if quota:
+            window = profile.get("window", 60.0)
+            now = time.monotonic()
+            sent = self._windows.setdefault(model, deque())
+            while sent and now - sent[0] >= window:
+                sent.popleft()
+            if len(sent) >= quota:
+                stats["rate_limited"] += 1
+                retry_after = max(1, math.ceil(sent[0] + window - now))
+                return web.json_response(
+                    {"error": {"message": f"Rate limit exceeded for {model}", "type": "rate_limit"}},
+                    status=429,
+                    headers={"Retry-After": str(retry_after)}
+                )
+            sent.append(now)
+
+        if self.random.random() < profile.get("error_rate", 0.0):
+            stats["errors"] += 1
+            return web.json_response({"error": {"message": "Upstream overloaded", "type": "server_error"}}, status=503)
+
+        return None
+
+    async def _upstream_post(self, path: str, body: Dict) -> Dict:
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        async with self._session.post(
+            f"{self.upstream}{path}",
+            json={**body, "stream": False},
+            headers={"Authorization": f"Bearer {self.api_key}"}
+        ) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def _chat_content(self, model: str, body: Dict) -> str:
+        """Recorded, proxied (record mode) or synthesized reply text"""
+        messages = body.get("messages", [])
+        key = request_key(model, messages)
+        stats = self.stats[model]
+
+        if self.upstream:
+            data = await self._upstream_post("/chat/completions", body)
+            content = data["choices"][0]["message"]["content"]
+            self.recording.save(key, model, content)
+            stats["recorded"] += 1
+            return content
+
+        content = self.recording.lookup(key, model)
+        if content is not None:
+            stats["replayed"] += 1
+            return content
+
+        stats["synthesized"] += 1
+        system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        if DIALOGUE_PHRASE in system:
+            return DIALOGUE_REPLY
+        for phrase, reply in SYNTHETIC_REPLIES:
+            if phrase in system:
+                return "```json\n" + json.dumps(reply, indent=2) + "\n```" + TRAILING_NOTE
+        return DIALOGUE_REPLY
+
+    async def handle_models(self, request: web.Request) -> web.Response:
+        return web.json_response({"object": "list", "data": [{"id": name, "object": "model"} for name in self.models]})
+
+    async def handle_chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        model = body.get("model", "")
+        rejected = self._admit(model)
+        if rejected is not None:
+            return rejected
+
+        profile = self._profile(model)
+        content = await self._chat_content(model, body)
+        created = int(time.time())
+        completion_id = f"chatcmpl-{hashlib.md5(f'{created}{self.random.random()}'.encode()).hexdigest()[:12]}"
+
+        if not body.get("stream"):
+            await asyncio.sleep(self._sample_latency(profile))
+            prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in body.get("messages", []))
+            completion_tokens = estimate_tokens(content)
+            return web.json_response({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                }
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        await asyncio.sleep(profile.get("ttft_ms", 0) / 1000)
+
+        rate = profile.get("tokens_per_second") or 0
+        try:
+            for piece in split_tokens(content):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+                }
+                await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+                if rate:
+                    await asyncio.sleep(1 / rate)
+
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+            }
+            await response.write(f"data: {json.dumps(final)}\n\n".encode())
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+        except ConnectionResetError:
+            # Client stopped reading (e.g. early stop after a complete JSON object)
+            self.stats[model]["client_closed"] += 1
+        except asyncio.CancelledError:
+            # aiohttp cancels the handler when the client disconnects
+            self.stats[model]["client_closed"] += 1
+            raise
+        return response
+
+    async def handle_embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        model = body.get("model", "bge-m3")
+        rejected = self._admit(model)
+        if rejected is not None:
+            return rejected
+
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+
+        if self.upstream:
+            data = await self._upstream_post("/embeddings", body)
+            self.stats[model]["recorded"] += 1
+        else:
+            self.stats[model]["synthesized"] += 1
+            data = {
+                "object": "list",
+                "model": model,
+                "data": [
+                    {"object": "embedding", "index": i, "embedding": synthetic_embedding(text)}
+                    for i, text in enumerate(texts)
+                ],
+                "usage": {"prompt_tokens": sum(estimate_tokens(t) for t in texts)}
+            }
+
+        # Embedding latency grows mildly with batch size
+        await asyncio.sleep(self._sample_latency(self._profile(model)) * (1 + 0.05 * (len(texts) - 1)))
+        return web.json_response(data)
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+
+def load_config(path: Optional[str]) -> Dict:
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline Scibox stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--config", help="JSON file with per-model profiles")
+    parser.add_argument("--recording", default="benchmarks/recordings/scibox.jsonl")
+    parser.add_argument("--record", action="store_true", help="Proxy to --upstream and record responses")
+    parser.add_argument("--upstream", default=os.getenv("SCIBOX_BASE_URL", "https://api.scibox.ai/v1"))
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config = load_config(args.config)
+
+    if args.record:
+        os.makedirs(os.path.dirname(args.recording) or ".", exist_ok=True)
+
+    standin = SciboxStandin(
+        models=config.get("models"),
+        recording=Recording(args.recording),
+        upstream=args.upstream if args.record else None,
+        api_key=os.getenv("SCIBOX_API_KEY"),
+        seed=args.seed
+    )
+    base_url = await standin.start(args.host, args.port)
+    print(f"Scibox stand-in ({'record' if args.record else 'replay'}) listening on {base_url}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await standin.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the Scibox services against the local stand-in
+Run from backend directory: python -m benchmarks.services_bench [--sessions 50]
+
+Starts benchmarks.scibox_standin in-process and simulates interview
+sessions: generate task -> chat -> evaluate + originality + similarity.
+No network or API key needed.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from app.services.scibox import (
+    SciboxClient, RateLimiter, TaskGenerator, SolutionEvaluator,
+    AIDialogue, AntiCheatLLM, EmbeddingSearch
+)
+from app.services.scibox.client import MODEL_QUOTAS
+from benchmarks.scibox_standin import SciboxStandin, Recording, load_config
+
+SAMPLE_CODE = """def merge(intervals):
+    intervals.sort()
+    result = []
+    for start, end in intervals:
+        if result and start <= result[-1][1]:
+            result[-1][1] = max(result[-1][1], end)
+        else:
+            result.append([start, end])
+    return result
+"""
+
+TEST_RESULTS = {"visible_passed": 2, "visible_total": 2, "hidden_passed": 4, "hidden_total": 5}
+
+
+async def timed(latencies: Dict[str, List[float]], name: str, coro):
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        latencies[name].append(time.perf_counter() - start)
+
+
+async def run_session(index: int, client: SciboxClient, search: EmbeddingSearch, latencies, errors) -> None:
+    """One candidate going through a task"""
+    generator = TaskGenerator(client)
+    evaluator = SolutionEvaluator(client)
+    anti_cheat = AntiCheatLLM(client)
+    dialogue = AIDialogue(client)
+
+    try:
+        task = await timed(latencies, "generate_task", generator.generate_task("middle", "algorithms"))
+
+        async def chat():
+            async for _ in dialogue.send_message(f"Session {index}: can I sort first?", {"task": task}):
+                pass
+
+        await timed(latencies, "dialogue_stream", chat())
+
+        code = SAMPLE_CODE + f"\n# session {index}\n"
+        await asyncio.gather(
+            timed(latencies, "evaluate_solution",
+                  evaluator.evaluate_solution(task, code, TEST_RESULTS, 12.5)),
+            timed(latencies, "check_originality", anti_cheat.check_code_originality(code)),
+            timed(latencies, "find_similar", search.find_similar(code, threshold=0.5))
+        )
+    except Exception as e:
+        errors[type(e).__name__] += 1
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Scibox services load benchmark (offline)")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--config", help="Stand-in JSON config with per-model profiles")
+    parser.add_argument("--recording", help="Recorded responses to replay")
+    parser.add_argument("--production-quotas", action="store_true",
+                        help="Use the client's real MODEL_QUOTAS (slow: minutes per few calls)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    standin = SciboxStandin(models=config.get("models"), recording=Recording(args.recording), seed=args.seed)
+    base_url = await standin.start(port=0)
+
+    limits = MODEL_QUOTAS if args.production_quotas else {model: 10 ** 6 for model in MODEL_QUOTAS}
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+
+    try:
+        async with SciboxClient("offline", base_url=base_url, rate_limiter=RateLimiter(limits)) as client:
+            search = EmbeddingSearch(client)
+            await search.add_known_solutions([
+                {"code": SAMPLE_CODE, "metadata": {"source": "leetcode"}},
+                {"code": "print('hello')", "metadata": {"source": "github"}}
+            ])
+
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                run_session(i, client, search, latencies, errors) for i in range(args.sessions)
+            ))
+            elapsed = time.perf_counter() - start
+
+            print("\n" + "=" * 60)
+            print(f"SERVICES LOAD ({args.sessions} sessions, {elapsed:.2f}s, "
+                  f"{args.sessions / elapsed:.1f} sessions/s)")
+            print("=" * 60)
+            print(f"{'operation':>18} {'n':>5} {'p50':>8} {'p95':>8} {'max':>8}")
+            for name, values in latencies.items():
+                print(f"{name:>18} {len(values):>5} {statistics.median(values):>7.3f}s "
+                      f"{percentile(values, 0.95):>7.3f}s {max(values):>7.3f}s")
+            if errors:
+                print(f"Errors: {dict(errors)}")
+
+            print("\nClient:")
+            print(f"  coalescing:  {client.get_coalesce_stats()}")
+            if client.embedding_batcher:
+                print(f"  batching:    {client.embedding_batcher.get_stats()}")
+            print(f"  retries:     {json.dumps(client.get_retry_stats())}")
+            print(f"  early stop:  {json.dumps(client.early_stop_stats.get_stats())}")
+            print(f"\nStand-in: {json.dumps(standin.stats, indent=2)}")
+    finally:
+        await standin.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -14,7 +14,7 @@ os.chdir(os.path.dirname(os.path.abspath(__file__)))
 from app.db.session import engine
 from app.db.models.base import Base
 # Import all models to register them
-from app.db.models import interview, task, solution, metric, chat_message, embedding
+from app.db.models import interview, task, solution, metric, chat_message, embedding, task_fingerprint
 
 
 async def init_db():
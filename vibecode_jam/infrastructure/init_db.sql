@@ -19,13 +19,15 @@ CREATE TABLE IF NOT EXISTS interviews (
 -- Table: tasks
 CREATE TABLE IF NOT EXISTS tasks (
     id SERIAL PRIMARY KEY,
-    interview_id INTEGER NOT NULL REFERENCES interviews(id) ON DELETE CASCADE,
+    interview_id INTEGER REFERENCES interviews(id) ON DELETE CASCADE,
+    source_task_id INTEGER REFERENCES tasks(id) ON DELETE SET NULL,
     title VARCHAR(255) NOT NULL,
     description TEXT,
     level VARCHAR(50),
     domain VARCHAR(100),
     task_data JSONB DEFAULT '{}',
     times_used INTEGER DEFAULT 0,
+    last_used_at TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -74,13 +76,38 @@ CREATE TABLE IF NOT EXISTS embeddings (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Table: task_fingerprints (near-duplicate index of generated tasks)
+CREATE TABLE IF NOT EXISTS task_fingerprints (
+    id SERIAL PRIMARY KEY,
+    task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+    domain VARCHAR(100) NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    minhash BYTEA NOT NULL,
+    embedding BYTEA,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Task bank columns for databases created before the bank existed
+ALTER TABLE tasks ALTER COLUMN interview_id DROP NOT NULL;
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS source_task_id INTEGER REFERENCES tasks(id) ON DELETE SET NULL;
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS last_used_at TIMESTAMP;
+
+-- Fingerprints written before registration waited for the stored task;
+-- stored tasks without a fingerprint are backfilled when the index loads
+DELETE FROM task_fingerprints WHERE task_id IS NULL;
+ALTER TABLE task_fingerprints ALTER COLUMN task_id SET NOT NULL;
+
 -- Create indexes for better query performance
 CREATE INDEX IF NOT EXISTS idx_interviews_candidate_email ON interviews(candidate_email);
 CREATE INDEX IF NOT EXISTS idx_interviews_status ON interviews(status);
 CREATE INDEX IF NOT EXISTS idx_tasks_interview_id ON tasks(interview_id);
+DROP INDEX IF EXISTS idx_tasks_bank;
+CREATE INDEX IF NOT EXISTS idx_tasks_bank_sources ON tasks(level, domain, times_used, last_used_at)
+    WHERE source_task_id IS NULL AND interview_id IS NULL;
 CREATE INDEX IF NOT EXISTS idx_solutions_interview_id ON solutions(interview_id);
 CREATE INDEX IF NOT EXISTS idx_solutions_task_id ON solutions(task_id);
 CREATE INDEX IF NOT EXISTS idx_chat_messages_interview_id ON chat_messages(interview_id);
 CREATE INDEX IF NOT EXISTS idx_metrics_interview_id ON metrics(interview_id);
 CREATE INDEX IF NOT EXISTS idx_metrics_solution_id ON metrics(solution_id);
 CREATE INDEX IF NOT EXISTS idx_embeddings_solution_id ON embeddings(solution_id);
+CREATE INDEX IF NOT EXISTS idx_task_fingerprints_task_id ON task_fingerprints(task_id);
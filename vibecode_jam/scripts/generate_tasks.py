@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Bulk offline task generation into the task bank
+Run from the vibecode_jam directory:
+    python scripts/generate_tasks.py --per-pair 200 [--checkpoint generate_tasks.json]
+
+Generates tasks for every (level, domain) concurrently through TaskGenerator
+at background priority, as fast as the model quota allows (the client's
+rate limiter paces requests; with LLM_RATE_LIMIT_BACKEND=redis the quota is
+shared with the running app, which keeps precedence). Tasks that repeat an
+existing title or description of the same domain are rejected, and near
+duplicates are caught by the task dedup index (regenerated up to
+TASK_DEDUP_MAX_REGENERATIONS times before being rejected). Accepted tasks
+are inserted as bank tasks in batches; the checkpoint records what was
+committed, so an interrupted run resumes where it stopped.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import redis.asyncio as aioredis
+from sqlalchemy import insert, select
+
+from app.config import settings
+from app.db import AsyncSessionLocal
+from app.db.models import Task
+from app.services.scibox import (
+    SciboxClient, TaskGenerator, TaskDedupIndex, Priority, CircuitOpenError, DuplicateTaskError
+)
+from app.services.scibox.client import MODEL_QUOTAS
+from app.services.scibox.distributed_limiter import DistributedRateLimiter
+from app.services.scibox.retry import RetryPolicy
+
+logger = logging.getLogger("generate_tasks")
+
+TASK_MODEL = "qwen3-32b-awq"
+
+# Existing titles shown to the model per call; a random sample also keeps
+# concurrent prompts from steering the model toward the same task
+AVOID_SAMPLE = 15
+
+Pair = Tuple[str, str]
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(re.sub(r"[^\w\s]", " ", (text or "").lower()).split())
+
+
+def fingerprints(domain: str, title: str, description: str) -> List[str]:
+    """Keys under which a task counts as a duplicate within its domain"""
+    keys = [f"{domain}:title:{normalize(title)}"]
+    if description:
+        digest = hashlib.sha1(normalize(description).encode()).hexdigest()
+        keys.append(f"{domain}:description:{digest}")
+    return keys
+
+
+class Checkpoint:
+    """Committed task counts per (level, domain), saved atomically to JSON"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = Path(path) if path else None
+        self.committed: Dict[str, int] = {}
+        if self.path and self.path.exists():
+            self.committed = json.loads(self.path.read_text()).get("committed", {})
+
+    def get(self, pair: Pair) -> int:
+        return self.committed.get("/".join(pair), 0)
+
+    def add(self, pair: Pair, count: int) -> None:
+        name = "/".join(pair)
+        self.committed[name] = self.committed.get(name, 0) + count
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"committed": self.committed, "saved_at": time.time()}, indent=2))
+        os.replace(tmp, self.path)
+
+
+class BulkGenerator:
+    """Concurrent generation workers feeding batched bank inserts"""
+
+    def __init__(
+        self,
+        generator: TaskGenerator,
+        session_factory,
+        pairs: List[Pair],
+        per_pair: int,
+        checkpoint: Checkpoint,
+        concurrency: int,
+        batch_size: int,
+        max_attempts_factor: float
+    ):
+        self.generator = generator
+        self.session_factory = session_factory
+        self.checkpoint = checkpoint
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+
+        self.wanted = {pair: max(0, per_pair - checkpoint.get(pair)) for pair in pairs}
+        self.accepted = Counter()
+        self.in_flight = Counter()
+        self.attempts = Counter()
+        self.max_attempts = {pair: int(n * max_attempts_factor) + 1 for pair, n in self.wanted.items()}
+
+        self.seen: Set[str] = set()
+        self.titles: Dict[str, List[str]] = {}
+        self.batch: List[Tuple[Pair, Dict]] = []
+        self.flush_lock = asyncio.Lock()
+        self.rejected = Counter()
+        self.inserted = 0
+        self.started = time.monotonic()
+
+    async def load_existing(self) -> int:
+        """Fingerprint the tasks already stored for the selected domains"""
+        domains = {domain for _, domain in self.wanted}
+        async with self.session_factory() as session:
+            rows = (await session.execute(
+                select(Task.domain, Task.title, Task.description).where(Task.domain.in_(domains))
+            )).all()
+        for domain, title, description in rows:
+            self.seen.update(fingerprints(domain, title, description))
+            self.titles.setdefault(domain, []).append(title)
+        return len(rows)
+
+    def _next_pair(self) -> Optional[Pair]:
+        """Pair furthest from its target that still has attempts left"""
+        best, best_missing = None, 0
+        for pair, wanted in self.wanted.items():
+            missing = wanted - self.accepted[pair] - self.in_flight[pair]
+            if missing > best_missing and self.attempts[pair] < self.max_attempts[pair]:
+                best, best_missing = pair, missing
+        return best
+
+    def _check(self, pair: Pair, task: Dict) -> Optional[str]:
+        """Rejection reason, or None if the task is accepted"""
+        if not task.get("title") or not task.get("description") or not task.get("examples"):
+            return "invalid"
+        keys = fingerprints(pair[1], task["title"], task["description"])
+        if any(key in self.seen for key in keys):
+            return "duplicate"
+        self.seen.update(keys)
+        self.titles.setdefault(pair[1], []).append(task["title"])
+        return None
+
+    def _release(self, pair: Pair, task: Dict) -> None:
+        """Drop the dedup reservation of a task that will not be inserted"""
+        if self.generator.dedup is not None:
+            self.generator.dedup.release(pair[1], task)
+
+    async def _worker(self) -> None:
+        while True:
+            pair = self._next_pair()
+            if pair is None:
+                return
+
+            titles = self.titles.get(pair[1], [])
+            avoid = random.sample(titles, min(AVOID_SAMPLE, len(titles)))
+
+            self.in_flight[pair] += 1
+            self.attempts[pair] += 1
+            try:
+                task = await self.generator.generate_task(
+                    *pair, priority=Priority.BACKGROUND, allow_fallback=False, avoid_titles=avoid
+                )
+            except CircuitOpenError as e:
+                # Model is down: give the attempt back and wait for the probe window
+                self.attempts[pair] -= 1
+                self.rejected["circuit_open"] += 1
+                logger.warning(f"{e}; pausing")
+                await asyncio.sleep(e.retry_in)
+                continue
+            except DuplicateTaskError:
+                self.rejected["near_duplicate"] += 1
+                continue
+            except Exception as e:
+                self.rejected["error"] += 1
+                logger.warning(f"Generation failed ({'/'.join(pair)}): {e}")
+                continue
+            finally:
+                self.in_flight[pair] -= 1
+
+            reason = self._check(pair, task)
+            if reason:
+                self.rejected[reason] += 1
+                self._release(pair, task)
+                continue
+
+            self.accepted[pair] += 1
+            self.batch.append((pair, task))
+            if len(self.batch) >= self.batch_size:
+                await self.flush()
+
+    async def flush(self) -> None:
+        """Insert buffered tasks in one statement and advance the checkpoint"""
+        async with self.flush_lock:
+            batch, self.batch = self.batch, []
+            if not batch:
+                return
+
+            rows = [
+                {
+                    "interview_id": None,
+                    "title": task["title"][:255],
+                    "description": task["description"],
+                    "level": level,
+                    "domain": domain,
+                    "task_data": task,
+                    "times_used": 0
+                }
+                for (level, domain), task in batch
+            ]
+            try:
+                async with self.session_factory() as session:
+                    ids = (await session.execute(
+                        insert(Task).returning(Task.id, sort_by_parameter_order=True), rows
+                    )).scalars().all()
+                    await session.commit()
+            except Exception:
+                for pair, task in batch:
+                    self._release(pair, task)
+                raise
+
+            if self.generator.dedup is not None:
+                for ((_, domain), task), task_id in zip(batch, ids):
+                    await self.generator.dedup.register(domain, task, task_id)
+
+            for pair, _ in batch:
+                self.checkpoint.add(pair, 1)
+            self.checkpoint.save()
+            self.inserted += len(batch)
+
+    async def report(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            print(self.progress(), flush=True)
+
+    def progress(self) -> str:
+        elapsed = time.monotonic() - self.started
+        accepted = sum(self.accepted.values())
+        attempts = sum(self.attempts.values())
+        return (
+            f"[{elapsed:7.0f}s] accepted {accepted}/{sum(self.wanted.values())} "
+            f"({accepted / elapsed * 60:.1f}/min), inserted {self.inserted}, "
+            f"attempts {attempts}, rejected {dict(self.rejected)}"
+        )
+
+    async def run(self, report_interval: float) -> None:
+        reporter = asyncio.create_task(self.report(report_interval))
+        try:
+            await asyncio.gather(*(self._worker() for _ in range(self.concurrency)))
+        finally:
+            reporter.cancel()
+            await self.flush()
+
+    def summary(self, client: SciboxClient) -> str:
+        elapsed = time.monotonic() - self.started
+        attempts = sum(self.attempts.values())
+        accepted = sum(self.accepted.values())
+        rejected = sum(n for reason, n in self.rejected.items() if reason != "circuit_open")
+        limiter = client.rate_limiter.get_stats().get(TASK_MODEL, {})
+
+        lines = [
+            "=" * 60,
+            "BULK TASK GENERATION",
+            "=" * 60,
+            f"elapsed:          {elapsed:.1f}s",
+            f"accepted:         {accepted} ({accepted / elapsed * 60:.2f}/min)",
+            f"inserted:         {self.inserted}",
+            f"LLM attempts:     {attempts} ({attempts / elapsed * 60:.2f}/min)",
+            f"rejected:         {rejected} ({rejected / attempts:.1%} of attempts)" if attempts else "rejected:         0",
+            f"  by reason:      {dict(self.rejected)}",
+            f"quota waits:      {limiter}",
+            "per pair (accepted this run / committed total):"
+        ]
+        for pair in self.wanted:
+            lines.append(f"  {'/'.join(pair):>20}: {self.accepted[pair]} / {self.checkpoint.get(pair)}")
+        return "\n".join(lines)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Fill the task bank with generated tasks")
+    parser.add_argument("--per-pair", type=int, default=100, help="Tasks wanted per (level, domain)")
+    parser.add_argument("--levels", nargs="+", default=settings.TASK_POOL_LEVELS)
+    parser.add_argument("--domains", nargs="+", default=settings.TASK_POOL_DOMAINS)
+    parser.add_argument("--concurrency", type=int,
+                        help="Generation workers (default: twice the model's per-minute quota)")
+    parser.add_argument("--batch-size", type=int, default=20, help="Tasks per INSERT")
+    parser.add_argument("--checkpoint", default="generate_tasks.checkpoint.json")
+    parser.add_argument("--max-attempts-factor", type=float, default=3.0,
+                        help="Give up on a pair after this many attempts per wanted task")
+    parser.add_argument("--report-interval", type=float, default=60.0, help="Seconds between progress lines")
+    parser.add_argument("--base-url", default=os.getenv("SCIBOX_BASE_URL", "https://api.scibox.ai/v1"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    if AsyncSessionLocal is None:
+        sys.exit("A real database is required (unset USE_MOCK_DB and set DATABASE_URL)")
+
+    api_key = os.getenv("SCIBOX_API_KEY")
+    if not api_key:
+        sys.exit("SCIBOX_API_KEY is not set")
+
+    quota_redis = None
+    rate_limiter = None
+    if settings.LLM_RATE_LIMIT_BACKEND == "redis":
+        quota_redis = aioredis.from_url(os.getenv("REDIS_URL", settings.REDIS_URL))
+        rate_limiter = DistributedRateLimiter(
+            quota_redis,
+            MODEL_QUOTAS,
+            lease_size=settings.LLM_RATE_LIMIT_LEASE_SIZE,
+            lease_ttl=settings.LLM_RATE_LIMIT_LEASE_TTL
+        )
+
+    checkpoint = Checkpoint(args.checkpoint)
+    pairs = [(level, domain) for level in args.levels for domain in args.domains]
+    concurrency = args.concurrency or max(1, 2 * MODEL_QUOTAS[TASK_MODEL])
+
+    client = SciboxClient(
+        api_key=api_key,
+        base_url=args.base_url,
+        rate_limiter=rate_limiter,
+        retry_policy=RetryPolicy(
+            max_attempts=settings.LLM_RETRY_MAX_ATTEMPTS,
+            base_delay=settings.LLM_RETRY_BASE_DELAY,
+            deadline=settings.LLM_RETRY_DEADLINE
+        ),
+        breaker_options={
+            "failure_threshold": settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            "slow_call_seconds": settings.LLM_BREAKER_SLOW_CALL_SECONDS,
+            "open_seconds": settings.LLM_BREAKER_OPEN_SECONDS
+        },
+        early_stop=settings.LLM_EARLY_STOP_ENABLED,
+        early_stop_baseline_rate=settings.LLM_EARLY_STOP_BASELINE_RATE
+    )
+
+    async with client:
+        dedup = None
+        if settings.TASK_DEDUP_ENABLED:
+            dedup = TaskDedupIndex(
+                client,
+                session_factory=AsyncSessionLocal,
+                embedding_threshold=settings.TASK_DEDUP_EMBEDDING_THRESHOLD,
+                minhash_threshold=settings.TASK_DEDUP_MINHASH_THRESHOLD,
+                reservation_ttl=settings.TASK_DEDUP_RESERVATION_TTL
+            )
+            await dedup.load()
+
+        bulk = BulkGenerator(
+            TaskGenerator(client, dedup=dedup, max_regenerations=settings.TASK_DEDUP_MAX_REGENERATIONS),
+            AsyncSessionLocal,
+            pairs,
+            per_pair=args.per_pair,
+            checkpoint=checkpoint,
+            concurrency=concurrency,
+            batch_size=args.batch_size,
+            max_attempts_factor=args.max_attempts_factor
+        )
+        existing = await bulk.load_existing()
+        print(f"{existing} stored tasks fingerprinted; generating {sum(bulk.wanted.values())} tasks "
+              f"for {len(pairs)} pairs with {concurrency} workers", flush=True)
+
+        try:
+            await bulk.run(args.report_interval)
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            print("Interrupted; committed tasks are checkpointed", flush=True)
+        finally:
+            print(bulk.summary(client))
+
+    if quota_redis is not None:
+        await quota_redis.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
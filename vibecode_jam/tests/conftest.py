@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Service modules import the backend as the top-level "app" package
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+if str(BACKEND) not in sys.path:
+    sys.path.insert(0, str(BACKEND))
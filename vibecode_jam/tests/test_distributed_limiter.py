@@ -0,0 +1,104 @@
+import asyncio
+import inspect
+
+import fakeredis
+import pytest
+from fakeredis import aioredis
+
+from app.services.scibox.client import RateLimiter
+from app.services.scibox.distributed_limiter import DistributedRateLimiter
+
+MODEL = "qwen3-32b-awq"
+
+
+def limiters(count, limit, lease_size=0, server=None):
+    """Limiters of separate workers sharing one Redis server"""
+    server = server or fakeredis.FakeServer()
+    return [
+        DistributedRateLimiter(aioredis.FakeRedis(server=server), {MODEL: limit}, lease_size=lease_size, lease_ttl=30.0)
+        for _ in range(count)
+    ]
+
+
+class BrokenRedis:
+    """Redis client whose scripts always fail"""
+
+    def register_script(self, script):
+        async def run(keys, args):
+            raise ConnectionError("redis down")
+        return run
+
+
+def test_try_acquire_has_the_same_signature():
+    for limiter in (RateLimiter, DistributedRateLimiter):
+        assert inspect.iscoroutinefunction(limiter.try_acquire)
+        assert inspect.iscoroutinefunction(limiter.acquire)
+    assert (
+        inspect.signature(RateLimiter.try_acquire) == inspect.signature(DistributedRateLimiter.try_acquire)
+    )
+
+
+def test_instances_share_one_quota():
+    async def main():
+        workers = limiters(3, limit=5)
+        granted = [0, 0, 0]
+        for _ in range(4):
+            for i, worker in enumerate(workers):
+                granted[i] += await worker.try_acquire(MODEL)
+        return workers, granted
+
+    workers, granted = asyncio.run(main())
+    assert sum(granted) == 5
+    assert granted == [2, 2, 1]
+    assert sum(worker.stats[MODEL]["redis_calls"] for worker in workers) == 12
+
+
+def test_concurrent_acquires_never_overshoot_with_leases():
+    async def main():
+        workers = limiters(3, limit=8, lease_size=4)
+        results = await asyncio.gather(
+            *(worker.try_acquire(MODEL) for _ in range(6) for worker in workers)
+        )
+        # Leases granted to the first calls are used by later ones
+        for worker in workers:
+            results.extend([await worker.try_acquire(MODEL) for _ in range(3)])
+        return workers, results
+
+    workers, results = asyncio.run(main())
+    assert sum(results) == 8
+    assert sum(worker.stats[MODEL]["lease_hits"] for worker in workers) > 0
+    assert sum(worker.stats[MODEL]["granted"] for worker in workers) == 8
+
+
+def test_acquire_times_out_without_taking_a_slot():
+    async def main():
+        workers = limiters(3, limit=2)
+        await workers[0].acquire(MODEL)
+        await workers[1].acquire(MODEL)
+        with pytest.raises(asyncio.TimeoutError):
+            await workers[2].acquire(MODEL, timeout=1.0)
+        return workers, await workers[2].redis.zcard(workers[2]._key(MODEL))
+
+    workers, reserved = asyncio.run(main())
+    assert reserved == 2
+    assert workers[2].stats[MODEL]["timeouts"] == 1
+
+
+def test_unknown_model_is_not_limited():
+    async def main():
+        worker = limiters(1, limit=1)[0]
+        return [await worker.try_acquire("other-model") for _ in range(3)]
+
+    assert asyncio.run(main()) == [True, True, True]
+
+
+def test_falls_back_to_local_limits_without_redis():
+    async def main():
+        worker = DistributedRateLimiter(BrokenRedis(), {MODEL: 2})
+        results = [await worker.try_acquire(MODEL) for _ in range(3)]
+        return worker, results
+
+    worker, results = asyncio.run(main())
+    assert results == [True, True, False]
+    assert worker.stats[MODEL]["fallbacks"] == 3
+    assert worker.get_stats()[MODEL]["backend"] == "local_fallback"
@@ -0,0 +1,163 @@
+import asyncio
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from app.services import test_harness
+from app.services.test_harness import (
+    build_program, collect_cases, decode_value, format_passed, matches, parse_report, render_value, run_tests
+)
+
+TWO_SUM = {
+    "examples": [
+        {"input": "[2,7,11,15], target=9", "output": "[0,1]", "explanation": "2 + 7 = 9"},
+        {"input": "[3,2,4], target=6", "output": "[1,2]"}
+    ],
+    "hidden_tests": [
+        {"input": "nums = [3,3], target = 6", "output": "[0, 1]"},
+        {"input": "[1,2], 5", "output": "SECRET_EXPECTED []"},
+        {"input": "no output"}
+    ]
+}
+
+
+class SubprocessRunner:
+    """Runs driver programs with the local interpreters instead of a sandbox"""
+
+    async def run(self, program, language):
+        command = [sys.executable, "-c", program] if language == "python" else ["node", "-e", program]
+        done = subprocess.run(command, capture_output=True, text=True, timeout=30)
+        return {"stdout": done.stdout, "stderr": done.stderr, "tests_passed": 0}
+
+
+def test_collect_cases():
+    cases = collect_cases(TWO_SUM)
+    assert [c["hidden"] for c in cases] == [False, False, True, True]
+    assert cases[0] == {"input": "[2,7,11,15], target=9", "output": "[0,1]", "hidden": False}
+    assert collect_cases({"examples": [{"input": 3, "output": 9}], "hidden_tests": None}) == [
+        {"input": "3", "output": "9", "hidden": False}
+    ]
+    assert collect_cases({}) == []
+
+
+@pytest.mark.parametrize("language", ["python", "javascript"])
+def test_program_contains_inputs_only(language):
+    program = build_program("def f(x): return x", language, collect_cases(TWO_SUM), "__M__")
+    assert "target = 6" in program
+    assert "SECRET_EXPECTED" not in program
+
+
+def test_parse_report():
+    marker = "__TEST_REPORT_abc__"
+    report = '{"entry": "f", "load_error": null, "cases": [{"time_ms": 1, "error": null, "value": 3}]}'
+    assert parse_report(f"noise\n{marker}\n{report}\n", marker)["entry"] == "f"
+    # A report printed by the solution before the driver's does not win
+    forged = '{"entry": "forged", "cases": []}'
+    assert parse_report(f"{marker}\n{forged}\n{marker}\n{report}\n", marker)["entry"] == "f"
+    assert parse_report("no report", marker) is None
+    assert parse_report(f"{marker}\nnot json\n", marker) is None
+    assert parse_report(f"{marker}\n[1, 2]\n", marker) is None
+
+
+@pytest.mark.parametrize("actual, expected", [
+    ([0, 1], "[0,1]"),
+    ([0, 1], "[0, 1] (2 + 7 = 9)"),
+    (3, "3 (abc)"),
+    (0.1 + 0.2, "0.3"),
+    (True, "true"),
+    (None, "null"),
+    ("hello world", "hello world"),
+    ("[0, 1]\n", "[0,1]"),
+    ("3\n", "3"),
+    ({"a": 1}, "{a: 1}"),
+    ({"a": [1, 2]}, '{"a": [1, 2]}'),
+    ({1, 2}, "[2, 1]"),
+    ((1, 2), "(1, 2)"),
+])
+def test_matches(actual, expected):
+    assert matches(actual, expected)
+
+
+@pytest.mark.parametrize("actual, expected", [
+    ([1, 0], "[0,1]"),
+    (1, "true"),
+    (True, "1"),
+    ("4", "3"),
+    ({"a": 2}, "{a: 1}"),
+    (None, "0"),
+])
+def test_does_not_match(actual, expected):
+    assert not matches(actual, expected)
+
+
+def test_decode_value():
+    assert decode_value([1, {"__set__": [[1, 2]]}]) == [1, {(1, 2)}]
+    assert decode_value({"__dict__": [[1, "a"], ["b", {"__int__": "12345678901234567890"}]]}) == {
+        1: "a", "b": 12345678901234567890
+    }
+    assert decode_value({"__float__": "Infinity"}) == float("inf")
+    point = decode_value({"__repr__": "Point(1, 2)"})
+    assert render_value(point) == "Point(1, 2)"
+    assert matches(point, "Point(1, 2)") and not matches(point, "[1, 2]")
+
+
+def test_judge_hides_hidden_actuals():
+    visible = {"input": "1", "output": "2", "hidden": False}
+    hidden = {"input": "1", "output": "2", "hidden": True}
+    assert test_harness._judge(visible, {"time_ms": 1.5, "error": None, "value": 2}) == {
+        "passed": True, "time_ms": 1.5, "error": None, "actual": "2"
+    }
+    assert "actual" not in test_harness._judge(hidden, {"time_ms": 1.5, "error": None, "value": 3})
+    assert test_harness._judge(hidden, "garbage")["error"] == "Malformed test report"
+    assert test_harness._judge(hidden, {"time_ms": 0, "error": "ValueError: x"})["error"] == "ValueError: x"
+
+
+PYTHON_SOLUTIONS = {
+    "def two_sum(nums, target):\n"
+    "    seen = {}\n"
+    "    for i, v in enumerate(nums):\n"
+    "        if target - v in seen:\n"
+    "            return (seen[target - v], i)\n"
+    "        seen[v] = i\n"
+    "    return []\n": "3/4",
+    "import atexit, sys\n"
+    "def f(nums, target):\n"
+    "    atexit.register(lambda: print('forged'))\n"
+    "    return [0, 1]\n": "2/4",
+    "import sys\n"
+    "print('[0, 1]' if '9' in sys.stdin.read() else '[1, 2]')\n": "2/4",
+}
+
+
+@pytest.mark.parametrize("code, passed", PYTHON_SOLUTIONS.items())
+def test_run_tests_python(code, passed):
+    task = {**TWO_SUM, "hidden_tests": TWO_SUM["hidden_tests"][:2]}
+    results = asyncio.run(run_tests(task, code, "python", SubprocessRunner()))
+    assert format_passed(results) == passed
+    assert results["cases"][0]["actual"] is not None
+    assert "actual" not in results["cases"][-1]
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_run_tests_javascript():
+    task = {**TWO_SUM, "hidden_tests": TWO_SUM["hidden_tests"][:2]}
+    code = (
+        "function twoSum(nums, target) {\n"
+        "  const seen = new Map();\n"
+        "  for (let i = 0; i < nums.length; i++) {\n"
+        "    if (seen.has(target - nums[i])) return [seen.get(target - nums[i]), i];\n"
+        "    seen.set(nums[i], i);\n"
+        "  }\n"
+        "  return new Set();\n"
+        "}\n"
+    )
+    results = asyncio.run(run_tests(task, code, "javascript", SubprocessRunner()))
+    assert format_passed(results) == "3/4"
+    assert results["entry"] == "twoSum"
+
+
+def test_run_tests_without_cases():
+    results = asyncio.run(run_tests({}, "x = 1", "python", SubprocessRunner()))
+    assert format_passed(results) == "0/0"
@@ -0,0 +1,165 @@
+import errno
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+from app.services.namespace_sandbox import LAUNCHER, NamespaceSandbox, parse_size
+from app.services.sandbox_init import (
+    CLONE_NEWNET,
+    CLONE_NEWUSER,
+    SECCOMP_ARCHES,
+    SECCOMP_RET_ALLOW,
+    SECCOMP_RET_ERRNO,
+    SECCOMP_RET_KILL_PROCESS,
+    SETUP_FAILED,
+    format_config,
+    parse_config,
+    seccomp_program,
+)
+
+CONFIG = {
+    "cgroup": None,
+    "user_namespace": False,
+    "hide_paths": ["/app", "/root", "/run/secrets"],
+    "scratch_size": "16m",
+    "mem_limit": 128 << 20,
+    "nproc": None,
+    "cpu_seconds": 10,
+    "fsize": 16 << 20,
+    "setuid": True,
+    "seccomp": True
+}
+
+
+def run_filter(program, arch, nr, arg0=0):
+    """Evaluate a seccomp BPF program on one syscall"""
+    audit_arch = SECCOMP_ARCHES[arch][0] if arch in SECCOMP_ARCHES else arch
+    words = {0: nr, 4: audit_arch, 16: arg0 & 0xFFFFFFFF}
+    acc = pc = 0
+    while True:
+        rule = program.filter[pc]
+        if rule.code == 0x20:
+            acc = words[rule.k]
+        elif rule.code == 0x06:
+            return rule.k
+        else:
+            taken = {0x15: acc == rule.k, 0x35: acc >= rule.k, 0x45: bool(acc & rule.k)}[rule.code]
+            pc += rule.jt if taken else rule.jf
+        pc += 1
+
+
+@pytest.mark.parametrize("size, expected", [
+    ("128m", 128 << 20), ("1g", 1 << 30), ("512k", 512 << 10), ("1.5m", 3 << 19), (" 64M ", 64 << 20), ("4096", 4096),
+])
+def test_parse_size(size, expected):
+    assert parse_size(size) == expected
+
+
+def test_config_round_trip():
+    args = format_config(CONFIG)
+    assert args.count("hide_paths=/root") == 1
+    assert "cgroup=" in args and "setuid=1" in args and "user_namespace=0" in args
+    assert parse_config(args) == CONFIG
+
+    config = dict(CONFIG, cgroup="/sys/fs/cgroup/run-1", hide_paths=[], mem_limit=None, nproc=512)
+    assert parse_config(format_config(config)) == config
+
+
+@pytest.mark.parametrize("arch", sorted(SECCOMP_ARCHES))
+def test_seccomp_program_shape(arch):
+    program = seccomp_program(arch)
+    denied = SECCOMP_ARCHES[arch][3]
+    assert program.len == 12 + 1 + 2 * len(denied) + 1
+    last = program.filter[program.len - 1]
+    assert (last.code, last.k) == (0x06, SECCOMP_RET_ALLOW)
+    assert seccomp_program("sparc") is None
+
+
+@pytest.mark.parametrize("arch", sorted(SECCOMP_ARCHES))
+def test_seccomp_program_decisions(arch):
+    program = seccomp_program(arch)
+    _, clone_nr, clone3_nr, denied = SECCOMP_ARCHES[arch]
+    eperm = SECCOMP_RET_ERRNO | errno.EPERM
+
+    for nr in denied:
+        assert run_filter(program, arch, nr) == eperm
+    for nr in (0, 1, 3, 60, 231):
+        if nr not in denied:
+            assert run_filter(program, arch, nr) == SECCOMP_RET_ALLOW
+
+    assert run_filter(program, arch, clone_nr, arg0=0x11) == SECCOMP_RET_ALLOW  # fork
+    assert run_filter(program, arch, clone_nr, arg0=CLONE_NEWUSER) == eperm
+    assert run_filter(program, arch, clone_nr, arg0=CLONE_NEWNET | 0x11) == eperm
+    assert run_filter(program, arch, clone3_nr) == SECCOMP_RET_ERRNO | errno.ENOSYS
+    assert run_filter(program, arch, 0x40000000 | 1) == SECCOMP_RET_KILL_PROCESS  # x32
+    assert run_filter(program, arch, 0, arg0=0) == SECCOMP_RET_ALLOW
+    assert run_filter(program, 0x40000003, 0) == SECCOMP_RET_KILL_PROCESS  # foreign arch
+
+
+def test_launcher_reports_setup_failures():
+    usage = subprocess.run([sys.executable, "-I", "-S", LAUNCHER, "seccomp=0"], capture_output=True)
+    assert usage.returncode == SETUP_FAILED
+    assert b"usage" in usage.stderr
+
+    config = format_config(dict(CONFIG, cgroup="/nonexistent/cgroup"))
+    failed = subprocess.run([sys.executable, "-I", "-S", LAUNCHER, *config, "--", "true"], capture_output=True)
+    assert failed.returncode == SETUP_FAILED
+    assert b"sandbox setup failed" in failed.stderr
+
+
+def test_oom_in_cgroup_reports_137(monkeypatch):
+    sandbox = NamespaceSandbox({"shell": "sh"})
+    sandbox.languages = {"shell": "sh"}
+    sandbox._use_cgroup = True
+    monkeypatch.setattr(sandbox, "_create_cgroup", lambda: "/sys/fs/cgroup/run-test")
+    monkeypatch.setattr(sandbox, "_remove_cgroup", lambda group: True)
+    monkeypatch.setattr(sandbox, "_execute", lambda command, group: (0, "", ""))
+
+    assert sandbox.run("shell", ["true"]) == (137, "", "")
+    assert sandbox.get_stats()["shell"]["violations"] == 1
+
+
+@pytest.fixture(scope="module")
+def sandbox():
+    sandbox = NamespaceSandbox({"shell": "bash"}, wall_timeout=5.0)
+    try:
+        sandbox.start()
+    except RuntimeError as e:
+        pytest.skip(f"namespace sandbox not permitted here: {e}")
+    return sandbox
+
+
+def test_sandbox_runs_true(sandbox):
+    assert sandbox.run("shell", ["true"]) == (0, "", "")
+
+
+def test_sandbox_has_no_network(sandbox):
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    port = server.getsockname()[1]
+    try:
+        exit_code, _, stderr = sandbox.run("shell", ["bash", "-c", f"echo hi > /dev/tcp/127.0.0.1/{port}"])
+    finally:
+        server.close()
+    assert exit_code != 0
+    assert "Network is unreachable" in stderr or "Connection refused" in stderr
+
+
+def test_sandbox_root_is_read_only(sandbox):
+    name = f"/sandbox-write-test-{os.getpid()}"
+    exit_code, _, stderr = sandbox.run("shell", ["bash", "-c", f"echo x > {name}"])
+    assert exit_code != 0
+    assert "Read-only file system" in stderr or "Permission denied" in stderr
+    assert not os.path.exists(name)
+
+
+def test_sandbox_reports_signal_deaths(sandbox):
+    # The command is PID 1 of its namespace and ignores signals sent from
+    # inside it, so let the kernel kill it (CPU hard limit: SIGKILL)
+    script = 'ulimit -t 1; exec bash -c "while :; do :; done"'
+    assert sandbox.run("shell", ["bash", "-c", script])[0] == 128 + 9
+    assert sandbox.run("shell", ["no-such-command"])[0] == 127
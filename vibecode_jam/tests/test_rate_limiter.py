@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.scibox.client import RateLimiter
+
+MODEL = "qwen3-32b-awq"
+WINDOW = 0.3
+
+
+def test_try_acquire_never_waits():
+    async def main():
+        limiter = RateLimiter({MODEL: 2}, window=WINDOW)
+        started = time.monotonic()
+        first = [await limiter.try_acquire(MODEL) for _ in range(3)]
+        elapsed = time.monotonic() - started
+        await asyncio.sleep(WINDOW)
+        return limiter, first, elapsed, await limiter.try_acquire(MODEL)
+
+    limiter, first, elapsed, after_window = asyncio.run(main())
+    assert first == [True, True, False]
+    assert elapsed < WINDOW / 3
+    assert after_window
+    assert limiter.stats[MODEL]["granted"] == 3
+
+
+def test_waiters_get_slots_a_window_apart_in_arrival_order():
+    async def main():
+        limiter = RateLimiter({MODEL: 2}, window=WINDOW)
+        order = []
+
+        async def request(i):
+            await limiter.acquire(MODEL)
+            order.append((i, time.monotonic()))
+
+        started = time.monotonic()
+        await asyncio.gather(*(request(i) for i in range(5)))
+        return limiter, order, started
+
+    limiter, order, started = asyncio.run(main())
+    assert [i for i, _ in order] == [0, 1, 2, 3, 4]
+    times = [t - started for _, t in order]
+    assert times[1] < WINDOW / 3
+    # Never more than `limit` requests in any window
+    for earlier, later in zip(times, times[2:]):
+        assert later - earlier >= WINDOW * 0.95
+    assert limiter.stats[MODEL]["waited"] == 3
+
+
+def test_acquire_timeout_takes_no_slot():
+    async def main():
+        limiter = RateLimiter({MODEL: 1}, window=WINDOW)
+        await limiter.acquire(MODEL)
+        with pytest.raises(asyncio.TimeoutError):
+            await limiter.acquire(MODEL, timeout=WINDOW / 10)
+        return limiter
+
+    limiter = asyncio.run(main())
+    assert len(limiter.requests[MODEL]) == 1
+    assert limiter.stats[MODEL]["timeouts"] == 1
+    assert limiter.stats[MODEL]["granted"] == 1
+
+
+def test_cancelled_waiter_forfeits_its_slot():
+    async def main():
+        limiter = RateLimiter({MODEL: 1}, window=WINDOW)
+        await limiter.acquire(MODEL)
+        waiter = asyncio.ensure_future(limiter.acquire(MODEL))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        started = time.monotonic()
+        await limiter.acquire(MODEL)
+        return time.monotonic() - started
+
+    # The third request queues behind the cancelled reservation
+    assert asyncio.run(main()) >= WINDOW * 1.9
+
+
+def test_unknown_model_is_not_limited():
+    async def main():
+        limiter = RateLimiter({MODEL: 1}, window=WINDOW)
+        for _ in range(3):
+            await limiter.acquire("other-model")
+        return [await limiter.try_acquire("other-model") for _ in range(3)]
+
+    assert asyncio.run(main()) == [True, True, True]
+
+
+def test_get_stats():
+    async def main():
+        limiter = RateLimiter({MODEL: 2, "bge-m3": 7}, window=WINDOW)
+        await limiter.acquire(MODEL)
+        await limiter.acquire(MODEL)
+        full = limiter.get_stats()
+        waiter = asyncio.ensure_future(limiter.acquire(MODEL))
+        await asyncio.sleep(0)
+        queued = limiter.get_stats()
+        await waiter
+        return full, queued
+
+    full, queued = asyncio.run(main())
+    assert full[MODEL]["in_window"] == 2
+    assert full[MODEL]["reserved_ahead"] == 0
+    assert 0 < full[MODEL]["next_slot_in_s"] <= WINDOW
+    assert queued[MODEL]["reserved_ahead"] == 1
+    assert queued[MODEL]["waited"] == 1
+    assert full["bge-m3"]["in_window"] == 0
+    assert full["bge-m3"]["next_slot_in_s"] == 0
@@ -0,0 +1,52 @@
+import threading
+from types import SimpleNamespace
+
+from app.services.sandbox_pool import SandboxPool
+
+
+class FakeContainer:
+    """exec_run blocks until kill() for commands starting with "hang" """
+
+    def __init__(self):
+        self.killed = threading.Event()
+        self.removed = False
+
+    def exec_run(self, command, **kwargs):
+        if command[0] == "hang":
+            # Like a stream held open by a detached child; docker errors out once killed
+            if not self.killed.wait(10):
+                raise AssertionError("watchdog did not fire")
+            raise RuntimeError("container killed")
+        return SimpleNamespace(exit_code=0, output=(b"ok\n", None))
+
+    def kill(self):
+        self.killed.set()
+
+    def remove(self, force=False):
+        self.removed = True
+
+
+class FakeDocker:
+    def __init__(self):
+        self.created = []
+        self.containers = self
+
+    def run(self, **kwargs):
+        self.created.append(FakeContainer())
+        return self.created[-1]
+
+
+def test_watchdog_kills_and_replaces_overrunning_container():
+    docker = FakeDocker()
+    pool = SandboxPool(docker, {"python": "python:3.11-slim"}, run_timeout=0.2)
+    try:
+        assert pool.run("python", ["echo"]) == (0, "ok\n", "")
+        exit_code, _, stderr = pool.run("python", ["hang"])
+    finally:
+        pool.close()
+
+    assert exit_code == 124 and "wall limit" in stderr
+    assert docker.created[0].killed.is_set() and docker.created[0].removed
+    stats = pool.get_stats()["python"]
+    assert stats["wall_timeouts"] == 1 and stats["recycled_violation"] == 1
+
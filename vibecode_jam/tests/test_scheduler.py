@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.scibox.client import LLMScheduler, Priority, RateLimiter
+
+MODEL = "qwen3-32b-awq"
+
+
+async def fill(scheduler, count):
+    for _ in range(count):
+        await scheduler.acquire(MODEL, Priority.INTERACTIVE)
+
+
+async def served_order(scheduler, requests):
+    """Queue (name, priority, delay) requests and return names in the order they got a slot"""
+    order = []
+
+    async def request(name, priority, delay):
+        await asyncio.sleep(delay)
+        await scheduler.acquire(MODEL, priority)
+        order.append(name)
+
+    await asyncio.gather(*(request(*r) for r in requests))
+    return order
+
+
+def test_aging_period_scales_with_the_slot_interval():
+    scheduler = LLMScheduler(RateLimiter({MODEL: 2, "bge-m3": 600}, window=60.0))
+    # 2/min: one slot per 30s, four slot intervals per class
+    assert scheduler._aging_period(MODEL) == 120.0
+    assert scheduler._aging_period("bge-m3") == scheduler.aging_seconds
+
+
+def test_background_never_outranks_interactive_under_tight_quota():
+    scheduler = LLMScheduler(RateLimiter({MODEL: 2}, window=60.0))
+    now = 1000.0
+    background = [Priority.BACKGROUND, 1, now - 3600, None]
+    evaluation = [Priority.EVALUATION, 2, now - 30, None]
+    interactive = [Priority.INTERACTIVE, 3, now, None]
+    ranks = {name: scheduler._effective_priority(MODEL, waiter, now)
+             for name, waiter in (("background", background), ("evaluation", evaluation), ("interactive", interactive))}
+    assert ranks["interactive"] < ranks["background"]
+    assert ranks["interactive"] < ranks["evaluation"]
+    # Waiting one slot interval is not starvation
+    assert ranks["evaluation"] > Priority.EVALUATION - 1
+    # An hour-old background request still beats fresher non-interactive work
+    assert ranks["background"] < ranks["evaluation"]
+
+
+def test_slots_go_to_the_highest_priority_waiter():
+    async def main():
+        scheduler = LLMScheduler(RateLimiter({MODEL: 2}, window=0.3))
+        await fill(scheduler, 2)
+        return await served_order(scheduler, [
+            ("background", Priority.BACKGROUND, 0),
+            ("evaluation", Priority.EVALUATION, 0.01),
+            ("interactive", Priority.INTERACTIVE, 0.2),
+            ("generation", Priority.TASK_GENERATION, 0.02),
+        ])
+
+    assert asyncio.run(main()) == ["interactive", "generation", "evaluation", "background"]
+
+
+def test_aged_request_overtakes_fresher_lower_class():
+    async def main():
+        scheduler = LLMScheduler(RateLimiter({MODEL: 1}, window=0.1), aging_seconds=0.1, aging_slots=1.0)
+        await fill(scheduler, 1)
+        # At the 0.2s slot background has waited two classes, evaluation half of one
+        return await served_order(scheduler, [
+            ("background", Priority.BACKGROUND, 0),
+            ("evaluation", Priority.EVALUATION, 0.15),
+            ("blocker", Priority.TASK_GENERATION, 0.05),
+        ])
+
+    assert asyncio.run(main()) == ["blocker", "background", "evaluation"]
+
+
+def test_slot_of_cancelled_waiters_goes_to_the_next_arrival():
+    async def main():
+        limiter = RateLimiter({MODEL: 1}, window=0.3)
+        scheduler = LLMScheduler(limiter)
+        await fill(scheduler, 1)
+        waiter = asyncio.ensure_future(scheduler.acquire(MODEL, Priority.BACKGROUND))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0.35)
+        spare = scheduler.get_stats()["spare_slots"]
+        started = time.monotonic()
+        await scheduler.acquire(MODEL, Priority.EVALUATION)
+        return limiter, spare, time.monotonic() - started
+
+    limiter, spare, waited = asyncio.run(main())
+    assert spare == [MODEL]
+    assert waited < 0.05
+    assert limiter.stats[MODEL]["granted"] == 2
+
+
+def test_wait_stats_per_class():
+    async def main():
+        scheduler = LLMScheduler(RateLimiter({MODEL: 1}, window=0.1))
+        await served_order(scheduler, [
+            ("a", Priority.INTERACTIVE, 0), ("b", Priority.BACKGROUND, 0), ("c", None, 0.01)
+        ])
+        return scheduler.get_stats()
+
+    stats = asyncio.run(main())
+    classes = stats["wait_by_class"]
+    assert classes["interactive"]["requests"] == 1
+    assert classes["evaluation"]["requests"] == 1
+    assert classes["background"]["requests"] == 1
+    assert classes["background"]["max_wait_s"] >= 0.15
+    assert stats["queued"] == {MODEL: 0}
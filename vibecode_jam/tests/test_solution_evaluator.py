@@ -0,0 +1,108 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.scibox.client import SciboxClient
+from app.services.scibox.early_stop import EarlyStopStats
+from app.services.scibox.solution_evaluator import SolutionEvaluator, time_bucket
+from app.services.scibox.structured_output import StructuredOutputParser
+from app.services.scibox.token_budget import TokenBudget
+
+TASK = {"title": "Two Sum", "description": "Return indices of two numbers adding up to target"}
+RESULTS = {"visible_passed": 2, "visible_total": 2, "hidden_passed": 3, "hidden_total": 3}
+
+
+@pytest.mark.parametrize("ms, bucket", [
+    (0.0, "<10ms"), (0.153, "<10ms"), (9.99, "<10ms"), (10, "<100ms"),
+    (250.5, "<1s"), (1000, "slow (1s or more)"),
+])
+def test_time_bucket(ms, bucket):
+    assert time_bucket(ms) == bucket
+
+
+def test_prompt_is_stable_across_runs_of_the_same_code():
+    evaluator = SolutionEvaluator(SimpleNamespace(token_budget=TokenBudget()))
+    first = evaluator._build_evaluation_messages(TASK, "print(1)", RESULTS, 0.153, "python")
+    second = evaluator._build_evaluation_messages(TASK, "print(1)", RESULTS, 2.871, "python")
+    assert first == second
+    assert "Execution time: <10ms" in first[1]["content"]
+
+
+class FakeStream:
+    """Server-sent events of a streaming chat completion"""
+
+    def __init__(self, chunks, finish_reason):
+        events = [{"choices": [{"delta": {"content": chunk}}]} for chunk in chunks]
+        events.append({"choices": [{"delta": {}, "finish_reason": finish_reason}]})
+        self.lines = [f"data: {json.dumps(event)}\n".encode() for event in events] + [b"data: [DONE]\n"]
+        self.closed = False
+
+    @property
+    async def content(self):
+        for line in self.lines:
+            if self.closed:
+                return
+            yield line
+
+    def close(self):
+        self.closed = True
+
+    def release(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self, stream):
+        self.stream = stream
+        self.early_stop = True
+        self.token_budget = TokenBudget()
+        self.early_stop_stats = EarlyStopStats()
+        self.structured_output = StructuredOutputParser(self)
+        self.iter_stream_content = SciboxClient.iter_stream_content
+        self.stored = []
+
+    async def get_cached_completion(self, **request):
+        return None
+
+    async def chat_completion(self, **request):
+        return self.stream
+
+    async def store_completion(self, **request):
+        self.stored.append(request)
+
+
+def evaluate_stream(client):
+    async def main():
+        evaluator = SolutionEvaluator(client)
+        return [event async for event in evaluator.evaluate_solution_stream(TASK, "print(1)", RESULTS, 1.0)]
+    return asyncio.run(main())
+
+
+EVALUATION = (
+    '{"correctness_score": 90, "code_quality_score": 80, "efficiency_score": 70, '
+    '"overall_score": 82, "feedback": {"summary": "good"}}'
+)
+
+
+def test_stream_records_output_and_stops_after_the_object():
+    client = FakeClient(FakeStream([EVALUATION[:40], EVALUATION[40:], " trailing notes"], "stop"))
+    events = evaluate_stream(client)
+    assert events[-1]["evaluation"]["overall_score"] == 82
+    assert client.stream.closed
+    assert client.early_stop_stats.stats["evaluate_solution"]["early_stops"] == 1
+    assert client.token_budget.get_stats()["evaluate_solution"]["truncated"] == 0
+    assert client.stored[0]["finish_reason"] == "stop"
+    assert client.stored[0]["content"] == EVALUATION
+
+
+def test_truncated_stream_is_recorded_and_cached_as_truncated():
+    truncated = EVALUATION[:-5]  # cut inside the feedback summary
+    client = FakeClient(FakeStream([truncated], "length"))
+    events = evaluate_stream(client)
+    assert events[-1]["evaluation"]["overall_score"] == 82
+    stats = client.early_stop_stats.stats["evaluate_solution"]
+    assert (stats["streams"], stats["early_stops"]) == (1, 0)
+    assert client.token_budget.get_stats()["evaluate_solution"]["truncated"] == 1
+    assert client.stored[0]["finish_reason"] == "length"
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from app.services.scibox.structured_output import (
+    IncrementalJSONParser,
+    StructuredOutputError,
+    extract_json_object,
+    parse_json_object,
+    repair_json,
+    validate,
+)
+
+
+def feed_all(parser, chunks):
+    completed = []
+    for chunk in chunks:
+        completed.extend(parser.feed(chunk))
+    return completed
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1}', '{"a": 1}'),
+    ('Here you go:\n```json\n{"a": {"b": [1, 2]}}\n```\nDone.', '{"a": {"b": [1, 2]}}'),
+    ('<think>maybe {"a": 0}?</think>{"a": 1}', '{"a": 1}'),
+    ('{"a": "} not the end {"} trailing', '{"a": "} not the end {"}'),
+    ('{"a": "quote \\" and } inside"}', '{"a": "quote \\" and } inside"}'),
+    ('{"a": 1} {"b": 2}', '{"a": 1}'),
+])
+def test_extract_json_object(text, expected):
+    assert extract_json_object(text) == expected
+
+
+def test_extract_json_object_truncated_and_missing():
+    assert extract_json_object('text {"a": [1, 2') == '{"a": [1, 2'
+    assert extract_json_object("no object here") is None
+    assert extract_json_object("<think>{}</think> nothing") is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1,}', {"a": 1}),
+    ('{"a": [1, 2, ], }', {"a": [1, 2]}),
+    ('{"a": True, "b": False, "c": None}', {"a": True, "b": False, "c": None}),
+    ('{"a": 1, // comment\n "b": 2}', {"a": 1, "b": 2}),
+    ('{"a": /* block */ 1}', {"a": 1}),
+    ('{“a”: “b”}', {"a": "b"}),
+    ('{"a": "line\nbreak"}', {"a": "line\nbreak"}),
+    ('{"a": "http://x.y/z"}', {"a": "http://x.y/z"}),
+    ('{"a": "True None"}', {"a": "True None"}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": "unterminated', {"a": "unterminated"}),
+    ('{"a": [1, 2', {"a": [1, 2]}),
+    ('{"a": {"b": 1,', {"a": {"b": 1}}),
+    ('{"a": 1, "b":', {"a": 1, "b": None}),
+])
+def test_repair_json_closes_truncated_output(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_parse_json_object():
+    assert parse_json_object('```json\n{"score": 7}\n```') == ({"score": 7}, False)
+    assert parse_json_object('{"score": 7,}') == ({"score": 7}, True)
+    with pytest.raises(StructuredOutputError):
+        parse_json_object("no json")
+    with pytest.raises(StructuredOutputError):
+        parse_json_object('{"a": }}}')
+
+
+def test_validate_coerces_in_place():
+    data = {"score": "85%", "passed": "True", "feedback": "ok"}
+    assert validate(data, {"score": (int, float), "passed": bool, "feedback": str}) is None
+    assert data == {"score": 85, "passed": True, "feedback": "ok"}
+    assert validate({"score": True}, {"score": int}) == "field 'score' has type bool"
+    assert validate({}, {"score": int}) == "missing field 'score'"
+
+
+def test_incremental_parser_yields_fields_as_they_complete():
+    parser = IncrementalJSONParser()
+    assert parser.feed('<think>{"ignored": 1}</think>```json\n{"score": 8') == []
+    assert parser.feed('5, "summary": "a, b') == [("score", 85)]
+    assert parser.feed(' and {c}", "issues": [{"line": 1}') == [("summary", "a, b and {c}")]
+    assert parser.feed(', {"line": 2}]}\n```') == [("issues", [{"line": 1}, {"line": 2}])]
+    assert parser.done
+    assert parser.fields == {"score": 85, "summary": "a, b and {c}", "issues": [{"line": 1}, {"line": 2}]}
+    assert parser.feed('{"more": 1}') == []
+
+
+def test_incremental_parser_matches_json_loads_for_any_chunking():
+    text = '{"a": "x \\"q\\" }", "b": [1, {"c": null}], "d": true, "e": -1.5e3, "f": null}'
+    expected = json.loads(text)
+    for size in (1, 2, 3, 7, len(text)):
+        parser = IncrementalJSONParser()
+        completed = feed_all(parser, [text[i:i + size] for i in range(0, len(text), size)])
+        assert dict(completed) == expected
+        assert parser.done
+
+
+def test_incremental_parser_handles_empty_and_unfinished_objects():
+    parser = IncrementalJSONParser()
+    assert parser.feed("{}") == []
+    assert parser.done
+
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": 1, "b": [1,') == [("a", 1)]
+    assert not parser.done
+    assert parser.fields == {"a": 1}
@@ -0,0 +1,53 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.db.models import Task
+from app.services.task_bank import TaskBank, store_generated
+
+
+class FakeSession:
+    """Assigns ids on flush like the database would"""
+
+    def __init__(self):
+        self.added = []
+
+    def add(self, row):
+        self.added.append(row)
+
+    async def flush(self):
+        for row in self.added:
+            if row.id is None:
+                row.id = len(self.added) + 100
+
+
+GENERATED = {"title": "Two Sum", "description": "Find two numbers", "examples": [{"input": "[1, 2]"}]}
+
+
+def test_generated_task_is_stored_as_bank_task_plus_interview_copy():
+    db = FakeSession()
+    source, task = asyncio.run(store_generated(db, 7, GENERATED, "junior", "algorithms"))
+
+    assert db.added == [source, task]
+    assert source.interview_id is None
+    assert source.source_task_id is None
+    assert (source.times_used, source.level, source.domain) == (1, "junior", "algorithms")
+    assert source.task_data == GENERATED
+
+    assert task.interview_id == 7
+    assert task.source_task_id == source.id
+    assert (task.title, task.description, task.level) == ("Two Sum", "Find two numbers", "junior")
+    assert task.task_data == GENERATED
+
+
+def test_default_title():
+    _, task = asyncio.run(store_generated(FakeSession(), 7, {"description": "x"}, "junior", "algorithms", "Adapted Task"))
+    assert task.title == "Adapted Task"
+
+
+def test_tasks_owned_by_an_interview_are_not_servable():
+    query = select(Task.id).where(*TaskBank()._servable("junior", "algorithms"))
+    sql = str(query.compile(dialect=postgresql.dialect()))
+    assert "tasks.source_task_id IS NULL" in sql
+    assert "tasks.interview_id IS NULL" in sql
@@ -0,0 +1,182 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.scibox.client import Priority
+from app.services.scibox.task_dedup import DuplicateTaskError, TaskDedupIndex, shingles
+from app.services.scibox.task_generator import TaskGenerator
+
+
+class FakeEmbeddings:
+    """Embeds by word counts over a fixed vocabulary"""
+
+    VOCAB = ["array", "sum", "target", "string", "palindrome", "tree", "depth", "graph", "path"]
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    async def get_embedding(self, text, model="bge-m3"):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("embeddings down")
+        words = text.lower().split()
+        return [float(words.count(word)) + 0.01 for word in self.VOCAB]
+
+
+TWO_SUM = {
+    "title": "Two Sum",
+    "description": "Given an array of integers and a target, return indices of the two numbers that add up to target"
+}
+PALINDROME = {
+    "title": "Valid Palindrome",
+    "description": "Check whether a string reads the same forwards and backwards ignoring case and punctuation"
+}
+
+
+def test_shingles():
+    assert shingles("Two, sum!") == ["two sum"]
+    assert shingles("a b c d") == ["a b c", "b c d"]
+    assert shingles("") == []
+
+
+def test_check_reserves_until_registered():
+    index = TaskDedupIndex(FakeEmbeddings())
+
+    async def run():
+        assert await index.check("algorithms", TWO_SUM) is None
+        # The reservation blocks a concurrent copy before anything is stored
+        match = await index.check("algorithms", dict(TWO_SUM))
+        assert match["title"] == "Two Sum" and match["task_id"] is None
+        assert index.size() == 0
+
+        await index.register("algorithms", TWO_SUM, 42)
+        match = await index.check("algorithms", TWO_SUM)
+        assert match["task_id"] == 42 and match["method"] == "minhash"
+
+    asyncio.run(run())
+    assert index.get_stats()["reserved"] == 0
+    assert index.size() == 1
+
+
+def test_release_frees_reservation():
+    index = TaskDedupIndex(FakeEmbeddings())
+
+    async def run():
+        assert await index.check("algorithms", TWO_SUM) is None
+        index.release("algorithms", TWO_SUM)
+        assert await index.check("algorithms", TWO_SUM) is None
+
+    asyncio.run(run())
+    assert index.stats["released"] == 1
+
+
+def test_domains_are_separate():
+    index = TaskDedupIndex(FakeEmbeddings())
+
+    async def run():
+        await index.register("algorithms", TWO_SUM, 1)
+        assert await index.check("backend", TWO_SUM) is None
+        assert await index.check("algorithms", PALINDROME) is None
+
+    asyncio.run(run())
+
+
+def test_embedding_match_with_different_wording():
+    index = TaskDedupIndex(FakeEmbeddings(), embedding_threshold=0.95)
+    reworded = {
+        "title": "Pair With Target Sum",
+        "description": "For an array find two positions whose values sum to the target sum value array"
+    }
+
+    async def run():
+        await index.check("algorithms", TWO_SUM)
+        await index.register("algorithms", TWO_SUM, 7)
+        return await index.check("algorithms", reworded)
+
+    match = asyncio.run(run())
+    assert match is not None and match["method"] == "embedding" and match["task_id"] == 7
+
+
+def test_embedding_failure_falls_back_to_minhash():
+    index = TaskDedupIndex(FakeEmbeddings(fail=True))
+
+    async def run():
+        assert await index.check("algorithms", TWO_SUM) is None
+        await index.register("algorithms", TWO_SUM, 1)
+        return await index.check("algorithms", TWO_SUM)
+
+    assert asyncio.run(run())["method"] == "minhash"
+    assert index.stats["embedding_skipped"] == 1
+
+
+def test_expired_reservation_is_dropped():
+    index = TaskDedupIndex(FakeEmbeddings(), reservation_ttl=0)
+
+    async def run():
+        assert await index.check("algorithms", TWO_SUM) is None
+        assert await index.check("algorithms", TWO_SUM) is None
+
+    asyncio.run(run())
+    assert index.stats["reservations_expired"] == 1
+
+
+def test_register_without_check_skips_known_task():
+    index = TaskDedupIndex(FakeEmbeddings())
+
+    async def run():
+        await index.register("algorithms", TWO_SUM, 1)
+        await index.register("algorithms", dict(TWO_SUM), 2)
+
+    asyncio.run(run())
+    assert index.size() == 1
+
+
+def test_signature_is_stable():
+    a, b = TaskDedupIndex(FakeEmbeddings()), TaskDedupIndex(FakeEmbeddings())
+    text = TWO_SUM["description"]
+    assert np.array_equal(a.signature(text), b.signature(text))
+
+
+class ScriptedGenerator(TaskGenerator):
+    """TaskGenerator whose model replies come from a list"""
+
+    def __init__(self, replies, **kwargs):
+        super().__init__(client=None, **kwargs)
+        self.replies = list(replies)
+        self.avoided = []
+
+    async def _request_task(self, level, domain, previous_score, priority, avoid_titles):
+        self.avoided.append(list(avoid_titles))
+        return dict(self.replies.pop(0))
+
+    async def _request_adapted(self, original_task, candidate_score, step, priority, avoid_titles):
+        self.avoided.append(list(avoid_titles))
+        return dict(self.replies.pop(0))
+
+
+def test_generate_task_regenerates_near_duplicate():
+    index = TaskDedupIndex(FakeEmbeddings())
+    generator = ScriptedGenerator([TWO_SUM, PALINDROME], dedup=index)
+
+    async def run():
+        await index.register("algorithms", TWO_SUM, 1)
+        return await generator.generate_task("junior", "algorithms")
+
+    assert asyncio.run(run())["title"] == "Valid Palindrome"
+    assert generator.avoided == [[], ["Two Sum"]]
+
+
+def test_adapt_task_is_deduplicated():
+    index = TaskDedupIndex(FakeEmbeddings())
+    generator = ScriptedGenerator([TWO_SUM, TWO_SUM], dedup=index)
+
+    async def run():
+        await index.register("algorithms", TWO_SUM, 1)
+        await generator.adapt_task(
+            PALINDROME, None, step="same", priority=Priority.BACKGROUND, domain="algorithms"
+        )
+
+    with pytest.raises(DuplicateTaskError):
+        asyncio.run(run())
@@ -0,0 +1,134 @@
+from app.services.scibox.token_budget import (
+    MODEL_CONTEXT_LIMITS,
+    TokenBudget,
+    compact_code,
+    compact_text,
+    elide_middle,
+    estimate_messages_tokens,
+    estimate_tokens,
+    strip_comments,
+)
+
+MODEL = "qwen3-32b-awq"
+MESSAGES = [{"role": "user", "content": "Review this code"}]
+
+
+def response(content, finish_reason="stop", usage=None):
+    result = {"choices": [{"message": {"content": content}, "finish_reason": finish_reason}]}
+    if usage is not None:
+        result["usage"] = usage
+    return result
+
+
+def observe(budget, call_site, lengths, truncated=False):
+    for n in lengths:
+        budget.record_output(call_site, MODEL, "word " * n, truncated=truncated)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("def f(x): return x") == 9
+    assert estimate_tokens("identifier") == 3
+    assert estimate_messages_tokens(MESSAGES) == estimate_tokens("Review this code") + 4
+
+
+def test_strip_comments():
+    python = "import os\n\n# comment\n    # indented\nx = '# not a comment'  \n"
+    assert strip_comments(python) == "import os\nx = '# not a comment'"
+    js = "// header\nlet a = 1;\n/* block\n still block */\nlet b = '//';\n/* one line */\nlet c;"
+    assert strip_comments(js, "javascript") == "let a = 1;\nlet b = '//';\nlet c;"
+
+
+def test_elide_middle_keeps_head_and_tail():
+    lines = [f"line_{i} = {i}" for i in range(100)]
+    kept = elide_middle(lines, 100)
+    marker = next(line for line in kept if line.startswith("..."))
+    head, tail = kept[:kept.index(marker)], kept[kept.index(marker) + 1:]
+    assert head == lines[:len(head)]
+    assert tail == lines[len(lines) - len(tail):]
+    assert marker == f"... [{100 - len(head) - len(tail)} lines omitted] ..."
+    assert len(head) >= len(tail)
+    assert sum(estimate_tokens(line) + 1 for line in kept) <= 100
+    assert elide_middle(lines[:3], 100) == lines[:3]
+
+
+def test_compact_code_strips_before_eliding():
+    code = "\n".join(["# a long comment line with many words in it"] * 20 + ["x = 1", "y = 2"])
+    assert compact_code(code, max_tokens=4000) is code
+    assert compact_code(code, max_tokens=20) == "x = 1\ny = 2"
+    long_code = "\n".join(f"v{i} = {i}" for i in range(500))
+    compacted = compact_code(long_code, max_tokens=200)
+    assert "lines omitted" in compacted
+    assert estimate_tokens(compacted) <= 200
+
+
+def test_compact_text():
+    text = "short description"
+    assert compact_text(text, 100) is text
+    paragraph = "word " * 1000
+    compacted = compact_text(paragraph, 100)
+    assert " ... " in compacted
+    assert estimate_tokens(compacted) < 150
+
+
+def test_pick_max_tokens_keeps_request_until_enough_observations():
+    budget = TokenBudget(min_observations=20)
+    observe(budget, "review", [100] * 19)
+    assert budget.pick_max_tokens("review", MODEL, MESSAGES, 2000) == 2000
+
+
+def test_pick_max_tokens_adapts_to_observed_outputs():
+    budget = TokenBudget(min_observations=20, headroom=1.3, step=128, floor=256)
+    observe(budget, "review", [300] * 19 + [400])
+    # p95 400 * 1.3 = 520, rounded up to 640
+    assert budget.pick_max_tokens("review", MODEL, MESSAGES, 2000) == 640
+    assert budget.pick_max_tokens("review", MODEL, MESSAGES, 500) == 500
+
+    observe(budget, "short", [10] * 20)
+    assert budget.pick_max_tokens("short", MODEL, MESSAGES, 2000) == 256
+
+
+def test_truncated_output_falls_back_to_requested():
+    budget = TokenBudget(min_observations=20)
+    observe(budget, "review", [300] * 20)
+    observe(budget, "review", [640], truncated=True)
+    assert budget.pick_max_tokens("review", MODEL, MESSAGES, 2000) == 2000
+    assert budget.get_stats()["review"]["truncated"] == 1
+
+    budget.record("review", MODEL, MESSAGES, response("word " * 10, finish_reason="length"))
+    assert budget.get_stats()["review"]["truncated"] == 2
+
+
+def test_pick_max_tokens_leaves_room_for_the_prompt():
+    budget = TokenBudget()
+    context = MODEL_CONTEXT_LIMITS[MODEL]
+    prompt = [{"role": "user", "content": "word " * (context - 1000)}]
+    available = context - estimate_messages_tokens(prompt)
+    assert budget.pick_max_tokens("review", MODEL, prompt, 4000) == available
+    huge = [{"role": "user", "content": "word " * context}]
+    assert budget.pick_max_tokens("review", MODEL, huge, 4000) == 1
+
+
+def test_record_uses_reported_usage_and_prices():
+    budget = TokenBudget()
+    budget.record("review", MODEL, MESSAGES, response("ok", usage={"prompt_tokens": 1000, "completion_tokens": 500}))
+    budget.record("review", MODEL, MESSAGES)  # stream start: prompt only
+    stats = budget.get_stats()["review"]
+    prompt_estimate = estimate_messages_tokens(MESSAGES)
+    assert stats["calls"] == 2
+    assert stats["prompt_tokens"] == 1000 + prompt_estimate
+    assert stats["max_prompt_tokens"] == 1000
+    assert stats["completion_tokens"] == 500
+    assert stats["cost"] == round((1000 + prompt_estimate) * 1.0 / 1000 + 500 * 3.0 / 1000, 4)
+    assert stats["output_p95"] == 500
+
+
+def test_compaction_savings_are_recorded():
+    budget = TokenBudget()
+    code = "\n".join(f"v{i} = {i}" for i in range(500))
+    assert budget.compact_code("x = 1", "python", "review") == "x = 1"
+    compacted = budget.compact_code(code, "python", "review", max_tokens=200)
+    budget.compact_text("word " * 1000, "review", max_tokens=100)
+    stats = budget.get_stats()["review"]
+    assert stats["compactions"] == 2
+    assert stats["tokens_saved"] > estimate_tokens(code) - estimate_tokens(compacted)